@@ -0,0 +1,120 @@
+# file: benchmarks/bench_binary.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Compare the text and binary record formats: the bytes sent through each
+pipe, and the CPU time each consumer spends reading them.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_binary.py --weeks 2000
+
+Consumers timed: Transform (read, transform, and write), load.py's
+record parsing, and Chart.read_file(). The benchmark fails if any
+consumer's results differ between the formats.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from argparse import Namespace
+
+from src import binary_records
+from src.chart.chart_new import Chart
+from src.extract.read_fns import Extract
+from src.load import load
+from src.transform.do_transform import Transform
+from tests.file_access_wrappers import FakeFileReadWrapper
+from tests.sample_csv import make_csv
+
+
+def timed(fn, *args):
+    start = time.process_time()
+    result = fn(*args)
+    return time.process_time() - start, result
+
+
+def transform_text(text):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Transform(FakeFileReadWrapper(text)).read_each_line()
+    return out.getvalue()
+
+
+def transform_binary(data):
+    out = io.BytesIO()
+    binary_records.write_fields(
+        Transform().read_fields(
+            binary_records.read_fields(io.BytesIO(data))), out)
+    return out.getvalue()
+
+
+def load_text(text):
+    return list(load.read_records(io.StringIO(text)))
+
+
+def load_binary(data):
+    return list(binary_records.read_records(io.BytesIO(data)))
+
+
+def chart(filename, binary):
+    return list(Chart(Namespace(debug=True, filename=filename,
+                                binary=binary, since=None,
+                                until=None)).read_file())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=2000)
+    args = parser.parse_args()
+
+    csv_text = make_csv(args.weeks, missing_data_rate=0.05)
+    extract_text = io.StringIO()
+    Extract(io.StringIO(csv_text)).lines_in_weeks_out(extract_text)
+    extract_text = extract_text.getvalue()
+    extract_binary = io.BytesIO()
+    binary_records.write_records(Extract(io.StringIO(csv_text)).records(),
+                                 extract_binary)
+    extract_binary = extract_binary.getvalue()
+
+    text_secs, transform_out = timed(transform_text, extract_text)
+    binary_secs, transform_bin = timed(transform_binary, extract_binary)
+    rows = [('extract -> transform', len(extract_text.encode()),
+             len(extract_binary), text_secs, binary_secs)]
+
+    text_secs, text_records = timed(load_text, transform_out)
+    binary_secs, binary_records_read = timed(load_binary, transform_bin)
+    if [r.line() for r in text_records] != \
+            [r.line() for r in binary_records_read]:
+        raise SystemExit('load records differ')
+    rows.append(('transform -> load', len(transform_out.encode()),
+                 len(transform_bin), text_secs, binary_secs))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text_file = os.path.join(tmp_dir, 'extract.txt')
+        binary_file = os.path.join(tmp_dir, 'extract.bin')
+        with open(text_file, 'w') as outfile:
+            outfile.write(extract_text)
+        with open(binary_file, 'wb') as outfile:
+            outfile.write(extract_binary)
+        text_secs, text_triples = timed(chart, text_file, False)
+        binary_secs, binary_triples = timed(chart, binary_file, True)
+    if text_triples != binary_triples:
+        raise SystemExit('chart input differs')
+    rows.append(('extract -> chart', len(extract_text.encode()),
+                 len(extract_binary), text_secs, binary_secs))
+
+    print('{:22} {:>11} {:>11} {:>9} {:>9}'.format(
+        'stream', 'text bytes', 'bin bytes', 'text cpu', 'bin cpu'))
+    for name, text_bytes, bin_bytes, text_secs, binary_secs in rows:
+        print('{:22} {:11,} {:11,} {:9.3f} {:9.3f}'.format(
+            name, text_bytes, bin_bytes, text_secs, binary_secs))
+
+
+if __name__ == '__main__':
+    main()
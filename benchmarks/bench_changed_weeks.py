@@ -0,0 +1,82 @@
+# file: benchmarks/bench_changed_weeks.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time the run after one week in the middle of the .csv file is edited:
+Extract on the whole file, against ChangedWeeksExtract with the week
+store of the run before.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_changed_weeks.py \\
+        --weeks 3000
+
+The edit takes the hours off a 'b' Event, so the night before it is
+discarded. The benchmark fails if the Nights and Naps of the targeted
+run are not all in the full run's output, or if any Night or Nap that
+the edit added is missing from them.
+"""
+
+import argparse
+import io
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+from src.extract.read_fns import ChangedWeeksExtract, Extract
+from src.transform.do_transform import Transform
+from tests.sample_csv import make_csv
+
+
+def changed_weeks(csv_text, csv_file, store):
+    with open(csv_file, 'w') as outfile:
+        outfile.write(csv_text)
+    with open(csv_file, 'rb') as infile:
+        extract = ChangedWeeksExtract(infile, store)
+        return list(extract.records()), extract.changes
+
+
+def nights_naps(records):
+    return Counter(Transform().read_records(records))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=3000)
+    args = parser.parse_args()
+
+    csv_text = make_csv(args.weeks)
+    rows = csv_text.splitlines()
+    row_ix = next(ix for ix in range(len(rows) // 2, len(rows))
+                  if re.search(r',b,\d+:\d\d,\d', rows[ix]))
+    rows[row_ix] = re.sub(r'(,b,\d+:\d\d,)[\d.]+', r'\1', rows[row_ix], 1)
+    edited = '\n'.join(rows) + '\n'
+
+    start = time.perf_counter()
+    full = list(Extract(io.StringIO(edited)).records())
+    full_secs = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = os.path.join(tmp_dir, 'sleep.csv')
+        store = os.path.join(tmp_dir, 'weeks.json')
+        changed_weeks(csv_text, csv_file, store)
+        start = time.perf_counter()
+        targeted, changes = changed_weeks(edited, csv_file, store)
+        targeted_secs = time.perf_counter() - start
+    before = nights_naps(Extract(io.StringIO(csv_text)).records())
+    after = nights_naps(full)
+    region = nights_naps(targeted)
+    if region - after or after - before - region:
+        raise SystemExit('targeted records differ')
+    print('changed weeks: {}'.format(', '.join(changes['changed'])))
+    print('{:10} {:>9} {:>9}'.format('run', 'records', 'seconds'))
+    print('{:10} {:9,} {:9.3f}'.format('full', len(full), full_secs))
+    print('{:10} {:9,} {:9.3f}'.format('targeted', len(targeted),
+                                       targeted_secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# file: benchmarks/bench_chart.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Compare Chart and MatrixChart: the time each spends making the output
+rows from parsed input, and the time MatrixChart spends rendering them,
+and the size of its matrix, at a resolution of 15, 5, or 1 minutes.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_chart.py --weeks 522 \\
+        --resolution 5
+
+The input is parsed once, before timing. The benchmark fails if the
+two charts' output differs.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from argparse import Namespace
+
+from src.chart.chart_new import RESOLUTIONS, Chart, MatrixChart
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
+
+
+def chart_output(chart_class, filename, debug, resolution):
+    """ :return: the seconds to make and print the rows, and the output """
+    chart = chart_class(Namespace(debug=debug, binary=False,
+                                  filename=filename, since=None, until=None),
+                        resolution)
+    parsed = list(chart.read_file())
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        chart.make_output(iter(parsed))
+    return time.perf_counter() - start, chart, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=522)
+    parser.add_argument('--resolution', type=int, choices=RESOLUTIONS,
+                        default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'extract.txt')
+        with open(filename, 'w') as outfile:
+            Extract(io.StringIO(make_csv(args.weeks))) \
+                .lines_in_weeks_out(outfile)
+        for debug in (False, True):
+            chart_secs, _, expected = chart_output(Chart, filename, debug,
+                                                   args.resolution)
+            matrix_secs, matrix_chart, output = chart_output(
+                MatrixChart, filename, debug, args.resolution)
+            if output != expected:
+                raise SystemExit('the outputs differ')
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                matrix_chart._render()
+            render_secs = time.perf_counter() - start
+            print('{:6} rows {:5}  Chart {:.3f} s  MatrixChart {:.3f} s '
+                  '(render {:.4f} s, matrix {:,} bytes)'.format(
+                      'debug' if debug else 'glyphs',
+                      len(matrix_chart.row_ordinals), chart_secs,
+                      matrix_secs, render_secs, len(matrix_chart.matrix)))
+
+
+if __name__ == '__main__':
+    main()
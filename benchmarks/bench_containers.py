@@ -0,0 +1,73 @@
+# file: benchmarks/bench_containers.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Report the memory held per 10,000 Events by parsed Weeks: as tuples of
+Days holding lists of Event namedtuples of strings (as before Weeks
+stored their Events in an EventColumns), and as Weeks.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_containers.py
+
+The pickled size per 10,000 Events, which is what ParallelExtract's
+workers send back, is reported too.
+"""
+
+import argparse
+import pickle
+import tracemalloc
+
+from container_objs import Day, Event
+from src.extract.read_fns import _parse_chunk
+from tests.sample_csv import make_csv
+
+
+def fresh(field):
+    """ A copy of field, as parsing a .csv line would make one """
+    return (field + ' ')[:-1]
+
+
+def legacy_weeks(weeks):
+    """ :return: weeks, as 7-tuples of Days with lists of Events """
+    return [tuple(Day(day.dt_date, [Event(*map(fresh, event))
+                                    for event in day.events])
+                  for day in week)
+            for week in weeks]
+
+
+def traced_bytes(make):
+    """ :return: the result of make(), and the memory it holds """
+    tracemalloc.start()
+    result = make()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, held
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=2000)
+    args = parser.parse_args()
+
+    lines = make_csv(args.weeks).splitlines(keepends=True)
+    weeks, held = traced_bytes(lambda: _parse_chunk(lines)[0])
+    n_events = sum(len(week.columns) for week in weeks)
+    old_weeks, old_held = traced_bytes(lambda: legacy_weeks(weeks))
+    assert [tuple(week) for week in weeks] == old_weeks
+
+    per_10k = 10000 / n_events
+    print('{} weeks, {} events; per 10,000 events:'.format(len(weeks),
+                                                           n_events))
+    print('{:>8} {:>10} {:>10}'.format('', 'memory', 'pickled'))
+    for name, held_bytes, objs in (('before', old_held, old_weeks),
+                                   ('after', held, weeks)):
+        pickled = len(pickle.dumps(objs, pickle.HIGHEST_PROTOCOL))
+        print('{:>8} {:>10,.0f} {:>10,.0f}'.format(
+            name, held_bytes * per_10k, pickled * per_10k))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# file: benchmarks/bench_date_range.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time the fused extract and transform stages on a whole .csv file, and
+with --since/--until windows of several sizes, to show that a windowed
+run costs about as much as its window.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_date_range.py \\
+        --weeks 3000
+
+Each window ends at the middle of the file. The benchmark fails if a
+window's Nights and Naps differ from the full run's, limited to it.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.date_range import DateRange
+from src.pipeline import nights_naps
+from tests.sample_csv import make_csv
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=3000)
+    args = parser.parse_args()
+
+    first_sunday = date(2016, 12, 4)
+    until = first_sunday + timedelta(weeks=args.weeks // 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = os.path.join(tmp_dir, 'sleep.csv')
+        with open(csv_file, 'w') as outfile:
+            outfile.write(make_csv(args.weeks, first_sunday=first_sunday))
+        full_secs, full = timed(lambda: list(nights_naps(csv_file)))
+        list(nights_naps(csv_file, mapped=True))  # build the week index
+        rows = []
+        for days in (7, 30, 365, 3650):
+            since = until - timedelta(days=days - 1)
+            secs, in_range = timed(
+                lambda: list(nights_naps(csv_file, since=since,
+                                         until=until)))
+            if in_range != list(DateRange(since, until).night_naps(full)):
+                raise SystemExit('window of {} days differs'.format(days))
+            rows.append(('{} days'.format(days), len(in_range), secs))
+    print('{:12} {:>9} {:>9}'.format('run', 'records', 'seconds'))
+    print('{:12} {:9,} {:9.3f}'.format('full', len(full), full_secs))
+    for name, records, secs in rows:
+        print('{:12} {:9,} {:9.3f}'.format(name, records, secs))
+
+
+if __name__ == '__main__':
+    main()
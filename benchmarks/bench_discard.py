@@ -0,0 +1,87 @@
+# file: benchmarks/bench_discard.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time Extract's single-truncation discard of incomplete nights against
+the reverse scan it replaced, which rendered and re-matched each buffered
+event with a regex before popping it.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_discard.py --weeks 2000
+
+A high missing-data rate gives long runs of discarded nights. The
+benchmark fails if the two outputs differ.
+"""
+
+import argparse
+import io
+import re
+import time
+
+from container_objs import Event
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
+
+
+class LegacyExtract(Extract):
+    """ Extract with the reverse-scan-and-pop discard """
+    def _write_complete_night(self, out_buffer):
+        for record in out_buffer:
+            if self.in_missing_data:
+                if isinstance(record, Event) and \
+                        record.action.startswith('b'):
+                    record = record._replace(action='Y' + record.action[1:])
+                    self.in_missing_data = False
+            self.ready.append(record)
+        out_buffer.clear()
+
+    def _discard_incomplete_night(self, out_buffer):
+        for buf_ix in range(len(out_buffer) - 1, -1, -1):
+            record = out_buffer[buf_ix]
+            if not isinstance(record, Event):
+                continue
+            this_line = record.line()
+            if re.match(r'action: b, time: \d{1,2}:\d{2},'
+                        r' hours: \d{1,2}\.\d{2}$', this_line):
+                self.ready.append(
+                    out_buffer.pop(buf_ix)._replace(action='N', hours=''))
+            elif re.match(r'(?:action: b, time: \d{1,2}:\d{2})'
+                          r'(?:, hours: \d{1,2}\.\d{2})?$'
+                          r'|(?:action: s, time: \d{1,2}:\d{2}$)'
+                          r'|(?:action: w, time: \d{1,2}:\d{2}, '
+                          r'hours: \d{1,2}\.\d{2}$)', this_line):
+                out_buffer.pop(buf_ix)
+        self.in_missing_data = True
+
+
+def run(extract_class, csv_text):
+    """
+    :return: seconds taken, and the extract stage's output
+    """
+    outfile = io.StringIO()
+    start = time.perf_counter()
+    extract_class(io.StringIO(csv_text)).lines_in_weeks_out(outfile)
+    return time.perf_counter() - start, outfile.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=2000)
+    parser.add_argument('--missing', type=float, default=0.5,
+                        help='rate of days with missing data')
+    args = parser.parse_args()
+
+    csv_text = make_csv(args.weeks, missing_data_rate=args.missing)
+    legacy_secs, expected = run(LegacyExtract, csv_text)
+    secs, output = run(Extract, csv_text)
+    if output != expected:
+        raise SystemExit('outputs differ')
+    print('{:>8} {:9.3f}'.format('legacy', legacy_secs))
+    print('{:>8} {:9.3f} {:8.2f}x'.format('extract', secs, legacy_secs / secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# file: benchmarks/bench_extract.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time Extract against ParallelExtract at 1, 2, 4, and 8 workers.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_extract.py --weeks 5000
+
+The input is a synthetic spreadsheet from tests/sample_csv.py. The
+benchmark fails if any parallel run's output differs from Extract's.
+"""
+
+import argparse
+import io
+import time
+
+from src.extract.read_fns import Extract, ParallelExtract
+from tests.sample_csv import make_csv
+
+
+def run(make_extract, csv_text):
+    """
+    :return: seconds taken, and the extract stage's output
+    """
+    outfile = io.StringIO()
+    start = time.perf_counter()
+    make_extract(io.StringIO(csv_text)).lines_in_weeks_out(outfile)
+    return time.perf_counter() - start, outfile.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=2000)
+    args = parser.parse_args()
+
+    csv_text = make_csv(args.weeks, missing_data_rate=0.05)
+    serial_secs, expected = run(Extract, csv_text)
+    print('{:>8} {:>9} {:>8}'.format('workers', 'seconds', 'speedup'))
+    print('{:>8} {:9.3f} {:8.2f}'.format('serial', serial_secs, 1))
+    for workers in (1, 2, 4, 8):
+        secs, output = run(lambda infile: ParallelExtract(infile, workers),
+                           csv_text)
+        if output != expected:
+            raise SystemExit('output with {} workers differs'.format(workers))
+        print('{:>8} {:9.3f} {:8.2f}'.format(workers, secs,
+                                             serial_secs / secs))
+
+
+if __name__ == '__main__':
+    main()
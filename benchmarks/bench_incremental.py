@@ -0,0 +1,65 @@
+# file: benchmarks/bench_incremental.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time a daily run: Extract on the whole .csv file, against
+IncrementalExtract resuming from the checkpoint of the day before.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_incremental.py \\
+        --weeks 3000
+
+The benchmark fails if the incremental run's events are not the last of
+the full run's.
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from container_objs import Event
+from src.extract.read_fns import Extract, IncrementalExtract
+from tests.sample_csv import csv_through_day, make_csv
+
+
+def incremental(csv_text, csv_file, checkpoint):
+    with open(csv_file, 'w') as outfile:
+        outfile.write(csv_text)
+    with open(csv_file, 'rb') as infile:
+        return list(IncrementalExtract(infile, checkpoint).records())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=3000)
+    args = parser.parse_args()
+
+    csv_text = csv_through_day(make_csv(args.weeks + 1), 7 * args.weeks + 3)
+    yesterday = csv_through_day(csv_text, 7 * args.weeks + 2)
+    start = time.perf_counter()
+    full = list(Extract(io.StringIO(csv_text)).records())
+    full_secs = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = os.path.join(tmp_dir, 'sleep.csv')
+        checkpoint = os.path.join(tmp_dir, 'sleep.checkpoint')
+        incremental(yesterday, csv_file, checkpoint)
+        start = time.perf_counter()
+        new = incremental(csv_text, csv_file, checkpoint)
+        incremental_secs = time.perf_counter() - start
+    new_events = [record for record in new if isinstance(record, Event)]
+    full_events = [record for record in full if isinstance(record, Event)]
+    if not new_events or full_events[-len(new_events):] != new_events:
+        raise SystemExit('incremental events differ')
+    print('{:12} {:>9} {:>9}'.format('run', 'records', 'seconds'))
+    print('{:12} {:9,} {:9.3f}'.format('full', len(full), full_secs))
+    print('{:12} {:9,} {:9.3f}'.format('incremental', len(new),
+                                       incremental_secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# file: benchmarks/bench_logging.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time Extract on a csv full of invalid segments, logging the way the
+stages did before src/log_setup.py (a FileHandler on the calling thread)
+and through start_logging().
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_logging.py --weeks 3000
+
+Each mode runs in its own subprocess, so the loggers start clean. Two
+times are given: until Extract returns, which is what the stage itself
+waits for, and until the log is completely written. The line counts
+show how many repeated warnings were folded into summaries.
+"""
+
+import argparse
+import io
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.extract.read_fns import Extract
+from src.log_setup import LOG_FORMAT, start_logging
+from tests.sample_csv import make_csv
+
+
+def run(mode, csv_file, log_file):
+    """
+    Extract csv_file, logging to log_file; print the seconds until
+    Extract returns, and until the log is written
+    """
+    start = time.perf_counter()
+    if mode == 'sync':
+        read_logger = logging.getLogger('extract.read_fns')
+        read_logger.setLevel(logging.DEBUG)
+        read_logger.propagate = False
+        file_handler = logging.FileHandler(log_file, mode='w')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        read_logger.addHandler(file_handler)
+    else:
+        stop_logging = start_logging((('extract.read_fns', log_file),))
+    with open(csv_file) as infile:
+        Extract(infile).lines_in_weeks_out(io.StringIO())
+    extract_secs = time.perf_counter() - start
+    if mode == 'queue':
+        stop_logging()
+    logging.shutdown()
+    print(extract_secs, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=3000)
+    parser.add_argument('--run', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = os.path.join(tmp_dir, 'dirty.csv')
+        with open(csv_file, 'w') as outfile:
+            outfile.write(make_csv(args.weeks).replace(',s,', ',q,'))
+        print('{:>6} {:>9} {:>9} {:>10}'.format('mode', 'extract', 'total',
+                                                'log lines'))
+        for mode in ('sync', 'queue'):
+            log_file = os.path.join(tmp_dir, mode + '.log')
+            extract_secs, total_secs = map(float, subprocess.run(
+                [sys.executable, __file__, '--run', mode, csv_file, log_file],
+                check=True, stdout=subprocess.PIPE,
+                universal_newlines=True).stdout.split())
+            with open(log_file) as infile:
+                lines = sum(1 for _ in infile)
+            print('{:>6} {:9.3f} {:9.3f} {:10,}'.format(
+                mode, extract_secs, total_secs, lines))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# file: benchmarks/bench_mmap.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time Extract against MappedExtract, on the whole of a .csv file and on
+a few weeks of it.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_mmap.py --weeks 3000 \\
+        --blank-rows 20
+
+--blank-rows pads each week with that many more blank rows, as a
+spreadsheet edited by hand tends to be. MappedExtract is timed with the
+week index built (cold) and read from its sidecar file (warm). The
+benchmark fails if MappedExtract's output differs from Extract's.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.extract.read_fns import Extract, MappedExtract
+from tests.sample_csv import BLANK_ROW, make_csv
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def extract_lines(csv_file):
+    with open(csv_file) as infile:
+        return [record.line() for record in Extract(infile).records()]
+
+
+def mapped_lines(csv_file, since=None, until=None):
+    with open(csv_file, 'rb') as infile:
+        return [record.line() for record in MappedExtract(
+            infile, MappedExtract.index_name_for(csv_file), since,
+            until).records()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=3000)
+    parser.add_argument('--blank-rows', type=int, default=20)
+    parser.add_argument('--range-weeks', type=int, default=4)
+    args = parser.parse_args()
+
+    csv_text = make_csv(args.weeks).replace(
+        BLANK_ROW, '\n'.join([BLANK_ROW] * (args.blank_rows + 1)))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = os.path.join(tmp_dir, 'sleep.csv')
+        with open(csv_file, 'w') as outfile:
+            outfile.write(csv_text)
+        full_secs, full = timed(extract_lines, csv_file)
+        cold_secs, cold = timed(mapped_lines, csv_file)
+        warm_secs, warm = timed(mapped_lines, csv_file)
+        if not full == cold == warm:
+            raise SystemExit('MappedExtract output differs')
+        with open(MappedExtract.index_name_for(csv_file)) as index_file:
+            sundays = [sunday for sunday, _ in json.load(index_file)['weeks']]
+        since = date.fromisoformat(sundays[len(sundays) // 2])
+        until = since + timedelta(weeks=args.range_weeks - 1)
+        range_secs, in_range = timed(mapped_lines, csv_file, since, until)
+    print('{:,} bytes, {:,} records'.format(len(csv_text), len(full)))
+    print('{:22} {:>9}'.format('run', 'seconds'))
+    print('{:22} {:9.3f}'.format('Extract', full_secs))
+    print('{:22} {:9.3f}'.format('MappedExtract, cold', cold_secs))
+    print('{:22} {:9.3f}'.format('MappedExtract, warm', warm_secs))
+    print('{:22} {:9.3f}  ({:,} records)'.format(
+        '{} weeks, warm'.format(args.range_weeks), range_secs,
+        len(in_range)))
+
+
+if __name__ == '__main__':
+    main()
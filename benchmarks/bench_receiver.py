@@ -0,0 +1,185 @@
+# file: benchmarks/bench_receiver.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+A load generator for the logging receiver: measure the records per
+second it writes, and its latency under that load.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_receiver.py --clients 4 \\
+        --records 50000
+
+The receiver runs as a subprocess, with its stderr going to a file. Each
+client process logs --records records through a
+logging.handlers.SocketHandler, as fast as it can, then a last 'done'
+record. With --batch, the clients send records in batches instead, one
+write per batch, as src/log_setup.py's BatchSocketHandler does. Records
+per second is the clients' total over the time until the receiver has
+written every 'done' record.
+
+Meanwhile, this process sends probe records, one at a time, and times
+each until the receiver has written it. That latency includes the
+receiver's flush interval. The receiver's CPU time per record is
+given too, since the clients, the receiver, and this process may share
+CPUs.
+
+--receiver gives the command to run a receiver to compare, e.g. an older
+version of src/logging/receiver.py. It must listen on the default port.
+The benchmark fails if any record sent is not written.
+"""
+
+import argparse
+import asyncio
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import shlex
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.log_setup import BatchSocketHandler
+from src.mk_processes import wait_for_receiver
+
+
+PORT = logging.handlers.DEFAULT_TCP_LOGGING_PORT
+
+
+def socket_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.handlers.SocketHandler('localhost', PORT))
+    return logger
+
+
+def client(client_ix, records, batch):
+    """
+    Log records as fast as possible, batch records per write if batch is
+    more than 1, as the stages' BatchSocketHandler does; runs in a client
+    process
+    """
+    if batch == 1:
+        logger = socket_logger('client')
+        for record_ix in range(records):
+            logger.info('client %s record %s', client_ix, record_ix)
+        logger.info('client %s done', client_ix)
+        logging.shutdown()
+        return
+    handler = BatchSocketHandler('localhost', PORT)
+    batches = [[logging.makeLogRecord({
+        'name': 'client', 'msg': 'client %s record %s',
+        'args': (client_ix, record_ix), 'levelname': 'INFO',
+        'levelno': logging.INFO})
+        for record_ix in range(start, min(start + batch, records))]
+        for start in range(0, records, batch)]
+    batches.append([logging.makeLogRecord({
+        'name': 'client', 'msg': 'client {} done'.format(client_ix),
+        'levelname': 'INFO', 'levelno': logging.INFO})])
+    for batch_records in batches:
+        handler.emit_batch(batch_records)
+    handler.close()
+
+
+class LogTail:
+    """ Reads the lines the receiver writes, as it writes them """
+    def __init__(self, filename):
+        self.infile = open(filename)
+        self.partial = ''
+        self.lines = 0
+        self.done = 0
+
+    def wait_for(self, text):
+        """ :return: when a line ending with text was read """
+        while True:
+            data = self.infile.read()
+            if not data:
+                time.sleep(0.0005)
+                continue
+            now = time.perf_counter()
+            lines = (self.partial + data).split('\n')
+            self.partial = lines.pop()
+            self.lines += len(lines)
+            found = False
+            for line in lines:
+                if line.endswith(' done'):
+                    self.done += 1
+                elif line.endswith(text):
+                    found = True
+            if found:
+                return now
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--records', type=int, default=50000,
+                        help='Records per client')
+    parser.add_argument('--batch', type=int, default=1,
+                        help='Records per client write')
+    parser.add_argument('--receiver', default='{} src/logging/receiver.py'
+                        .format(sys.executable),
+                        help='The command that runs the receiver')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = os.path.join(tmp_dir, 'receiver.log')
+        with open(log_file, 'w') as stderr:
+            receiver = subprocess.Popen(shlex.split(args.receiver),
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=stderr)
+        try:
+            if not asyncio.run(wait_for_receiver()):
+                raise SystemExit('the receiver did not start')
+            tail = LogTail(log_file)
+            probe_logger = socket_logger('probe')
+            clients = [multiprocessing.Process(target=client,
+                                               args=(ix, args.records,
+                                                     args.batch))
+                       for ix in range(args.clients)]
+            start = time.perf_counter()
+            for process in clients:
+                process.start()
+            latencies = []
+            while tail.done < args.clients:
+                probe = 'probe {}'.format(len(latencies))
+                sent = time.perf_counter()
+                probe_logger.info(probe)
+                latencies.append(tail.wait_for(probe) - sent)
+            elapsed = time.perf_counter() - start
+            for process in clients:
+                process.join()
+            logging.shutdown()
+            receiver.send_signal(signal.SIGINT)
+            _, status, usage = os.wait4(receiver.pid, 0)
+            receiver.returncode = status
+        finally:
+            if receiver.poll() is None:
+                receiver.kill()
+        tail.infile.read()
+        with open(log_file) as infile:
+            written = sum(1 for _ in infile)
+    expected = args.clients * (args.records + 1) + len(latencies)
+    if written < expected:
+        raise SystemExit('{:,} of {:,} records written'.format(written,
+                                                               expected))
+    latencies = sorted(latency * 1000 for latency in latencies)
+    print('records/s     {:12,.0f}'.format(
+        args.clients * (args.records + 1) / elapsed))
+    print('receiver cpu  {:12.1f} us/record'.format(
+        (usage.ru_utime + usage.ru_stime) * 1e6 / expected))
+    print('probes        {:12,}'.format(len(latencies)))
+    print('latency ms    median {:.1f}  p95 {:.1f}  max {:.1f}'.format(
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.95)], latencies[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# file: benchmarks/bench_sqlite_pipeline.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time the whole pipeline, extract through load, into an SQLite file, so
+it can be run with no database server.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_sqlite_pipeline.py \
+        --weeks 2000
+
+The input is a synthetic spreadsheet from tests/sample_csv.py, written
+to a temporary directory along with the db. The extract and transform
+stages are timed alone, then with the load at each batch size, into a
+new db each time. The benchmark fails if a load stores a different
+number of nights or naps than the records it was given.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src import pipeline
+from src.load.load import LoadOptions, open_backend
+from src.records import Night
+from tests.sample_csv import make_csv
+
+BATCH_SIZES = (1, 100, 1000, 10000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        infile_name = os.path.join(tmp_dir, 'sheet.csv')
+        with open(infile_name, 'w') as outfile:
+            outfile.write(make_csv(args.weeks, missing_data_rate=0.05))
+        start = time.perf_counter()
+        records = list(pipeline.nights_naps(infile_name))
+        base_secs = time.perf_counter() - start
+        nights = sum(isinstance(record, Night) for record in records)
+        expected = {'nights': nights, 'naps': len(records) - nights}
+        print('{} nights, {} naps'.format(nights, len(records) - nights))
+        print('{:>12} {:>9} {:>12}'.format('batch', 'seconds', 'records/s'))
+        print('{:>12} {:9.3f} {:12.0f}'.format('no load', base_secs,
+                                               len(records) / base_secs))
+        for batch_size in BATCH_SIZES:
+            url = 'sqlite:///' + os.path.join(
+                tmp_dir, 'sleep{}.db'.format(batch_size))
+            start = time.perf_counter()
+            counts = open_backend(url).store(
+                pipeline.nights_naps(infile_name),
+                LoadOptions(sqlite_batch=batch_size))
+            secs = time.perf_counter() - start
+            if counts != expected:
+                raise SystemExit('batch size {} stored {}, not {}'.format(
+                    batch_size, counts, expected))
+            print('{:12d} {:9.3f} {:12.0f}'.format(batch_size, secs,
+                                                   len(records) / secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# file: benchmarks/bench_stats.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time the daily statistics of src/chart/stats.py for decades of data:
+reading and parsing the input into a MatrixChart, then computing the
+statistics from its matrix.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python benchmarks/bench_stats.py --weeks 1566
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from argparse import Namespace
+
+from src.chart import stats
+from src.chart.chart_new import MatrixChart
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weeks', type=int, default=1566)  # 30 years
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'extract.txt')
+        with open(filename, 'w') as outfile:
+            Extract(io.StringIO(make_csv(args.weeks))) \
+                .lines_in_weeks_out(outfile)
+        chart = MatrixChart(Namespace(debug=False, binary=False,
+                                      filename=filename, since=None,
+                                      until=None))
+        start = time.perf_counter()
+        chart.fill_matrix(chart.read_file())
+        fill_secs = time.perf_counter() - start
+    start = time.perf_counter()
+    day_stats = stats.day_stats(chart)
+    stats_secs = time.perf_counter() - start
+    print('days {:,}  read and fill {:.3f} s  statistics {:.3f} s'.format(
+        len(day_stats), fill_secs, stats_secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# file: benchmarks/bench_time_kernel.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time the per-event time arithmetic of the transform stage and the chart:
+the string path they used before src/time_kernel.py against the kernel.
+
+Usage (from the project root):
+
+    PYTHONPATH=. python benchmarks/bench_time_kernel.py --pairs 200000
+
+For each (sleep, wake) pair of 'HH:MM' times, both paths find the
+decimal duration that Transform writes and the number of quarter hours
+that Chart draws. The benchmark fails if their results differ.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from src.time_kernel import DECIMAL_HOURS, QUARTERS, interval, minute_index
+
+
+RE_DECIMAL_HOUR = re.compile(r'(\d{1,2})\.(\d{2})')
+
+
+def string_duration(w_time, s_time):
+    """ Transform.get_duration(), as it was """
+    w_time_list = list(map(int, w_time.split(':')))
+    s_time_list = list(map(int, s_time.split(':')))
+    if w_time_list[1] < s_time_list[1]:
+        w_time_list[1] += 60
+        w_time_list[0] -= 1
+    if w_time_list[0] < s_time_list[0]:
+        w_time_list[0] += 24
+    dur_list = [(w_time_list[x] - s_time_list[x])
+                for x in range(len(w_time_list))]
+    duration = str(dur_list[0])
+    if len(duration) == 1:
+        duration = '0' + duration
+    quarter = dur_list[1]
+    if quarter not in (0, 15, 30, 45):
+        quarter = (0 if quarter < 8 else 15 if quarter < 23 else
+                   30 if quarter < 37 else 45)
+    return duration + '.' + str(quarter // 3 * 5).zfill(2)
+
+
+def string_path(pairs):
+    """ :return: the decimal durations and chunk counts, as before """
+    results = []
+    for s_time, w_time in pairs:
+        duration = string_duration(w_time, s_time)
+        m = re.search(RE_DECIMAL_HOUR, duration)  # Chart._get_num_chunks()
+        chunks = (int(m.group(1)) * 4 + int(m.group(2)) // 25) % 96
+        results.append((duration, chunks))
+    return results
+
+
+def kernel_path(pairs):
+    """ :return: the decimal durations and chunk counts, from the kernel """
+    results = []
+    for s_time, w_time in pairs:
+        minutes = interval(minute_index(s_time), minute_index(w_time))
+        results.append((DECIMAL_HOURS[minutes], QUARTERS[minutes] % 96))
+    return results
+
+
+def timed(path, pairs):
+    start = time.perf_counter()
+    results = path(pairs)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pairs = [tuple('{:02}:{:02}'.format(*divmod(rng.randrange(1440), 60))
+                   for _ in range(2)) for _ in range(args.pairs)]
+    string_secs, expected = timed(string_path, pairs)
+    kernel_secs, results = timed(kernel_path, pairs)
+    if results != expected:
+        raise SystemExit('results differ')
+    print('{:>8} {:9.3f}'.format('string', string_secs))
+    print('{:>8} {:9.3f} {:8.2f}x'.format('kernel', kernel_secs,
+                                          string_secs / kernel_secs))
+
+
+if __name__ == '__main__':
+    main()
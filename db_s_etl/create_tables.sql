@@ -25,3 +25,16 @@ CREATE TABLE sl_nap (
     PRIMARY KEY (nap_id),
     FOREIGN KEY (night_id) REFERENCES sl_night (night_id)
 );
+
+
+-- resume marks for chunked loads (see src/load/chunked_load.py)
+DROP TABLE IF EXISTS sl_load_mark;
+
+CREATE TABLE sl_load_mark (
+    source text NOT NULL,
+    last_date date NOT NULL,
+    records integer NOT NULL,
+    night_id integer,
+    updated timestamp NOT NULL DEFAULT now(),
+    PRIMARY KEY (source)
+);
@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+
+# file: src/batch.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Run many .csv files, one per subject, through the pipeline at once.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python src/batch.py sheets/ -s -w 8
+
+Each argument is a .csv file, a directory (for the .csv files in it),
+or a glob pattern. The files are run through the fused pipeline (see
+src/pipeline.py) in a pool of worker processes, largest first. Each
+file logs to a directory of its own under --log-dir: a log file per
+stage, as pipeline.STAGE_LOGS, and pipeline.log for the rest.
+
+A file's records are extracted and transformed before it asks for one
+of the --db-slots, so at most that many files load into the db at a
+time, however many workers there are. A file that fails is reported,
+with the error, and does not stop the others. The rows stored (or, in
+debug mode, found) for each file, and its run time, are summarized at
+the end; the exit code is 1 if any file failed.
+"""
+
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import create_engine
+
+from src import date_range, pipeline
+from src.load import load
+from src.log_setup import LOG_FORMAT, start_logging
+from src.records import Night
+
+
+DB_SLOTS = 2  # default most files loading into the db at once
+
+
+class FileResult(namedtuple('FileResultTuple',
+                            'infile_name, nights, naps, seconds, error')):
+    """
+    infile_name -- the .csv file run
+    nights, naps -- the rows found for it
+    seconds -- its run time, in its worker
+    error -- None, or a description of the exception that stopped it
+    """
+
+
+_db_slots = None  # set in each worker process by _init_worker()
+_engine = None  # made in a worker process when it first loads
+
+
+def find_files(patterns):
+    """
+    :param patterns: .csv file names, directory names, and glob patterns
+    :return: the .csv files they name, each once, largest first
+    Called by: main(), client code
+    """
+    names = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            names.update(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            names.update(name for name in glob.glob(pattern)
+                         if os.path.isfile(name))
+    return sorted(names, key=lambda name: (-os.path.getsize(name), name))
+
+
+def log_dir_names(infile_names):
+    """
+    :return: a log directory name for each file: its base name without
+             '.csv', made unique with a suffix if need be
+    Called by: run_batch()
+    """
+    seen = {}
+    dir_names = []
+    for infile_name in infile_names:
+        stem = os.path.splitext(os.path.basename(infile_name))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        dir_names.append(stem if seen[stem] == 1
+                         else '{}.{}'.format(stem, seen[stem]))
+    return dir_names
+
+
+def _init_worker(db_slots):
+    """
+    Called by: ProcessPoolExecutor, in each worker process
+    """
+    global _db_slots
+    _db_slots = db_slots
+
+
+def run_file(infile_name, log_dir, store_in_db=False, bulk=False,
+             since=None, until=None):
+    """
+    Run one .csv file through the pipeline, logging to log_dir; runs in
+    a worker process
+
+    :return: a FileResult
+    Called by: run_batch()
+    """
+    global _engine
+    os.makedirs(log_dir, exist_ok=True)
+    root_handler = logging.FileHandler(os.path.join(log_dir, 'pipeline.log'),
+                                       mode='w')
+    root_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    stop_logging = start_logging(
+        [(name, os.path.join(log_dir, os.path.basename(filename)))
+         for name, filename in pipeline.STAGE_LOGS], root_handler)
+    start = time.perf_counter()
+    try:
+        logging.info('pipeline start: %s', infile_name)
+        records = list(pipeline.nights_naps(infile_name, since=since,
+                                            until=until))
+        if store_in_db:
+            with _db_slots:
+                if _engine is None:
+                    _engine = create_engine(load.get_url())
+                load.store_in_transaction(_engine, records, bulk)
+        nights = sum(isinstance(record, Night) for record in records)
+        logging.info('pipeline finish: %s nights, %s naps', nights,
+                     len(records) - nights)
+        return FileResult(infile_name, nights, len(records) - nights,
+                          time.perf_counter() - start, None)
+    except Exception as err:
+        logging.exception('pipeline failed')
+        return FileResult(infile_name, None, None,
+                          time.perf_counter() - start,
+                          '{}: {}'.format(type(err).__name__, err))
+    finally:
+        stop_logging()
+
+
+def run_batch(infile_names, log_dir, workers=None, db_slots=DB_SLOTS,
+              store_in_db=False, bulk=False, since=None, until=None):
+    """
+    Run each file in infile_names through the pipeline, in a pool of
+    workers processes
+
+    :param workers: the pool size; None for one per CPU
+    :yield: a FileResult for each file, as each finishes
+    Called by: main(), client code
+    """
+    slots = multiprocessing.BoundedSemaphore(db_slots)
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(slots,)) as executor:
+        futures = [executor.submit(run_file, infile_name,
+                                   os.path.join(log_dir, dir_name),
+                                   store_in_db, bulk, since, until)
+                   for infile_name, dir_name in
+                   zip(infile_names, log_dir_names(infile_names))]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def report(results, seconds):
+    """
+    Write a line for each file, in the order run, then the totals, to
+    stderr
+
+    :return: the exit code: 1 if any file failed, else 0
+    Called by: main()
+    """
+    print('{:40} {:>8} {:>8} {:>9}  {}'.format(
+        'file', 'nights', 'naps', 'seconds', 'error'), file=sys.stderr)
+    for result in results:
+        print('{:40} {:>8} {:>8} {:9.3f}  {}'.format(
+            result.infile_name, '-' if result.error else result.nights,
+            '-' if result.error else result.naps, result.seconds,
+            result.error or ''), file=sys.stderr)
+    failed = sum(1 for result in results if result.error)
+    print('{} files, {} failed, {} nights, {} naps in {:.3f} s'.format(
+        len(results), failed,
+        sum(result.nights for result in results if not result.error),
+        sum(result.naps for result in results if not result.error),
+        seconds), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def get_parse_args():
+    """
+    Parse and return the c.l.a.'s
+
+    Called by: main()
+    """
+    note = 'Runs in debug mode unless -s switch is given.'
+    parser = argparse.ArgumentParser(description=note)
+    parser.add_argument('patterns', nargs='+',
+                        help='.csv files, directories, or glob patterns')
+    parser.add_argument('-s', '--store', help='Store output in database',
+                        action='store_true')
+    parser.add_argument('-b', '--bulk', help='Store with COPY (implies -s)',
+                        action='store_true')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Run this many files at once (default: one '
+                             'per CPU)')
+    parser.add_argument('--db-slots', type=int, default=DB_SLOTS,
+                        help='Load at most this many files into the '
+                             'database at once')
+    parser.add_argument('--log-dir', default='logs',
+                        help='Write each file\'s logs to a directory in '
+                             'this one')
+    date_range.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = get_parse_args()
+    infile_names = find_files(args.patterns)
+    if not infile_names:
+        print('No .csv files found', file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    results = []
+    for result in run_batch(infile_names, args.log_dir, args.workers,
+                            args.db_slots, args.store or args.bulk,
+                            args.bulk, args.since, args.until):
+        print('{} {}'.format('failed' if result.error else 'done',
+                             result.infile_name), file=sys.stderr)
+        results.append(result)
+    order = {infile_name: ix for ix, infile_name in enumerate(infile_names)}
+    results.sort(key=lambda result: order[result.infile_name])
+    return report(results, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
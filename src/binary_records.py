@@ -0,0 +1,203 @@
+# file: src/binary_records.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+A binary framing of the records passed between stages: the optional
+alternative to the text lines of records.py.
+
+The stream is a series of frames. Each frame has a header
+
+    magic (b'SLR'), format version (uint8), record count (uint16)
+
+and then that many fixed-size records
+
+    kind (uint8), code (uint8), date (uint32), minute (uint16),
+    value (uint16)
+
+all little-endian. What the fields hold depends on the kind:
+
+    kind        code            date       minute      value
+    WeekHeader  -               ordinal    -           -
+    DayHeader   -               ordinal    -           -
+    Event       action          -          time        hours * 100,
+                                                       or NO_HOURS
+    Night       no-data flags   ordinal    start time  -
+    Nap         -               -          start time  duration,
+                                                       in minutes
+
+An ordinal of 0 stands for a Night with no date. Events are the
+container_objs.Event records that Extract emits.
+"""
+
+import datetime
+import struct
+
+from src.extract.container_objs import (Event, HOURS, MIL_TIMES,
+                                        MIL_TIME_CODES, NO_HOURS)
+from src.records import WeekHeader, DayHeader, Night, Nap
+from src.time_kernel import (DECIMAL_HOURS, DECIMAL_INTERVAL, HH_MM,
+                             minute_index)
+
+
+MAGIC = b'SLR'
+VERSION = 1
+FRAME_HEADER = struct.Struct('<3sBH')
+RECORD = struct.Struct('<BBIHH')
+MAX_FRAME_RECORDS = 4096
+
+WEEK, DAY, EVENT, NIGHT, NAP = range(1, 6)
+ACTIONS = 'bswNY'  # an Event's code is its action's index here
+START_NO_DATA, END_NO_DATA = 1, 2  # a Night's flags
+
+
+def _ordinal(start_date):
+    """
+    :param start_date: a datetime.date, a 'YYYY-MM-DD' string, or ''
+    """
+    if isinstance(start_date, datetime.date):
+        return start_date.toordinal()
+    if start_date:
+        return datetime.date.fromisoformat(start_date).toordinal()
+    return 0
+
+
+def _is_true(flag):
+    """ :param flag: a bool, or a 'true' / 'false' string """
+    return flag is True or flag == 'true'
+
+
+def _event_minute(mil_time):
+    """ As Extract writes it: times are not wrapped at midnight """
+    minute = MIL_TIME_CODES.get(mil_time)
+    if minute is None:
+        hours, minutes = mil_time.split(':')
+        minute = int(hours) * 60 + int(minutes)
+    return minute
+
+
+def record_fields(record):
+    """
+    :param record: a WeekHeader, DayHeader, Night, or Nap; anything
+                   else is taken to be an Event
+    :return: the record's (kind, code, date, minute, value) fields
+    Called by: write_records()
+    """
+    if isinstance(record, WeekHeader):
+        return WEEK, 0, record.sunday.toordinal(), 0, 0
+    if isinstance(record, DayHeader):
+        return DAY, 0, record.dt_date.toordinal(), 0, 0
+    if isinstance(record, Night):
+        flags = (START_NO_DATA * _is_true(record.start_no_data) +
+                 END_NO_DATA * _is_true(record.end_no_data))
+        return (NIGHT, flags, _ordinal(record.start_date),
+                minute_index(record.start_time), 0)
+    if isinstance(record, Nap):
+        return (NAP, 0, 0, minute_index(record.start_time),
+                DECIMAL_INTERVAL[record.duration])
+    hours = round(float(record.hours) * 100) if record.hours else NO_HOURS
+    return (EVENT, ACTIONS.index(record.action[0]), 0,
+            _event_minute(record.mil_time), hours)
+
+
+def unpack_record(kind, code, ordinal, minute, value):
+    """
+    :return: the record whose fields record_fields() gave
+    Called by: read_records()
+    """
+    if kind == EVENT:
+        return Event(ACTIONS[code], MIL_TIMES[minute],
+                     '' if value == NO_HOURS else HOURS[value])
+    if kind == DAY:
+        return DayHeader(datetime.date.fromordinal(ordinal))
+    if kind == NAP:
+        return Nap(HH_MM[minute], DECIMAL_HOURS[value])
+    if kind == NIGHT:
+        start_date = datetime.date.fromordinal(ordinal) if ordinal else ''
+        return Night(start_date, HH_MM[minute], bool(code & START_NO_DATA),
+                     bool(code & END_NO_DATA))
+    if kind == WEEK:
+        return WeekHeader(datetime.date.fromordinal(ordinal))
+    raise ValueError('unknown record kind {}'.format(kind))
+
+
+def write_records(records, outfile):
+    """
+    Write records to a binary file, in frames of up to
+    MAX_FRAME_RECORDS records
+
+    :param records: an iterable of records
+    :param outfile: a file open for binary writing
+    :return: the number of records written
+    Called by: client code
+    """
+    return write_fields(map(record_fields, records), outfile)
+
+
+def write_fields(fields, outfile):
+    """
+    As write_records(), for records already given as fields
+
+    :param fields: an iterable of (kind, code, date, minute, value)
+    Called by: write_records(), client code
+    """
+    pack = RECORD.pack
+    frame = []
+    count = 0
+    for record in fields:
+        frame.append(pack(*record))
+        if len(frame) == MAX_FRAME_RECORDS:
+            count += _write_frame(frame, outfile)
+    count += _write_frame(frame, outfile)
+    outfile.flush()
+    return count
+
+
+def _write_frame(frame, outfile):
+    """
+    Write, then empty, a list of packed records
+
+    :return: the number of records written
+    Called by: write_fields()
+    """
+    if not frame:
+        return 0
+    count = len(frame)
+    outfile.write(FRAME_HEADER.pack(MAGIC, VERSION, count))
+    outfile.write(b''.join(frame))
+    frame.clear()
+    return count
+
+
+def read_records(infile):
+    """
+    :param infile: a file open for binary reading
+    :yield: each record in infile
+    :raise ValueError: on a bad frame header, or a truncated frame
+    Called by: client code
+    """
+    for fields in read_fields(infile):
+        yield unpack_record(*fields)
+
+
+def read_fields(infile):
+    """
+    As read_records(), but yield each record's fields unconverted
+
+    :yield: a (kind, code, date, minute, value) tuple
+    Called by: read_records(), client code
+    """
+    while True:
+        header = infile.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < FRAME_HEADER.size:
+            raise ValueError('truncated frame header')
+        magic, version, count = FRAME_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a version {} record stream'.format(VERSION))
+        body = infile.read(count * RECORD.size)
+        if len(body) < count * RECORD.size:
+            raise ValueError('truncated frame')
+        yield from RECORD.iter_unpack(body)
@@ -5,14 +5,23 @@
 
 import re
 import argparse
-from datetime import datetime, timedelta
+import itertools
+import sys
+from datetime import date, datetime, timedelta
 from collections import namedtuple
 
+from src import binary_records, date_range
+from src.chart import db_input
+from src.chart.follow import POLL_INTERVAL, FollowedFile
+from src.time_kernel import (MINUTES_IN_DAY, interval, minute_index,
+                             slot_counts)
+
 # from tests.file_access_wrappers import FileReadAccessWrapper
 
 BLACK_INK = u'\u2588'
 WHITE_PAPER = u'\u0020'
 GRAY = u'\u2591'
+RESOLUTIONS = (1, 5, 15)  # the minutes a slot in a row may hold
 
 
 class Chart:
@@ -48,10 +57,29 @@ action: w, time: 20:15, hours: 1.00
 2016-12-10 |█████████████████████                     ████                  ████                      ██████|
             12a 1   2   3   4   5   6   7   8   9   10  11  12p 1   2   3   4   5   6   7   8   9   10  11
 2016-12-11 |█         ███████████                       ████                     ███     ████               |
+
+    With args.since or args.until, only the rows for days in that range
+    are written. The input before the day before since is skipped
+    unparsed, and the input after the day after until is not read.
+
+    read_db() charts the nights and naps stored in the db instead, as
+    far as they go: naps before the first night of a load are not
+    stored.
+
+    With read_file(follow), the input is read as it grows: each new
+    event extends the current row, which is printed as soon as it is
+    complete.
     """
-    def __init__(self, args):
+    def __init__(self, args, resolution=15):
+        """
+        :param resolution: the minutes in each slot of a row: 1, 5, or 15
+        """
         self.DEBUG = args.debug
-        self.QS_IN_DAY = 96  # 24 * 4 quarter hours in a day
+        self.binary = args.binary
+        self.resolution = resolution
+        self.SLOTS_IN_DAY = MINUTES_IN_DAY // resolution  # 96 by default
+        self.SLOTS_IN_HOUR = 60 // resolution
+        self.slot_counts = slot_counts(resolution)
         self.ASLEEP = 'x' if self.DEBUG else BLACK_INK
         self.AWAKE = 'o' if self.DEBUG else WHITE_PAPER
         self.NO_DATA = '-' if self.DEBUG else GRAY
@@ -63,34 +91,140 @@ action: w, time: 20:15, hours: 1.00
         self.curr_line = ''
         self.curr_sunday = ''
         self.filename = args.filename
+        self.since = args.since and args.since.isoformat()
+        self.until = args.until and args.until.isoformat()
         self.infile = None
         self.last_date_read = None
-        self.last_sleep_time = None
+        self.last_sleep_minute = None
         self.last_start_posn = None
         self.output_date = '2016-12-04'
-        self.output_row = [self.NO_DATA] * self.QS_IN_DAY
+        self.output_row = [self.NO_DATA] * self.SLOTS_IN_DAY
         self.quarters_carried = self.QuartersCarried(0, self.NO_DATA)
-        self.re_decimal_hour = None
-        self.re_hr_min_time = None
         self.re_iso_date = None
         self.sleep_state = self.NO_DATA
-        self.spaces_left = self.QS_IN_DAY
+        self.spaces_left = self.SLOTS_IN_DAY
 
-    def read_file(self):
+    def read_file(self, follow=None):
         """
         Send each line of file to parser.
 
+        :param follow: if given, a poll interval in seconds: don't stop
+                       at the end of the file, but wait for more to be
+                       appended (see src/chart/follow.py)
         :yield: a parsed input line (a Triple namedtuple)
         :return: None
         Called by: main()
         """
-        with open(self.filename) as self.infile:
+        if self.binary:
+            yield from self._read_binary_file(follow)
+            return
+        first, last = self._input_window()
+        skipping = first is not None
+        with open(self.filename) as infile:
+            self.infile = FollowedFile(infile, follow) if follow else infile
             while self._get_a_line():
+                if (skipping or last) and \
+                        re.match(r'\d{4}-\d{2}-\d{2}$', self.curr_line):
+                    if skipping and self.curr_line >= first:
+                        skipping = False
+                        self.output_date = self.curr_line
+                    if last and self.curr_line > last:
+                        return
+                if skipping:
+                    continue
                 parsed_input_line = self._parse_input_line()
                 if parsed_input_line.start == -1:
                     continue
                 yield parsed_input_line
 
+    def _read_binary_file(self, follow=None):
+        """
+        As read_file(), for a file of binary records from the extract
+        stage. Nothing is parsed: dates and times arrive as integers.
+
+        Called by: read_file()
+        """
+        with open(self.filename, 'rb') as infile:
+            self.infile = FollowedFile(infile, follow) if follow else infile
+            yield from self._read_fields(
+                binary_records.read_fields(self.infile))
+
+    def read_db(self, engine, fetch_size=db_input.FETCH_SIZE):
+        """
+        As read_file(), for the nights and naps stored in the db (see
+        src/chart/db_input.py). Only the nights that start in the input
+        window are queried. Without since, the chart starts on the day
+        of the first night.
+
+        :param engine: the db engine
+        :param fetch_size: the rows to fetch from the server at a time
+        Called by: main()
+        """
+        first, last = self._input_window()
+        fields = db_input.read_fields(engine, first, last, fetch_size)
+        if first is None:
+            first_field = next(fields, None)
+            if first_field is None:
+                return
+            self.output_date = date.fromordinal(first_field[2]).isoformat()
+            fields = itertools.chain([first_field], fields)
+        yield from self._read_fields(fields)
+
+    def _read_fields(self, fields):
+        """
+        :param fields: (kind, code, date, minute, value) tuples, as from
+                       binary_records.read_fields()
+        :yield: a parsed record (a Triple namedtuple)
+        Called by: _read_binary_file(), read_db()
+        """
+        first, last = self._input_window()
+        skipping = first is not None
+        for kind, code, ordinal, minute, _ in fields:
+            if kind == binary_records.DAY and (skipping or last):
+                day = date.fromordinal(ordinal).isoformat()
+                if skipping and day >= first:
+                    skipping = False
+                    self.output_date = day
+                if last and day > last:
+                    return
+            if skipping:
+                continue
+            if kind == binary_records.EVENT:
+                parsed_record = self._handle_action(
+                    binary_records.ACTIONS[code], minute)
+            elif kind == binary_records.DAY:
+                parsed_record = self._handle_date_line(
+                    date.fromordinal(ordinal).isoformat())
+            else:
+                if kind == binary_records.WEEK:
+                    self.curr_sunday = date.fromordinal(ordinal).isoformat()
+                continue
+            if parsed_record.start == -1:
+                continue
+            yield parsed_record
+
+    def _input_window(self):
+        """
+        :return: the first and last days of input to read, as
+                 'YYYY-MM-DD' strings, or None if not limited: the days
+                 either side of the range give the states at its edges
+        Called by: read_file(), read_db(), _read_fields()
+        """
+        def add_days(iso_date, days):
+            return (date.fromisoformat(iso_date) +
+                    timedelta(days=days)).isoformat()
+
+        return (self.since and add_days(self.since, -1),
+                self.until and add_days(self.until, 1))
+
+    def _shows(self, iso_date):
+        """
+        :return: True iff the row for iso_date is in range
+        Called by: _write_output(), advance_output_date()
+        """
+        return not (self.since and iso_date < self.since or
+                    self.until and iso_date > self.until)
+
     def _get_a_line(self):
         """
         Get next input line, discarding blank lines and '======'s
@@ -137,7 +271,7 @@ action: w, time: 20:15, hours: 1.00
             self.last_date_read = line
             return self.Triple(-1, -1, -1)
         if self.sleep_state == self.NO_DATA:
-            quarters_to_output = self.QS_IN_DAY - self.last_start_posn
+            quarters_to_output = self.SLOTS_IN_DAY - self.last_start_posn
             return self.Triple(self.last_start_posn, quarters_to_output,
                                self.sleep_state)
         self.last_date_read = line
@@ -158,20 +292,30 @@ action: w, time: 20:15, hours: 1.00
                      a unicode character (ASLEEP, AWAKE, NO_DATA)
         Called by: _parse_input_line()
         """
-        if line[8] in 'bsY':
-            self.last_sleep_time = self._get_time_part(line)
-            self.last_start_posn = self._get_start_posn(line)
+        return self._handle_action(line[8],
+                                   minute_index(self._get_time_part(line)))
+
+    def _handle_action(self, action, minute):
+        """
+        As _handle_action_line(), for an action and a minute index
+
+        Called by: _handle_action_line(), _read_binary_file()
+        """
+        if action in 'bsY':
+            self.last_sleep_minute = minute
+            self.last_start_posn = self._get_start_posn(minute)
             self.sleep_state = self.ASLEEP
             return self.Triple(-1, -1, -1)
-        if line[8] == 'w':
-            wake_time = self._get_time_part(line)
-            duration = self._get_duration(wake_time, self.last_sleep_time)
-            length = self._get_num_chunks(duration)
+        if action == 'w':
+            if self.last_sleep_minute is None:  # woke before the input began
+                return self.Triple(-1, -1, -1)
+            length = self._get_num_chunks(interval(self.last_sleep_minute,
+                                                   minute))
             self.sleep_state = self.AWAKE
             return self.Triple(self.last_start_posn, length, self.ASLEEP)
-        if line[8] == 'N':
-            self.last_sleep_time = self._get_time_part(line)
-            self.last_start_posn = self._get_start_posn(line)
+        if action == 'N':
+            self.last_sleep_minute = minute
+            self.last_start_posn = self._get_start_posn(minute)
             self.sleep_state = self.NO_DATA
             return self.Triple(-1, -1, -1)
         # raise ValueError(f"Bad 'action: ' value in line {line}")
@@ -191,78 +335,6 @@ action: w, time: 20:15, hours: 1.00
             out_time = '0' + out_time
         return out_time
 
-    def _get_duration(self, w_time, s_time):
-        """
-        Calculate the interval between w_time and s_time.
-
-        Arguments are strings representing times in 'hh:mm' format.
-        get_duration() calculates the interval between them as a
-        string in decimal format e.g.,
-            04.25 for 4 1/4 hours
-        Called by: _process_curr()
-        Returns: the calculated interval, whose value will be
-                non-negative.
-        """
-        w_time_list = list(map(int, w_time.split(':')))
-        s_time_list = list(map(int, s_time.split(':')))
-        if w_time_list[1] < s_time_list[1]:  # wake minute < sleep minute
-            w_time_list[1] += 60
-            w_time_list[0] -= 1
-        if w_time_list[0] < s_time_list[0]:  # wake hour < sleep hour
-            w_time_list[0] += 24
-        dur_list = [(w_time_list[x] - s_time_list[x])
-                    for x in range(len(w_time_list))]
-        duration = str(dur_list[0])
-        if len(duration) == 1:  # change hour from '1' to '01', e.g.
-            duration = '0' + duration
-        duration += self._quarter_hour_to_decimal(dur_list[1])
-        return duration
-
-    def _quarter_hour_to_decimal(self, quarter):
-        """
-        Convert an integer number of minutes into a decimal string
-
-        Argument is a number of minutes past the hour. If that number
-        is a quarter-hour, convert it to a decimal quarter represented
-        as a string.
-
-        Called by: _get_duration()
-        Returns: a number of minutes represented as a decimal fraction
-        """
-        valid_quarters = (0, 15, 30, 45)
-        if quarter not in valid_quarters:
-            quarter = self._get_closest_quarter(quarter)
-        return Chart._quarter_to_decimal(quarter)
-
-    @staticmethod
-    def _quarter_to_decimal(quarter):
-        """
-        0 => '.00', 15 => '.25', 30 => '.50', 45 => '.75'
-
-        "pre: quarter % 15 == 0"
-        Called by: _quarter_hour_to_decimal()
-        """
-        return '.' + str(quarter // 3 * 5).zfill(2)
-
-    @staticmethod
-    def _get_closest_quarter(q: int):
-        """
-        Coerce a number of minutes q to the nearest quarter hour.
-
-        :return: an integer in {0, 15, 30, 45}
-        """
-        if q < 8:
-            closest_quarter = 0
-        elif 8 <= q < 23:
-            closest_quarter = 15
-        elif 23 <= q < 37:
-            closest_quarter = 30
-        elif q < 60:
-            closest_quarter = 45
-        else:
-            raise ValueError(f'q must be < 60 in {__name__}')
-        return closest_quarter
-
     def make_output(self, read_file_iterator):
         """
         Fill a new day (output) row. Start the row with any
@@ -273,7 +345,7 @@ action: w, time: 20:15, hours: 1.00
         Called by: main()
         """
         row_out = self.output_row[:]
-        self.spaces_left = self.QS_IN_DAY
+        self.spaces_left = self.SLOTS_IN_DAY
 
         while True:
             try:
@@ -289,7 +361,7 @@ action: w, time: 20:15, hours: 1.00
             if not self.spaces_left:
                 self._write_output(row_out)  # advances self.output_date
                 row_out = self.output_row[:]  # get fresh copy of row to output
-                self.spaces_left = self.QS_IN_DAY
+                self.spaces_left = self.SLOTS_IN_DAY
             if self.quarters_carried.length:
                 row_out = self._handle_quarters_carried(row_out)
 
@@ -302,7 +374,7 @@ action: w, time: 20:15, hours: 1.00
         :return:
         Called by: make_output()
         """
-        curr_posn = self.QS_IN_DAY - self.spaces_left
+        curr_posn = self.SLOTS_IN_DAY - self.spaces_left
         if curr_posn < curr_triple.start:
             triple_to_insert = self.Triple(curr_posn,
                                            curr_triple.start - curr_posn,
@@ -312,20 +384,27 @@ action: w, time: 20:15, hours: 1.00
             pass  # insert no leading sleep states
         else:
             triple_to_insert = self.Triple(curr_posn,
-                                           self.QS_IN_DAY - curr_posn,
+                                           self.SLOTS_IN_DAY - curr_posn,
                                            self.sleep_state)
             row_out = self._insert_to_row_out(triple_to_insert, row_out)
-            if not row_out.count(self.NO_DATA) or \
+            if self._is_full(row_out) or \
                     curr_triple.symbol == self.NO_DATA:  # row out is complete
                 self._write_output(row_out)
             row_out = self.output_row[:]
-            self.spaces_left = self.QS_IN_DAY
+            self.spaces_left = self.SLOTS_IN_DAY
             if curr_triple.start > 0:
                 triple_to_insert = self.Triple(0, curr_triple.start,
                                                self.sleep_state)
                 row_out = self._insert_to_row_out(triple_to_insert, row_out)
         return row_out
 
+    def _is_full(self, row_out):
+        """
+        :return: True iff no quarter of row_out is still NO_DATA
+        Called by: _insert_leading_sleep_states()
+        """
+        return not row_out.count(self.NO_DATA)
+
     def _handle_quarters_carried(self, curr_output_row):
         curr_output_row = self._insert_to_row_out(
             self.Triple(0, self.quarters_carried.length,
@@ -335,12 +414,14 @@ action: w, time: 20:15, hours: 1.00
 
     def _insert_to_row_out(self, triple, output_row):
         finish = triple.start + triple.length
-        if finish > self.QS_IN_DAY:
-            self.quarters_carried = self.QuartersCarried(finish - self.QS_IN_DAY, triple.symbol)
-            triple = triple._replace(length=triple.length - self.quarters_carried.length)
+        if finish > self.SLOTS_IN_DAY:
+            self.quarters_carried = self.QuartersCarried(
+                finish - self.SLOTS_IN_DAY, triple.symbol)
+            triple = triple._replace(
+                length=triple.length - self.quarters_carried.length)
         for i in range(triple.start, triple.start + triple.length):
             if self.DEBUG is True:
-                if not i % 4:
+                if not i % self.SLOTS_IN_HOUR:
                     output_row[i] = triple.symbol.upper()
                 else:
                     output_row[i] = triple.symbol.lower()
@@ -350,7 +431,7 @@ action: w, time: 20:15, hours: 1.00
         return output_row
 
     def get_curr_posn(self):
-        return self.QS_IN_DAY - self.spaces_left
+        return self.SLOTS_IN_DAY - self.spaces_left
 
     def _write_output(self, my_output_row):
         """
@@ -362,7 +443,8 @@ action: w, time: 20:15, hours: 1.00
         extended_output_row = []
         for _, val in enumerate(my_output_row):
             extended_output_row.append(val)
-        print(f'{self.output_date} |{"".join(extended_output_row)}|')
+        if self._shows(self.output_date):
+            print(f'{self.output_date} |{"".join(extended_output_row)}|')
         self.output_date = self.advance_output_date(self.output_date)
 
     def advance_date(self, my_date, make_ruler=False):
@@ -383,35 +465,28 @@ action: w, time: 20:15, hours: 1.00
         return self.advance_date(my_input_date)
 
     def advance_output_date(self, my_output_date):
-        return self.advance_date(my_output_date, True)
+        return self.advance_date(my_output_date,
+                                 self._shows(my_output_date))
 
-    def _get_num_chunks(self, my_str):
+    def _get_num_chunks(self, minutes):
         """
-        Obtain from an interval the number of 15-minute chunks it contains
+        Obtain from an interval the number of slots (15-minute chunks, by
+        default) it contains
+        :param minutes: the interval, in minutes
         :return: int: the number of chunks
-        Called by: read_file()
+        Called by: _handle_action_line()
         """
-        if my_str:
-            m = re.search(self.re_decimal_hour, my_str)
-            assert bool(m)
-            return (int(m.group(1)) * 4 +  # 4 chunks per hour
-                    int(m.group(2)) // 25) % self.QS_IN_DAY  # m.group(2) is decimal
-        return 0
+        return self.slot_counts[minutes] % self.SLOTS_IN_DAY
 
-    def _get_start_posn(self, time_str):
+    def _get_start_posn(self, minute):
         """
-        Obtain, from a time string, its starting position in a line of output.
+        Obtain, from a time, its starting position in a line of output.
 
-        Called by: read_file()
-        :param time_str: a time expressed as 'HH:MM'
+        Called by: _handle_action_line()
+        :param minute: a time, as a minute index (see src/time_kernel.py)
         :return: int: the starting position
         """
-        if time_str:
-            m = re.search(self.re_hr_min_time, time_str)
-            assert bool(m)
-            return (int(m.group(1)) * 4 +  # 4 output chars per hour
-                    int(m.group(2)) // 15) % self.QS_IN_DAY
-        return 0
+        return minute // self.resolution % self.SLOTS_IN_DAY
 
     def compile_iso_date(self):
         """
@@ -420,42 +495,225 @@ action: w, time: 20:15, hours: 1.00
         """
         self.re_iso_date = re.compile(r' \d{4}-\d{2}-\d{2} \|')
 
-    def compile_decimal_hour(self):
-        """
-        :return: None
-        Called by: main()
-        """
-        self.re_decimal_hour = re.compile(r'(\d{1,2})\.(\d{2})')
-
-    def compile_hr_min_time(self):
-        """
-        :return:
-        Called by: main()
-        """
-        self.re_hr_min_time = re.compile(r'(\d{1,2}):(\d{2})')
-
-    @staticmethod
-    def create_ruler():
+    def create_ruler(self):
         ruler = list(str(x) for x in range(12)) * 2
         for i, _ in enumerate(ruler):
             if i == 0:
                 ruler[i] = '12a'
             elif i == 12:
                 ruler[i] = '12p'
-        ruler_line = ' ' * 12 + ''.join(v.ljust(4, ' ') for v in ruler)
+        ruler_line = ' ' * 12 + ''.join(v.ljust(self.SLOTS_IN_HOUR, ' ')
+                                        for v in ruler)
         return ruler_line
 
 
+def pack_tables(codes):
+    """
+    :param codes: the three one-byte codes of a MatrixChart row
+    :return: for each of the four slots a byte packs, 2 bits to a slot,
+             the first in the low bits: a bytes.translate() table from a
+             code to its bits in that slot, and one from a packed byte
+             to the code in that slot
+    Called by: MatrixChart
+    """
+    pack, unpack = [], []
+    for slot in range(4):
+        to_bits = bytearray(256)
+        to_code = bytearray(256)
+        for value, code in enumerate(codes):
+            to_bits[code] = value << 2 * slot
+        for packed in range(256):
+            value = packed >> 2 * slot & 3
+            to_code[packed] = codes[min(value, len(codes) - 1)]
+        pack.append(bytes(to_bits))
+        unpack.append(bytes(to_code))
+    return tuple(pack), tuple(unpack)
+
+
+class MatrixChart(Chart):
+    """
+    A Chart that renders every row at once, at the end.
+
+    The rows are parsed as Chart's are, but each is filled, a slice at a
+    time, in a bytearray of one-byte codes: ASLEEP, AWAKE, and NO_DATA
+    are b'x', b'o', and b'-'. Each row written is packed, 2 bits to a
+    slot, and appended to one bytearray, a days x SLOTS_IN_DAY matrix:
+    a day takes 24, 72, or 360 bytes at a resolution of 15, 5, or 1
+    minutes, about 4 MB for 30 years at 1 minute. A row is packed, and
+    unpacked by row_codes(), with a bytes.translate() of every fourth
+    slot per position in a byte, so neither loops over the slots.
+
+    When the input is done, the rows in range are unpacked and printed
+    a week at a time, up to each ruler: the week's codes are mapped to
+    the output characters by a str.replace() per code (or, in debug
+    mode, by upper-casing the first column of each hour with one slice),
+    so at most seven rows of codes are held unpacked. The output is the
+    same as Chart's.
+    """
+    CODES = b'xo-'  # ASLEEP, AWAKE, NO_DATA
+    DEBUG_CASE = bytes.maketrans(b'xo-', b'XO-')
+    GLYPHS = tuple(zip('xo-', (BLACK_INK, WHITE_PAPER, GRAY)))
+    PACK, UNPACK = pack_tables(CODES)
+
+    def __init__(self, args, resolution=15):
+        super().__init__(args, resolution)
+        self.fills = {symbol: bytes([code]) * self.SLOTS_IN_DAY
+                      for symbol, code in zip((self.ASLEEP, self.AWAKE,
+                                               self.NO_DATA), self.CODES)}
+        self.output_row = bytearray(self.fills[self.NO_DATA])
+        self.matrix = bytearray()  # the rows written, packed, end to end
+        self.row_ordinals = []  # the date of each, as date.toordinal()
+        self.next_ordinal = None
+
+    def make_output(self, read_file_iterator):
+        """
+        As Chart.make_output(), then print the chart
+
+        Called by: main()
+        """
+        self.fill_matrix(read_file_iterator)
+        self._render()
+
+    def fill_matrix(self, read_file_iterator):
+        """
+        Fill the matrix from parsed input, without printing it
+
+        Called by: make_output(), client code
+        """
+        super().make_output(read_file_iterator)
+
+    def rows_shown(self):
+        """
+        :yield: the index and ordinal of each row in range
+        Called by: _render(), client code
+        """
+        first = self.since and date.fromisoformat(self.since).toordinal()
+        last = self.until and date.fromisoformat(self.until).toordinal()
+        for ix, ordinal in enumerate(self.row_ordinals):
+            if not (first and ordinal < first or last and ordinal > last):
+                yield ix, ordinal
+
+    def row_codes(self, ix, count=1):
+        """
+        :return: row ix of the matrix, and the count - 1 rows after it,
+                 unpacked to a byte per slot
+        Called by: rows(), _print_rows(), client code
+        """
+        packed_size = self.SLOTS_IN_DAY // 4
+        start = ix * packed_size
+        packed = self.matrix[start:start + count * packed_size]
+        codes = bytearray(4 * len(packed))
+        for slot, table in enumerate(self.UNPACK):
+            codes[slot::4] = packed.translate(table)
+        return bytes(codes)
+
+    def rows(self):
+        """
+        :yield: each row of the matrix, unpacked, in date order
+        Called by: client code
+        """
+        for ix in range(len(self.row_ordinals)):
+            yield self.row_codes(ix)
+
+    def _insert_to_row_out(self, triple, output_row):
+        finish = triple.start + triple.length
+        if finish > self.SLOTS_IN_DAY:
+            self.quarters_carried = self.QuartersCarried(
+                finish - self.SLOTS_IN_DAY, triple.symbol)
+            triple = triple._replace(
+                length=triple.length - self.quarters_carried.length)
+        if triple.length > 0:
+            output_row[triple.start:triple.start + triple.length] = \
+                self.fills[triple.symbol][:triple.length]
+            self.spaces_left -= triple.length
+        return output_row
+
+    def _is_full(self, row_out):
+        return self.fills[self.NO_DATA][0] not in row_out
+
+    def _write_output(self, my_output_row):
+        """
+        Add my_output_row to the matrix, for the next output date
+
+        Called by: make_output(), _insert_leading_sleep_states()
+        """
+        if self.next_ordinal is None:
+            self.next_ordinal = date.fromisoformat(self.output_date) \
+                .toordinal()
+        packed = 0
+        for slot, table in enumerate(self.PACK):  # bits that don't overlap
+            packed |= int.from_bytes(my_output_row[slot::4].translate(table),
+                                     'little')
+        self.matrix += packed.to_bytes(self.SLOTS_IN_DAY // 4, 'little')
+        self.row_ordinals.append(self.next_ordinal)
+        self.next_ordinal += 1
+
+    def _render(self):
+        """
+        Print the rows in range, with a ruler after each Saturday's
+
+        Called by: make_output()
+        """
+        ruler = self.create_ruler()
+        week = []  # (index, date) of the rows since the last ruler
+        for ix, ordinal in self.rows_shown():
+            week.append((ix, date.fromordinal(ordinal)))
+            if week[-1][1].weekday() == 5:
+                self._print_rows(week, ruler)
+                week = []
+        if week:
+            self._print_rows(week)
+
+    def _print_rows(self, rows, ruler=None):
+        """
+        Print rows, one after another in the matrix, unpacked together
+
+        :param rows: the (index, date) of each row
+        :param ruler: if given, printed after them
+        Called by: _render()
+        """
+        codes = bytearray(self.row_codes(rows[0][0], len(rows)))
+        if self.DEBUG:
+            step = self.SLOTS_IN_HOUR
+            codes[::step] = codes[::step].translate(self.DEBUG_CASE)
+        text = codes.decode('ascii')
+        if not self.DEBUG:
+            for code, glyph in self.GLYPHS:  # faster than one translate()
+                text = text.replace(code, glyph)
+        slots = self.SLOTS_IN_DAY
+        lines = [f'{day.isoformat()} |{text[start:start + slots]}|'
+                 for start, (_, day) in zip(range(0, len(text), slots), rows)]
+        if ruler:
+            lines.append(ruler)
+        print('\n'.join(lines))
+
+
 def main():
     args = get_parse_args()
-    chart = Chart(args)
-    chart.compile_decimal_hour()
-    chart.compile_hr_min_time()
+    chart = (MatrixChart if args.matrix else Chart)(args, args.resolution)
     chart.compile_iso_date()
-    read_file_iterator = chart.read_file()
+    if args.from_db:
+        # only --from-db needs sqlalchemy and the loader
+        from sqlalchemy import create_engine
+        from src.load import load
+        try:
+            url = load.get_url()
+        except KeyError:
+            print('Please set the environment variable DB_URL, or '
+                  'DB_USERNAME and DB_PASSWORD')
+            sys.exit(1)
+        read_file_iterator = chart.read_db(create_engine(url),
+                                           args.fetch_size)
+    else:
+        read_file_iterator = chart.read_file(args.follow)
+    if args.follow:
+        sys.stdout.reconfigure(line_buffering=True)
     ruler_line = chart.create_ruler()
     print(ruler_line)
-    chart.make_output(read_file_iterator)
+    try:
+        chart.make_output(read_file_iterator)
+    except KeyboardInterrupt:  # the way out of --follow
+        pass
 
 
 def get_parse_args():
@@ -465,11 +723,37 @@ def get_parse_args():
     Called by: main()
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument('filename', help='the input file name')
+    parser.add_argument('filename', nargs='?',
+                        help='the input file name')
     parser.add_argument('-d', '--debug',
                         help=("output X, o, - instead of '\u2588', '\u0020', "
                               "'\u2591'"), action='store_true')
-    return parser.parse_args()
+    parser.add_argument('--binary', action='store_true',
+                        help='read binary records instead of text')
+    parser.add_argument('--matrix', action='store_true',
+                        help='render the chart at once, from a matrix '
+                             'of codes')
+    parser.add_argument('--from-db', action='store_true',
+                        help='chart the nights and naps in the database '
+                             'instead of a file')
+    parser.add_argument('--fetch-size', type=int,
+                        default=db_input.FETCH_SIZE,
+                        help='with --from-db, the rows to fetch at a time')
+    parser.add_argument('--resolution', type=int, choices=RESOLUTIONS,
+                        default=15,
+                        help='the minutes in each character of a row')
+    parser.add_argument('--follow', type=float, nargs='?',
+                        const=POLL_INTERVAL, metavar='SECONDS',
+                        help='keep reading as the file grows, checking '
+                             'every SECONDS (default {})'.format(
+                                 POLL_INTERVAL))
+    date_range.add_arguments(parser, 'rows for days')
+    args = parser.parse_args()
+    if args.filename is None and not args.from_db:
+        parser.error('the input file name is required without --from-db')
+    if args.follow and (args.from_db or args.matrix):
+        parser.error('--follow reads a file, a row at a time')
+    return args
 
 
 if __name__ == '__main__':
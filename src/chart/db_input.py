@@ -0,0 +1,121 @@
+# file: src/chart/db_input.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Read the nights and naps stored in the sleep db as input to the chart.
+
+The rows are read through a server-side (named) cursor, FETCH_SIZE rows
+at a time, so memory use does not grow with the range read. Each row is
+a night, with one of its naps, in the order they were loaded; they are
+turned back into the fields that binary_records.read_fields() gives for
+the extract stage's records, which Chart reads as it does a binary
+file. An SQLite db written by load.py --sqlite is read the same way
+(see src/load/sqlite_load.py).
+
+A night's own sleep is stored as a nap that starts at the night's start
+time. Every other nap becomes an 's' Event and a 'w' Event. An Event's
+day is the day of its night, or the next day if its time is earlier
+than the last Event's; a DayHeader is given for each day in turn.
+"""
+
+from src import binary_records
+from src.binary_records import ACTIONS, DAY, EVENT
+from src.time_kernel import MINUTES_IN_DAY
+
+
+FETCH_SIZE = 1000  # rows fetched from the server at a time
+CURSOR_NAME = 'chart_input'
+
+SELECT_ROWS = '''
+    SELECT n.night_id, n.start_date, n.start_time, n.start_no_data,
+           n.end_no_data, p.start_time, p.duration
+    FROM sl_night n LEFT JOIN sl_nap p ON p.night_id = n.night_id
+    WHERE (%(first)s::date IS NULL OR n.start_date >= %(first)s::date)
+      AND (%(last)s::date IS NULL OR n.start_date <= %(last)s::date)
+    ORDER BY n.start_date, n.night_id, p.nap_id
+'''
+
+
+def read_rows(engine, first=None, last=None, fetch_size=FETCH_SIZE):
+    """
+    :param engine: the db engine
+    :param first, last: 'YYYY-MM-DD' strings: read only the nights that
+                        start from first through last; None leaves that
+                        end open
+    :param fetch_size: the rows to fetch from the server at a time
+    :yield: (night_id, start_date, start_time, start_no_data,
+            end_no_data, nap start_time, nap duration) for each nap, or
+            with the nap fields None for a night with no naps
+    Called by: read_fields()
+    """
+    if engine.dialect.name == 'sqlite':
+        from src.load import sqlite_load  # which needs sqlalchemy
+        yield from sqlite_load.read_rows(engine, first, last, fetch_size)
+        return
+    with engine.connect() as connection:
+        cursor = connection.connection.cursor(CURSOR_NAME)
+        cursor.itersize = fetch_size
+        try:
+            cursor.execute(SELECT_ROWS, {'first': first, 'last': last})
+            yield from cursor
+        finally:
+            cursor.close()
+
+
+def _minute(time_of_day):
+    """ :return: a datetime.time as a minute index """
+    return time_of_day.hour * 60 + time_of_day.minute
+
+
+def rows_to_fields(rows):
+    """
+    :param rows: rows as read_rows() gives them, in that order
+    :yield: the (kind, code, date, minute, value) fields of the
+            DayHeader and Event records that would have given them
+    Called by: read_fields(), client code
+    """
+    night_id = None
+    ordinal = None  # the day of the last Event
+    last_minute = 0
+    for (row_night_id, start_date, start_time, start_no_data, end_no_data,
+         nap_time, duration) in rows:
+        if row_night_id != night_id:
+            night_id = row_night_id
+            night_ordinal = start_date.toordinal()
+            if ordinal is None:
+                ordinal = night_ordinal - 1
+            while ordinal < night_ordinal:
+                ordinal += 1
+                yield DAY, 0, ordinal, 0, 0
+            night_minute = last_minute = _minute(start_time)
+            action = 'N' if start_no_data else 'Y' if end_no_data else 'b'
+            yield EVENT, ACTIONS.index(action), 0, night_minute, \
+                binary_records.NO_HOURS
+            night_sleep = True  # the next nap may be the night's sleep
+        if nap_time is None:
+            continue
+        events = []
+        nap_minute = _minute(nap_time)
+        if not (night_sleep and nap_minute == night_minute):
+            events.append(('s', nap_minute))
+        night_sleep = False
+        events.append(('w', (nap_minute + duration.seconds // 60) %
+                       MINUTES_IN_DAY))
+        for action, minute in events:
+            if minute < last_minute:
+                ordinal += 1
+                yield DAY, 0, ordinal, 0, 0
+            last_minute = minute
+            yield EVENT, ACTIONS.index(action), 0, minute, \
+                binary_records.NO_HOURS
+
+
+def read_fields(engine, first=None, last=None, fetch_size=FETCH_SIZE):
+    """
+    As read_rows(), but yield the rows as rows_to_fields() gives them
+
+    Called by: Chart.read_db()
+    """
+    return rows_to_fields(read_rows(engine, first, last, fetch_size))
@@ -0,0 +1,57 @@
+# file: src/chart/follow.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Read a file as it grows, as tail -f does.
+
+A FollowedFile's reads do not stop at the end of the file: they wait,
+checking every POLL_INTERVAL seconds, until the data asked for has been
+appended. readline() returns only whole lines, and read(size) exactly
+size bytes, so a reader never sees a record half written. There is no
+end of file; the reader stops when it has read what it wants, or on
+KeyboardInterrupt.
+"""
+
+import time
+
+
+POLL_INTERVAL = 0.5  # seconds between checks for appended data
+
+
+class FollowedFile:
+    """ Wraps a file open for reading, text or binary """
+    def __init__(self, infile, interval=POLL_INTERVAL):
+        self.infile = infile
+        self.interval = interval
+        self.newline = '\n' if isinstance(infile.read(0), str) else b'\n'
+
+    def wait(self):
+        """
+        Called by: readline(), read()
+        """
+        time.sleep(self.interval)
+
+    def readline(self):
+        """
+        :return: the next whole line, once it has been written
+        Called by: client code
+        """
+        line = self.infile.readline()
+        while not line.endswith(self.newline):
+            self.wait()
+            line += self.infile.readline()
+        return line
+
+    def read(self, size):
+        """
+        :return: the next size bytes (or characters), once they have been
+                 written
+        Called by: binary_records.read_fields(), client code
+        """
+        data = self.infile.read(size)
+        while len(data) < size:
+            self.wait()
+            data += self.infile.read(size - len(data))
+        return data
@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+
+# file: src/chart/stats.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Daily sleep statistics, from the days x slots matrix a chart is drawn
+from.
+
+Usage (from the project root):
+
+    PYTHONPATH=.:src/extract python src/chart/stats.py extract.txt \\
+        --since 2017-01-01 --format json
+
+The input is read as chart_new.py reads it: extract stage output, as
+text or (--binary) binary records, or (--from-db) the nights and naps
+in the db. A MatrixChart fills its matrix of codes, a slot of
+--resolution minutes to each, and each of its rows in range gives a
+day's statistics:
+
+    date -- the row's date, as the chart gives it
+    sleep_hours -- the slots ASLEEP, in hours
+    naps -- the blocks of sleep starting that day, the night's included
+    longest_block_hours -- the longest of those, through midnight if
+                           it goes on past it, in hours
+    no_data_fraction -- the fraction of the day's slots NO_DATA
+    sleep_7_day_avg, sleep_30_day_avg -- the mean sleep_hours over the
+                                         day and the days in range
+                                         before it, up to 7 or 30 in all
+
+The matrix is read a row at a time, unpacked by MatrixChart.rows():
+the codes in each row are counted by bytes.count(), the blocks of sleep
+are found by a regular expression scan of each row, a block ending a
+row going on into the next, and the averages come from one running
+sum. The statistics are written as CSV or JSON.
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+from collections import namedtuple
+from datetime import date
+from itertools import accumulate
+
+from src import date_range
+from src.chart import db_input
+from src.chart.chart_new import RESOLUTIONS, MatrixChart
+
+
+ASLEEP, AWAKE, NO_DATA = (MatrixChart.CODES[ix:ix + 1] for ix in range(3))
+SLEEP_BLOCK = re.compile(re.escape(ASLEEP) + b'+')
+AVERAGE_DAYS = (7, 30)
+
+
+class DayStats(namedtuple('DayStatsTuple',
+                          'date, sleep_hours, naps, longest_block_hours, '
+                          'no_data_fraction, sleep_7_day_avg, '
+                          'sleep_30_day_avg')):
+    """ A day's statistics, as described in the module docstring """
+
+
+def running_means(values, days):
+    """
+    :return: for each of values, the mean of it and the days - 1 values
+             before it, or of as many as there are
+    Called by: day_stats()
+    """
+    sums = [0, *accumulate(values)]
+    return [(sums[end] - sums[max(0, end - days)]) / min(days, end)
+            for end in range(1, len(sums))]
+
+
+def sleep_blocks(rows):
+    """
+    :param rows: rows of codes, in date order
+    :return: for each row, the number of blocks of sleep that start in
+             it, and the slots in the longest of those
+    Called by: day_stats()
+    """
+    naps, longest = [], []
+    start_row = run = None  # of the block ending the last row, if any
+    for ix, row in enumerate(rows):
+        naps.append(0)
+        longest.append(0)
+        for block in SLEEP_BLOCK.finditer(row):
+            length = block.end() - block.start()
+            if block.start() == 0 and start_row is not None:
+                run += length
+            else:
+                start_row, run = ix, length
+                naps[ix] += 1
+            longest[start_row] = max(longest[start_row], run)
+        if row[-1:] != ASLEEP:
+            start_row = None
+    return naps, longest
+
+
+def day_stats(chart):
+    """
+    :param chart: a MatrixChart whose matrix has been filled
+    :return: a DayStats for each of the chart's rows in range
+    Called by: main(), client code
+    """
+    slots = chart.SLOTS_IN_DAY
+    per_hour = chart.SLOTS_IN_HOUR
+    asleep, no_data = [], []
+    for row in chart.rows():
+        asleep.append(row.count(ASLEEP))
+        no_data.append(row.count(NO_DATA))
+    naps, longest = sleep_blocks(chart.rows())
+    shown = list(chart.rows_shown())
+    averages = zip(*(running_means([asleep[ix] for ix, _ in shown], days)
+                     for days in AVERAGE_DAYS))
+    return [DayStats(date.fromordinal(ordinal).isoformat(),
+                     round(asleep[ix] / per_hour, 3), naps[ix],
+                     round(longest[ix] / per_hour, 3),
+                     round(no_data[ix] / slots, 4),
+                     *(round(average / per_hour, 3)
+                       for average in day_averages))
+            for (ix, ordinal), day_averages in zip(shown, averages)]
+
+
+def write_csv(stats, outfile):
+    """
+    Called by: main()
+    """
+    writer = csv.writer(outfile, lineterminator='\n')
+    writer.writerow(DayStats._fields)
+    writer.writerows(stats)
+
+
+def write_json(stats, outfile):
+    """
+    Called by: main()
+    """
+    json.dump([day._asdict() for day in stats], outfile, indent=1)
+    outfile.write('\n')
+
+
+def get_parse_args():
+    """
+    Parse and return the c.l.a.'s
+
+    Called by: main()
+    """
+    parser = argparse.ArgumentParser(
+        description='Write daily sleep statistics as CSV or JSON')
+    parser.add_argument('filename', nargs='?',
+                        help='the input file name')
+    parser.add_argument('--binary', action='store_true',
+                        help='read binary records instead of text')
+    parser.add_argument('--from-db', action='store_true',
+                        help='read the nights and naps in the database '
+                             'instead of a file')
+    parser.add_argument('--fetch-size', type=int,
+                        default=db_input.FETCH_SIZE,
+                        help='with --from-db, the rows to fetch at a time')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--resolution', type=int, choices=RESOLUTIONS,
+                        default=15, help='the minutes in each slot')
+    date_range.add_arguments(parser, 'days')
+    parser.set_defaults(debug=False)
+    args = parser.parse_args()
+    if args.filename is None and not args.from_db:
+        parser.error('the input file name is required without --from-db')
+    return args
+
+
+def main():
+    args = get_parse_args()
+    chart = MatrixChart(args, args.resolution)
+    if args.from_db:
+        # only --from-db needs sqlalchemy and the loader
+        from sqlalchemy import create_engine
+        from src.load import load
+        try:
+            url = load.get_url()
+        except KeyError:
+            print('Please set the environment variable DB_URL, or '
+                  'DB_USERNAME and DB_PASSWORD')
+            sys.exit(1)
+        chart.fill_matrix(chart.read_db(create_engine(url), args.fetch_size))
+    else:
+        chart.fill_matrix(chart.read_file())
+    stats = day_stats(chart)
+    if args.format == 'json':
+        write_json(stats, sys.stdout)
+    else:
+        write_csv(stats, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
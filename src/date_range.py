@@ -0,0 +1,113 @@
+# file: src/date_range.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Limit a run of the pipeline to the nights that start in a range of days.
+
+A night belongs to the day of the Event that starts it (a 'b', 'N', or
+'Y' Event), and is in range if that day is from since through until,
+inclusive. Its naps, and any day headers before its next night, go
+with it. Records arrive in date order, so a stage can stop reading at
+the first night after until.
+
+Extract applies the range first (see read_fns.MappedExtract), so the
+later stages see only in-range records; each stage also takes --since
+and --until, for input from a full run.
+"""
+
+from datetime import date
+
+from src.records import DayHeader, Night, WeekHeader
+
+
+NIGHT_STARTS = 'bNY'  # the first characters of actions that start a night
+
+
+class DateRange:
+    """ Tracks whether the night being read is in range """
+    def __init__(self, since=None, until=None):
+        """
+        :param since, until: datetime.dates; None leaves that end open
+        """
+        self.since = since and since.isoformat()
+        self.until = until and until.isoformat()
+        self.in_range = not self
+        self.past = False  # a night after until has started
+
+    def __bool__(self):
+        return bool(self.since or self.until)
+
+    def starts_night(self, day):
+        """
+        Note that a night starts on day
+
+        :param day: a datetime.date, or a 'YYYY-MM-DD' string
+        :return: True iff the night is in range
+        Called by: extract_records(), night_naps(), client code
+        """
+        day = str(day)
+        if self.until and day > self.until:
+            self.past = True
+        self.in_range = not self.past and \
+            not (self.since and day < self.since)
+        return self.in_range
+
+    def extract_records(self, records):
+        """
+        :param records: WeekHeader, DayHeader, and Event records, as from
+                        Extract.records()
+        :yield: the records of the nights in range. The first is
+                preceded by the week and day headers last read.
+        Called by: client code
+        """
+        week_header = day_header = None  # the headers held back
+        day = None
+        for record in records:
+            if isinstance(record, WeekHeader):
+                week_header, day_header = record, None
+            elif isinstance(record, DayHeader):
+                day_header = record
+                day = record.dt_date
+            elif day is not None and record.action[0] in NIGHT_STARTS:
+                self.starts_night(day)
+                if self.past:
+                    return
+            if not self.in_range:
+                continue
+            if week_header is not None and week_header is not record:
+                yield week_header
+            if day_header is not None and day_header is not record:
+                yield day_header
+            week_header = day_header = None
+            yield record
+
+    def night_naps(self, records):
+        """
+        :param records: Night and Nap records, from the transform stage
+        :yield: the Nights in range, with their Naps
+        Called by: client code
+        """
+        for record in records:
+            if isinstance(record, Night):
+                self.starts_night(record.start_date)
+                if self.past:
+                    return
+            if self.in_range:
+                yield record
+
+
+def add_arguments(parser, what='nights starting'):
+    """
+    Add --since and --until to an argparse parser
+
+    :param what: what the range limits, for the help text
+    Called by: client code
+    """
+    parser.add_argument('--since', type=date.fromisoformat,
+                        help='only {} on or after this YYYY-MM-DD '
+                             'date'.format(what))
+    parser.add_argument('--until', type=date.fromisoformat,
+                        help='only {} on or before this YYYY-MM-DD '
+                             'date'.format(what))
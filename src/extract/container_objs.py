@@ -7,7 +7,9 @@
 
 import datetime
 import re
+from array import array
 from collections import namedtuple
+from itertools import compress
 
 
 def validate_segment(segment):
@@ -46,13 +48,19 @@ class Event(namedtuple('EventTuple', 'action, mil_time, hours')):
                  after. Its value may not be zero (0.00), but may be
                  the empty string.
     """
-    pass
+    def line(self):
+        """ The event as written to the extract stage's output """
+        event_str = f'action: {self.action}, time: {self.mil_time}'
+        if self.hours:
+            event_str += f', hours: {float(self.hours):.2f}'
+        return event_str
 
 
 class Day(namedtuple('DayTuple', 'dt_date, events')):
     """
     Each DayTuple holds a datetime.date and a (possibly empty)
-    list of Events
+    list of Events. The Days of a Week are views: their events are
+    DayEvents, stored in the Week's EventColumns.
     """
     def __init__(self, d, e):
         """ Ctor used just to filter input """
@@ -62,16 +70,171 @@ class Day(namedtuple('DayTuple', 'dt_date, events')):
             raise TypeError('Day ctor called with non-list second arg')
 
 
-class Week(namedtuple('WeekTuple',
-                      'Sunday, Monday, Tuesday, Wednesday, Thursday, Friday,'
-                      ' Saturday')):
-    """ Each WeekTuple holds seven named Day tuples """
+ACTIONS = 'bsw'  # an Event's action code is its action's index here
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+NO_HOURS = 0xFFFF  # hours code for an Event whose hours is ''
+# Event fields for each time and hours code that validate_segment() allows:
+# a time may be up to '29:99', minute 29 * 60 + 99, which is '30:39' here
+MIL_TIMES = tuple('{}:{:02}'.format(*divmod(minutes, 60))
+                  for minutes in range(29 * 60 + 100))
+HOURS = tuple('{}.{:02}'.format(*divmod(hours, 100))
+              for hours in range(30 * 100))
+MIL_TIME_CODES = {mil_time: code for code, mil_time in enumerate(MIL_TIMES)}
+HOURS_CODES = {hours: code for code, hours in enumerate(HOURS)}
+
+
+class EventColumns:
+    """
+    A Week's Events, as parallel arrays of: the day of the week (0 is
+    Sunday); the action code; the time, in minutes since midnight; and
+    hours, in hundredths of an hour. Six bytes per Event.
+
+    Fields are stored as numbers, so an Event read back has only its
+    action's first character, and its hours with exactly two digits
+    after the decimal point, whatever form it was appended in. A time
+    not in 'H:MM' form (e.g., '07:45') is kept as given, by the Event's
+    index, in odd_times, so the extract stage writes it as it was read.
+    """
+    __slots__ = ('days', 'actions', 'minutes', 'hours', 'odd_times')
+
+    def __init__(self, days=b'', actions=b'', minutes=b'', hours=b'',
+                 odd_times=None):
+        self.days = array('B', days)
+        self.actions = array('B', actions)
+        self.minutes = array('H', minutes)
+        self.hours = array('H', hours)
+        self.odd_times = dict(odd_times or {})
+
+    def __len__(self):
+        return len(self.days)
+
+    def __reduce__(self):
+        return EventColumns, (self.days.tobytes(), self.actions.tobytes(),
+                              self.minutes.tobytes(), self.hours.tobytes(),
+                              self.odd_times)
+
+    def append(self, day_ix, action, mil_time, hours):
+        """ Append an Event's fields, as strings that passed validation """
+        minutes = MIL_TIME_CODES.get(mil_time)
+        if minutes is None:  # e.g., '07:45'
+            hh, mm = mil_time.split(':', 1)
+            minutes = int(hh) * 60 + int(mm[:2])
+            self.odd_times[len(self.days)] = mil_time
+        if not hours:
+            hours_code = NO_HOURS
+        else:
+            hours_code = HOURS_CODES.get(hours)
+            if hours_code is None:  # e.g., '6.5'
+                hours_code = round(float(hours) * 100)
+        self.days.append(day_ix)
+        self.actions.append(ACTION_CODES[action[0]])
+        self.minutes.append(minutes)
+        self.hours.append(hours_code)
+
+    def event(self, ix):
+        """ :return: the Event at index ix """
+        hours = self.hours[ix]
+        mil_time = self.odd_times.get(ix) if self.odd_times else None
+        return Event(ACTIONS[self.actions[ix]],
+                     mil_time or MIL_TIMES[self.minutes[ix]],
+                     '' if hours == NO_HOURS else HOURS[hours])
+
+
+class DayEvents:
+    """ A list-like view of one day's Events in an EventColumns """
+    __slots__ = ('columns', 'day_ix')
+
+    def __init__(self, columns, day_ix):
+        self.columns = columns
+        self.day_ix = day_ix
+
+    def append(self, event):
+        self.columns.append(self.day_ix, *event)
+
+    def __iter__(self):
+        days = self.columns.days
+        return map(self.columns.event,
+                   compress(range(len(days)), map(self.day_ix.__eq__, days)))
+
+    def __len__(self):
+        return self.columns.days.count(self.day_ix)
+
+    def __getitem__(self, ix):
+        return list(self)[ix]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Week:
+    """
+    Seven Days, beginning with a Sunday, as a namedtuple of Days would
+    hold them: a Week may be indexed, iterated, or read by day name
+    (week.Sunday ... week.Saturday). Each Day is made on demand, as a
+    view onto the Week's EventColumns.
+    """
+    __slots__ = ('sunday', 'columns')
+    _fields = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday',
+               'Friday', 'Saturday')
+
     def __init__(self, *day_list):
-        """ Ctor used just to filter input """
-        self.day_list = day_list
-        for ix, p in enumerate(self.day_list):
+        """ Ctor used to filter input; the Days' Events are copied """
+        if len(day_list) != len(self._fields):
+            raise TypeError('Week ctor needs 7 Days')
+        for ix, p in enumerate(day_list):
             if not isinstance(p, Day):
                 raise TypeError('Week ctor with non-Day in param list')
             if not ix and p.dt_date.weekday() != 6:
                 raise ValueError('Week ctor called with non-Sunday start'
                                  'date')
+        self.sunday = day_list[0].dt_date
+        self.columns = EventColumns()
+        for ix, day in enumerate(day_list):
+            for event in day.events:
+                self.columns.append(ix, *event)
+
+    @classmethod
+    def starting(cls, sunday, columns=None):
+        """
+        Trusted ctor: sunday must be a Sunday's datetime.date, and
+        columns (if given) must hold only days 0 through 6
+        """
+        week = cls.__new__(cls)
+        week.sunday = sunday
+        week.columns = EventColumns() if columns is None else columns
+        return week
+
+    def __reduce__(self):
+        return Week.starting, (self.sunday, self.columns)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, ix):
+        if isinstance(ix, slice):
+            return tuple(self)[ix]
+        ix = range(len(self._fields))[ix]
+        # a trusted Day: tuple.__new__() skips Day.__init__()'s checks
+        return tuple.__new__(Day, (self.sunday + datetime.timedelta(days=ix),
+                                   DayEvents(self.columns, ix)))
+
+    def __getattr__(self, name):
+        if name in self._fields:
+            return self[self._fields.index(name)]
+        raise AttributeError(name)
+
+    def __iter__(self):
+        for ix in range(len(self._fields)):
+            yield self[ix]
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return 'Week{}'.format(tuple(self))
@@ -53,14 +53,18 @@ Principal methods
 lines_in_weeks_out() structures the data into an intermediate format
 consisting of Weeks, Days, and Events. A Week has 7 consecutive (calendar)
 Days, beginning with a Sunday. The Events from each Day are grouped
-together.
+together. A Week stores its Events compactly, in an EventColumns (see
+container_objs.py); its Days and Events are made on demand.
 
-_manage_output_buffer() converts the Weeks, Days, and Events into strings,
-and puts the strings into the output buffer one Week at a time.
+_manage_output_buffer() converts the Weeks and Days into header records,
+and puts them, with the Events, into the output buffer one Week at a time.
 
 _write_or_discard_night() makes sure that only complete nights are written
 to output
 
+records() yields the records of complete nights as they become available;
+lines_in_weeks_out() writes each one as a line of text.
+
 
 Week, Day, Event
 ----------------
@@ -76,27 +80,46 @@ are complete.
 
 If an <'action: b'> event has NO third field, then the data for the
 preceding night or nights are NOT complete. In that case, events are
-discarded *in reverse order* starting with the event before the current
-<'action: b'> event, up to and including the most recent <'action: b'>
-event string that *does* have a third field.
+discarded, starting with the event before the current <'action: b'>
+event, up to and including the most recent <'action: b'> event that
+*does* have a third field. out_buffer holds only the data since that
+event, which starts at index self.night_start, so the discard is a
+single truncation of out_buffer.
 
-Event strings not discarded, along with header strings for each calendar
+Events not discarded, along with header records for each calendar
 week and day, are written to sys.stdout by default.
+
+ParallelExtract does the same work with the parsing of the .csv file
+spread over a pool of processes. IncrementalExtract, for a .csv file
+that grows between runs, picks up where a checkpoint left off.
+ChangedWeeksExtract, for a .csv file whose weeks may be edited between
+runs, re-reads only the weeks that changed. MappedExtract reads the
+.csv file's bytes through mmap, jumping from week to week by an index.
 """
 import datetime
+import hashlib
+import itertools
+import json
+import mmap
+import os
 import re
 import logging
 import sys
-from typing import Tuple, Optional, Union, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Tuple, Optional, Union, List
 from datetime import date
 
 from container_objs import validate_segment, Week, Day, Event
+from src.date_range import DateRange
+from src.log_setup import repeats
+from src.records import WeekHeader, DayHeader
 # from tests.file_access_wrappers import FileReadAccessWrapper
 from io import TextIOWrapper
 
 
 read_logger = logging.getLogger('extract.read_fns')
 read_logger.setLevel('DEBUG')
+SEGMENT_INVALID = 'segment invalid \u00d7{:,} in week {}'
 
 
 def open_infile(filename) -> TextIOWrapper:
@@ -119,31 +142,64 @@ class Extract:
         self.new_week = None
         self.line_as_list = []
         self.in_missing_data = False
+        self.night_start = 0  # out_buffer index of the pending night's 'b'
+        self.ready = []  # records of complete nights, not yet yielded
 
-    def lines_in_weeks_out(self) -> None:
+    def lines_in_weeks_out(self, outfile: TextIOWrapper = sys.stdout) -> None:
         """
         Read lines from .csv file; output weeks, days, and events
 
         Called by: client code
         """
+        for record in self.records():
+            print(record.line(), file=outfile)
+
+    def records(self):
+        """
+        Read lines from .csv file; yield week and day headers, and events
+
+        Called by: lines_in_weeks_out(), client code
+        """
         in_week = False
         out_buffer = []
         for line in self.infile:
-            self.line_as_list = line.strip().split(',')[:22]
-            self.line_as_list = (
-                    self.line_as_list[:1] + [item.strip() for item in
-                                             self.line_as_list[1:]])
-            date_match_obj = self._re_match_date(self.line_as_list[0])
-            if not in_week:
-                self.new_week = None
-                if date_match_obj:
-                    in_week = self._look_for_week(date_match_obj)
-            if in_week:  # 'if' is correct here
-                # output good data and discard bad data
-                in_week = self._handle_week(out_buffer)
+            in_week = self._read_line(line, in_week, out_buffer)
+            if self.ready:
+                yield from self._take_ready()
         # handle any data left in buffer
         if out_buffer:
             self._handle_leftovers(out_buffer)
+            yield from self._take_ready()
+
+    def _read_line(self, line: str, in_week: bool, out_buffer: list) -> bool:
+        """
+        Read one line of the .csv file into self.new_week
+
+        :return: True iff we are still in a week after this line
+        Called by: records(), _parse_chunk()
+        """
+        self.line_as_list = line.strip().split(',')[:22]
+        self.line_as_list = (
+                self.line_as_list[:1] + [item.strip() for item in
+                                         self.line_as_list[1:]])
+        date_match_obj = self._re_match_date(self.line_as_list[0])
+        if not in_week:
+            self.new_week = None
+            if date_match_obj:
+                in_week = self._look_for_week(date_match_obj)
+        if in_week:  # 'if' is correct here
+            # output good data and discard bad data
+            in_week = self._handle_week(out_buffer)
+        return in_week
+
+    def _take_ready(self) -> list:
+        """
+        Hand over the records of complete nights
+
+        Called by: records(), ParallelExtract.records()
+        """
+        ready, self.ready = self.ready, []
+        return ready
 
     @staticmethod
     def _re_match_date(field: str) -> re.match:
@@ -163,12 +219,10 @@ class Extract:
         """
         sunday_date = self._match_obj_to_date(date_match_obj)
         if self._is_a_sunday(sunday_date):
-            # set up a Week
-            day_list = self._make_day_list(sunday_date)
-            self.new_week = Week(*day_list)
+            self.new_week = Week.starting(sunday_date)
         else:
-            read_logger.warning('Non-Sunday date {} found in input'.
-                                format(sunday_date))
+            read_logger.warning('Non-Sunday date %s found in input',
+                                sunday_date)
         return bool(self.new_week)
 
     @staticmethod
@@ -180,18 +234,6 @@ class Extract:
         """
         return dt_date.weekday() == Extract.SUNDAY if dt_date else False
 
-    @staticmethod
-    def _make_day_list(sunday_date: date) -> List[Day]:
-        """
-        Make a week's worth of Day objects
-
-        Called by: _look_for_week()
-        """
-        return [Day(sunday_date +
-                    datetime.timedelta(days=x),
-                    [])  # [] will hold Event list for Day
-                for x in range(Extract.DAYS_IN_A_WEEK)]
-
     def _handle_week(self, out_buffer: list) -> bool:
         """
         if there are valid events in self.line_as_list:
@@ -209,6 +251,7 @@ class Extract:
             have_events = self._get_events()  # adds events to Week
         else:  # we saw a blank line: our week has ended
             self._manage_output_buffer(out_buffer)
+            self.new_week = None  # so _handle_leftovers() can't repeat it
         return have_events
 
     def _handle_leftovers(self, out_buffer: list) -> None:
@@ -248,26 +291,40 @@ class Extract:
             # a segment is a list of 3 consecutive fields from the .csv file
             segment = shorter_line[3 * ix: 3 * ix + 3]
             segment = [seg.strip() for seg in segment]
-            if validate_segment(segment):
-                an_event = Event(*segment)
-            # elif [seg.strip() for seg in segment] == ['', '', '']:
-            elif segment == ['', '', '']:
-                an_event = None
-            else:
-                read_logger.warning('segment {} not valid in _get_events()\n'
-                                    '\tsegment date is {}'.
-                                    format(segment,
-                                           self.new_week[ix].dt_date))
-                continue
-            if self.new_week and an_event and an_event.action:
-                self.new_week[ix].events.append(an_event)
-                have_events = True
+            have_events = self._add_event(ix, segment) or have_events
         return have_events
 
+    def _add_event(self, ix: int, segment: list) -> bool:
+        """
+        Add segment, the stripped fields of day ix, to self.new_week as an
+        event, if it is valid
+
+        :return: True iff an event was added
+        Called by: _get_events(), MappedExtract._get_events()
+        """
+        if validate_segment(segment):
+            an_event = segment
+        # elif [seg.strip() for seg in segment] == ['', '', '']:
+        elif segment == ['', '', '']:
+            an_event = None
+        else:
+            read_logger.warning('segment %s not valid in _get_events()\n'
+                                '\tsegment date is %s', segment,
+                                self.new_week[ix].dt_date,
+                                extra=repeats(SEGMENT_INVALID,
+                                              self.new_week[0].dt_date))
+            return False
+        if self.new_week and an_event and an_event[0]:
+            # store the event's fields without making an Event
+            self.new_week.columns.append(ix, *an_event)
+            return True
+        return False
+
     def _manage_output_buffer(self, out_buffer: list) -> None:
         """
-        Convert the Events in self.new_week into strings, place the strings
-        into output buffer, and pass output buffer to _write_or_discard_night()
+        Put header records for self.new_week and its days, and the days'
+        Events, into output buffer; pass output buffer to
+        _write_or_discard_night() at the start of each night
 
         :return: None
         Called by: _handle_leftovers(), _handle_week()
@@ -277,111 +334,865 @@ class Extract:
             for day in self.new_week:
                 out_buffer.append(self._get_day_header(day))
                 for event in day.events:
-                    event_str = (f'action: {event.action}, '
-                                 f'time: {event.mil_time}')
-                    if event.hours:
-                        event_str += f', hours: {float(event.hours):.2f}'
                     if event.action == 'b':
-                        self._write_or_discard_night(event, day.dt_date, out_buffer)
-                    out_buffer.append(event_str)
+                        self._write_or_discard_night(event, day.dt_date,
+                                                     out_buffer)
+                        self.night_start = len(out_buffer)
+                    out_buffer.append(event)
 
-    def _get_week_header(self) -> str:
+    def _get_week_header(self) -> WeekHeader:
         """
 
         Called by: _manage_output_buffer()
         """
-        wk_header = '\nWeek of Sunday, {}:'.format(self.new_week[0].dt_date)
-        wk_header += '\n' + '=' * (len(wk_header) - 2)
-        return wk_header
+        return WeekHeader(self.new_week[0].dt_date)
 
     @staticmethod
-    def _get_day_header(day: Day) -> str:
+    def _get_day_header(day: Day) -> DayHeader:
         """
 
         Called by: _manage_output_buffer()
         """
-        return '    {}'.format(day.dt_date)  # four leading spaces
+        return DayHeader(day.dt_date)
 
     def _write_or_discard_night(self, action_b_event: Event,
                                 datetime_date: date,
-                                out_buffer: list,
-                                outfile: TextIOWrapper = sys.stdout) -> None:
+                                out_buffer: list) -> None:
         """
-        Write (only) complete nights from out_buffer to outfile.
+        Move (only) complete nights from out_buffer to self.ready.
 
         action_b_event is the first Event for some night. It will have an
         'hours' field iff we have complete data for the *preceding* night.
         Called by: _manage_output_buffer()
         """
         if action_b_event.hours:  # we have complete data for preceding night
-            self._write_complete_night(out_buffer, outfile)
+            self._write_complete_night(out_buffer)
         else:
-            read_logger.info('Incomplete night(s) before {}'.
-                             format(datetime_date))
-            self._discard_incomplete_night(out_buffer, outfile)
+            read_logger.info('Incomplete night(s) before %s', datetime_date)
+            self._discard_incomplete_night(out_buffer)
 
-    def _write_complete_night(self, out_buffer: list,
-                              outfile: TextIOWrapper) -> None:
+    def _write_complete_night(self, out_buffer: list) -> None:
         """
-        Write a complete night from output buffer to outfile
+        Move a complete night from output buffer to self.ready
         Called by: _write_or_discard_night()
         """
-        for line in out_buffer:
-            if self.in_missing_data:
-                if line.startswith('action: b'):
-                    line = line.replace('b', 'Y', 1)
-                    self.in_missing_data = False
-            print(line, file=outfile)
+        if self.in_missing_data:  # the night's 'b' follows missing data
+            b_event = out_buffer[self.night_start]
+            out_buffer[self.night_start] = b_event._replace(
+                action='Y' + b_event.action[1:])
+            self.in_missing_data = False
+        self.ready.extend(out_buffer)
         out_buffer.clear()
 
-    def _discard_incomplete_night(self, out_buffer: list,
-                                  outfile: TextIOWrapper) -> None:
+    def _discard_incomplete_night(self, out_buffer: list) -> None:
         """
+        Truncate output buffer at the start of the pending night, keeping
+        only the night's headers. If the night began with a 3-element 'b'
+        event, there's good data *before* it: mark that with an 'N' event.
+
         Called by: _write_or_discard_night()
         """
-        # pop incomplete data from output buffer
-        for buf_ix in range(len(out_buffer) - 1, -1, -1):
-            this_line = out_buffer[buf_ix]
-            # if we see a 3-element 'b' event, there's good data *before* it
-            if self._match_complete_b_event_line(this_line):
-                no_data_line = self._get_no_data_line(out_buffer, buf_ix)
-                print(no_data_line, file=outfile)
-            elif self._match_event_line(this_line):  # pop only Event lines
-                out_buffer.pop(buf_ix)  # leave headers in buffer
+        night = out_buffer[self.night_start:]
+        del out_buffer[self.night_start:]
+        if night and self._is_complete_b_event(night[0]):
+            self.ready.append(night[0]._replace(action='N', hours=''))
+        out_buffer.extend(record for record in night
+                          if not isinstance(record, Event))
         self.in_missing_data = True
 
     @staticmethod
-    def _match_complete_b_event_line(line: str) -> re.match:
+    def _is_complete_b_event(record) -> bool:
         """
-        Called by: _write_or_discard_night()
+        Called by: _discard_incomplete_night()
+        """
+        return isinstance(record, Event) and record.action == 'b' and \
+            bool(record.hours)
+
+
+class ParallelExtract(Extract):
+    """
+    Extract, with the .csv file parsed in a pool of worker processes.
+
+    The input is split into chunks at blank lines, where one Week always
+    ends and the next has not begun. Workers turn their chunks' lines
+    into Weeks; the Weeks are then passed to _manage_output_buffer() in
+    input order in this process. So the incomplete-night state
+    (out_buffer, self.in_missing_data) carries from one chunk to the next
+    just as it does from one week to the next in Extract, and the output
+    is the same as Extract's.
+    """
+    def __init__(self, infile: TextIOWrapper, workers: int = 4,
+                 chunks_per_worker: int = 4) -> None:
+        super().__init__(infile)
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+
+    def records(self):
         """
-        return re.match(r'action: b, time: \d{1,2}:\d{2},'
-                        r' hours: \d{1,2}\.\d{2}$', line)
+        Parse chunks of the .csv file in parallel; yield week and day
+        headers, and events, as Extract.records() does
+
+        Called by: lines_in_weeks_out(), client code
+        """
+        lines = self.infile.readlines()
+        chunks = self._split_at_blank_lines(
+            lines, len(lines) // (self.workers * self.chunks_per_worker))
+        out_buffer = []
+        with ProcessPoolExecutor(self.workers) as executor:
+            for weeks, open_week in executor.map(_parse_chunk, chunks):
+                for week in weeks:
+                    self.new_week = week
+                    self._manage_output_buffer(out_buffer)
+                    if self.ready:
+                        yield from self._take_ready()
+                self.new_week = open_week
+        # handle any data left in buffer
+        if out_buffer:
+            self._handle_leftovers(out_buffer)
+            yield from self._take_ready()
 
     @staticmethod
-    def _get_no_data_line(out_buffer: list, buf_ix: int) -> str:
+    def _split_at_blank_lines(lines: list, min_chunk_len: int) -> List[list]:
         """
-        Extract and update the next 'no data' line from buffer
-        :return: the updated line
-        Called by: _discard_incomplete_night()
+        Split lines into chunks of at least min_chunk_len lines, each but
+        the last ending with a line that holds only commas and whitespace
+
+        Called by: records()
         """
-        line = out_buffer.pop(buf_ix).replace('b', 'N', 1)
-        if line.count(',') == 2:
-            pos = line.rfind(',')
-            line = line[:pos]
-        return line
+        chunks = []
+        start = 0
+        for ix in range(len(lines)):
+            if ix + 1 - start >= min_chunk_len and \
+                    not lines[ix].replace(',', '').strip():
+                chunks.append(lines[start: ix + 1])
+                start = ix + 1
+        if start < len(lines):
+            chunks.append(lines[start:])
+        return chunks
+
+
+class IncrementalExtract(Extract):
+    """
+    Extract, for a .csv file that grows between runs: yield only the
+    records not yielded by the last run.
+
+    After a run, the checkpoint file holds:
+        offset -- the byte offset in the .csv file of the line that
+                  starts the last week; the weeks before it are done,
+                  but days may yet be added to the last week
+        sha256 -- a hash of the .csv file up to offset
+        in_missing_data, night_start, pending -- Extract's incomplete-
+                  night state at offset; pending is out_buffer
+        last_day -- the date of the last DayHeader yielded before offset
+        emitted, emitted_sha256 -- the number, and a hash of the lines,
+                  of the records yielded after offset
+
+    The next run hashes the .csv file up to offset. If the hash matches,
+    it restores the state and reads on from offset; it holds back the
+    first emitted records, which the last run yielded already, and
+    checks them against emitted_sha256. If either check fails, this is a
+    full run. Hashing the unchanged part of the file is much faster than
+    parsing it, so a run costs about as much as its new data.
+
+    A resumed run's new records usually begin with the 'b' Event of a
+    night whose day was yielded by an earlier run. So that the stream
+    stands alone (Transform dates a Night by the DayHeader before it),
+    they are then preceded by the WeekHeader and DayHeader of that day.
+
+    The checkpoint is written once every record has been yielded. If a
+    later stage then fails, delete the checkpoint file to start over.
+    """
+    CHECKPOINT_VERSION = 1
+    HASH_BLOCK_SIZE = 1 << 20
+
+    def __init__(self, infile: BinaryIO, checkpoint_name: str) -> None:
+        """infile: open for binary read"""
+        super().__init__(infile)
+        self.checkpoint_name = checkpoint_name
+        self.hasher = hashlib.sha256()
+        self.offset = 0
+        self.out_buffer = []
+        self.checkpoint = None  # to write when the records run out
+        self.emitted = []  # records yielded since the checkpoint's offset
+        self.last_day = None  # the date of the last DayHeader yielded
+
+    def records(self):
+        """
+        Yield week and day headers, and events, as Extract.records()
+        does, from the checkpoint on; then write a new checkpoint
+
+        Called by: lines_in_weeks_out(), client code
+        """
+        checkpoint = self._read_checkpoint()
+        resumed = checkpoint is not None and self._resume(checkpoint)
+        if not resumed:
+            self._restart()
+        context_day = self.last_day
+        records = self._records_from_offset()
+        if resumed:
+            repeated = list(itertools.islice(records, checkpoint['emitted']))
+            if len(repeated) < checkpoint['emitted'] or \
+                    self._lines_hash(repeated) != checkpoint['emitted_sha256']:
+                read_logger.info('Records after checkpoint changed: full run')
+                records.close()
+                self._restart()
+                records = self._records_from_offset()
+                resumed = False
+            context_day = self._last_day_in(repeated, context_day)
+        first = next(records, None)
+        if first is not None:
+            if resumed and context_day and isinstance(first, Event):
+                yield from self._context_headers(context_day)
+            yield first
+            yield from records
+        self._write_checkpoint()
+
+    def _context_headers(self, day: date) -> list:
+        """
+        :return: the WeekHeader and DayHeader for day
+        Called by: records()
+        """
+        return [WeekHeader(day - datetime.timedelta(
+                    days=(day.weekday() + 1) % self.DAYS_IN_A_WEEK)),
+                DayHeader(day)]
+
+    def _read_checkpoint(self) -> Optional[dict]:
+        """
+        :return: the checkpoint, or None if there is no usable one
+        Called by: records()
+        """
+        try:
+            with open(self.checkpoint_name) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            read_logger.warning('Checkpoint %s unreadable: full run',
+                                self.checkpoint_name)
+            return None
+        if checkpoint.get('version') != self.CHECKPOINT_VERSION:
+            read_logger.info('Checkpoint version changed: full run')
+            return None
+        return checkpoint
+
+    def _resume(self, checkpoint: dict) -> bool:
+        """
+        Hash the .csv file up to the checkpoint's offset; if it is
+        unchanged, restore the checkpoint's state.
+
+        :return: True iff the state was restored
+        Called by: records()
+        """
+        hasher = hashlib.sha256()
+        remaining = checkpoint['offset']
+        while remaining:
+            block = self.infile.read(min(remaining, self.HASH_BLOCK_SIZE))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+        if remaining or hasher.hexdigest() != checkpoint['sha256']:
+            read_logger.info('Input changed before checkpoint: full run')
+            return False
+        self.hasher = hasher
+        self.offset = checkpoint['offset']
+        self._restore_state(checkpoint)
+        return True
+
+    def _restart(self) -> None:
+        """
+        Set up for a full run
+
+        Called by: records()
+        """
+        self.infile.seek(0)
+        self.hasher = hashlib.sha256()
+        self.offset = 0
+        self.in_missing_data = False
+        self.night_start = 0
+        self.out_buffer = []
+        self.ready = []
+        self.last_day = None
+
+    def _records_from_offset(self):
+        """
+        As Extract.records(), reading on from self.offset with the
+        restored state; note the checkpoint at the start of each week
+
+        Called by: records()
+        """
+        in_week = False
+        out_buffer = self.out_buffer
+        self._note_checkpoint(out_buffer)
+        for line in self.infile:
+            was_in_week = in_week
+            in_week = self._read_line(line.decode(), in_week, out_buffer)
+            if in_week and not was_in_week:
+                # a week starts on this line, which left the state alone
+                self._note_checkpoint(out_buffer)
+            self.offset += len(line)
+            self.hasher.update(line)
+            if self.ready:
+                yield from self._take_noted()
+        # handle any data left in buffer
+        if out_buffer:
+            self._handle_leftovers(out_buffer)
+            yield from self._take_noted()
+
+    def _take_noted(self) -> list:
+        """
+        Hand over the records of complete nights, noting them as emitted,
+        and noting the last DayHeader among them
+
+        Called by: _records_from_offset()
+        """
+        ready = self._take_ready()
+        self.emitted += ready
+        self.last_day = self._last_day_in(ready, self.last_day)
+        return ready
 
     @staticmethod
-    def _match_event_line(line: str) -> re.match:
+    def _last_day_in(records: list, last_day: Optional[date]) -> \
+            Optional[date]:
         """
-        Called by: _write_or_discard_night()
+        :return: the date of the last DayHeader in records, else last_day
+        Called by: records(), _take_noted()
+        """
+        for record in reversed(records):
+            if isinstance(record, DayHeader):
+                return record.dt_date
+        return last_day
+
+    def _note_checkpoint(self, out_buffer: list) -> None:
+        """
+        Called by: _records_from_offset()
+        """
+        self.checkpoint = {'version': self.CHECKPOINT_VERSION,
+                           'offset': self.offset,
+                           'sha256': self.hasher.hexdigest(),
+                           **self._state(out_buffer)}
+        self.emitted = []
+
+    def _state(self, out_buffer: list) -> dict:
+        """
+        :return: the incomplete-night state, and last_day, as JSON
+        Called by: _note_checkpoint()
         """
-        # b events may have 2 or 3 elements
-        match_line = r'(?:action: b, time: \d{1,2}:\d{2})' \
-                     r'(?:, hours: \d{1,2}\.\d{2})?$'
-        # s events must have 2 elements
-        match_line += r'|(?:action: s, time: \d{1,2}:\d{2}$)'
-        # w events must have 3 elements
-        match_line += r'|(?:action: w, time: \d{1,2}:\d{2}, ' \
-                      r'hours: \d{1,2}\.\d{2}$)'
-        return re.match(match_line, line)
+        return {'in_missing_data': self.in_missing_data,
+                'night_start': self.night_start,
+                'pending': [self._to_json(record) for record in out_buffer],
+                'last_day': self.last_day and self.last_day.isoformat()}
+
+    def _restore_state(self, state: dict) -> None:
+        """
+        Set the incomplete-night state, and last_day, from _state()'s JSON
+
+        Called by: _resume()
+        """
+        self.in_missing_data = state['in_missing_data']
+        self.night_start = state['night_start']
+        self.out_buffer = [self._from_json(fields)
+                           for fields in state['pending']]
+        self.ready = []
+        self.last_day = state['last_day'] and \
+            date.fromisoformat(state['last_day'])
+
+    def _write_checkpoint(self) -> None:
+        """
+        Replace the checkpoint file, so a crash leaves the old one whole
+
+        Called by: records()
+        """
+        self.checkpoint['emitted'] = len(self.emitted)
+        self.checkpoint['emitted_sha256'] = self._lines_hash(self.emitted)
+        self._replace_checkpoint_file()
+
+    def _replace_checkpoint_file(self) -> None:
+        """
+        Called by: _write_checkpoint(), ChangedWeeksExtract.records()
+        """
+        temp_name = self.checkpoint_name + '.tmp'
+        with open(temp_name, 'w') as checkpoint_file:
+            json.dump(self.checkpoint, checkpoint_file)
+        os.replace(temp_name, self.checkpoint_name)
+
+    @staticmethod
+    def _lines_hash(records: list) -> str:
+        """
+        Called by: records(), _write_checkpoint()
+        """
+        hasher = hashlib.sha256()
+        for record in records:
+            hasher.update(record.line().encode() + b'\n')
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _to_json(record: Union[WeekHeader, DayHeader, Event]) -> list:
+        """
+        Called by: _state()
+        """
+        if isinstance(record, WeekHeader):
+            return ['week', record.sunday.isoformat()]
+        if isinstance(record, DayHeader):
+            return ['day', record.dt_date.isoformat()]
+        return ['event', *record]
+
+    @staticmethod
+    def _from_json(fields: list) -> Union[WeekHeader, DayHeader, Event]:
+        """
+        Called by: _restore_state()
+        """
+        kind, *values = fields
+        if kind == 'week':
+            return WeekHeader(date.fromisoformat(values[0]))
+        if kind == 'day':
+            return DayHeader(date.fromisoformat(values[0]))
+        return Event(*values)
+
+
+class ChangedWeeksExtract(IncrementalExtract):
+    """
+    Extract, for a .csv file in which any week may have been edited since
+    the last run: yield only the records of the weeks added or changed,
+    and of the nights next to them whose completeness depends on them.
+
+    The .csv file is split into blocks of lines, each starting at a line
+    whose first field is a Sunday's date; the first block also holds any
+    lines before that. After a run, the store file holds, for each block
+    in order:
+        sunday -- its Sunday's date, the block's key
+        sha256 -- a hash of its lines
+        previous -- the key of the block before it
+        state -- Extract's incomplete-night state at the block's start,
+                 as in IncrementalExtract's checkpoint; None if a week
+                 was open there
+
+    The next run hashes each block, and notes in self.changes (and logs)
+    the weeks added, changed, and deleted since the store was written.
+    A block whose hash and previous block are as stored is unchanged,
+    and is skipped. Parsing starts at each other block, from its stored
+    state if it has one to trust, else from that of an earlier unchanged
+    block: the blocks between are parsed without yielding their records.
+    Parsing goes on, yielding records, until an unchanged block's stored
+    state matches the parser's; from there, the file parses as it did
+    last time. Each run of yielded records that starts with an Event is
+    preceded by context headers, as in IncrementalExtract.
+
+    With no store, every week is added: this is a full run. Deleted
+    weeks are only reported; their records were yielded before.
+    """
+    def __init__(self, infile: BinaryIO, store_name: str) -> None:
+        """infile: open for binary read"""
+        super().__init__(infile, store_name)
+        self.changes = {'added': [], 'changed': [], 'deleted': []}
+        self.store = []  # the new store's entries
+        self.in_week = False
+
+    def records(self):
+        """
+        Yield week and day headers, and events, as Extract.records()
+        does, for the blocks that changed; then write the new store
+
+        Called by: lines_in_weeks_out(), client code
+        """
+        self._restart()
+        blocks = self._split_into_blocks(self.infile.read())
+        stored = self._read_store()
+        if len({sunday for sunday, _, _ in blocks}) < len(blocks):
+            read_logger.warning('A Sunday starts two weeks: full run')
+            stored = {}
+        self._note_changes(blocks, stored)
+        parsing = False
+        synced = 0  # blocks[synced:ix] are unchanged, and were skipped
+        context_day = None
+        for ix, (sunday, sha256, data) in enumerate(blocks):
+            previous = blocks[ix - 1][0] if ix else None
+            entry = stored.get(sunday)
+            unchanged = entry is not None and entry['sha256'] == sha256 \
+                and entry['previous'] == previous
+            if parsing and unchanged and entry['state'] is not None and \
+                    self._block_state() == entry['state']:
+                parsing = False  # converged
+                synced = ix
+            if not parsing:
+                if unchanged:
+                    self.store.append(entry)
+                    continue
+                start = self._start_parsing(blocks, synced, ix, stored)
+                for silent_ix in range(start, ix):
+                    for _ in self._parse_block(blocks[silent_ix][2]):
+                        pass
+                parsing = True
+                context_day = self.last_day
+            self.store.append({'sunday': sunday, 'sha256': sha256,
+                               'previous': previous,
+                               'state': self._block_state()})
+            for record in self._parse_block(data):
+                if context_day is not None:
+                    if isinstance(record, Event):
+                        yield from self._context_headers(context_day)
+                    context_day = None
+                yield record
+        if parsing and self.out_buffer:
+            self._handle_leftovers(self.out_buffer)
+            yield from self._take_noted()
+        self.checkpoint = {'version': self.CHECKPOINT_VERSION,
+                           'weeks': self.store}
+        self._replace_checkpoint_file()
+
+    @staticmethod
+    def _split_into_blocks(data: bytes) -> List[Tuple[str, str, bytes]]:
+        """
+        :return: a (sunday, sha256, lines) triple for each block of data
+        Called by: records()
+        """
+        starts = []
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            match_obj = Extract._re_match_date(
+                line.lstrip().split(b',', 1)[0].decode())
+            if match_obj:
+                try:
+                    dt_date = Extract._match_obj_to_date(match_obj)
+                except ValueError:
+                    dt_date = None
+                if Extract._is_a_sunday(dt_date):
+                    starts.append((offset, dt_date.isoformat()))
+            offset += len(line)
+        if not starts:
+            return []
+        blocks = []
+        ends = [start for start, _ in starts[1:]] + [len(data)]
+        for (start, sunday), end in zip(starts, ends):
+            if not blocks:
+                start = 0  # the first block holds any lines before it
+            blocks.append((sunday,
+                           hashlib.sha256(data[start:end]).hexdigest(),
+                           data[start:end]))
+        return blocks
+
+    def _read_store(self) -> dict:
+        """
+        :return: the stored entries, by Sunday; {} if there is no store
+        Called by: records()
+        """
+        store = self._read_checkpoint()
+        if store is None:
+            return {}
+        if 'weeks' not in store:
+            read_logger.warning('%s is not a week store: full run',
+                                self.checkpoint_name)
+            return {}
+        return {entry['sunday']: entry for entry in store['weeks']}
+
+    def _note_changes(self, blocks: list, stored: dict) -> None:
+        """
+        Called by: records()
+        """
+        sundays = {sunday: sha256 for sunday, sha256, _ in blocks}
+        for sunday, sha256, _ in blocks:
+            if sunday not in stored:
+                self.changes['added'].append(sunday)
+            elif stored[sunday]['sha256'] != sha256:
+                self.changes['changed'].append(sunday)
+        self.changes['deleted'] = [sunday for sunday in stored
+                                   if sunday not in sundays]
+        for change, sundays in self.changes.items():
+            if sundays:
+                read_logger.info('Weeks %s: %s', change, ', '.join(sundays))
+
+    def _start_parsing(self, blocks: list, synced: int, ix: int,
+                       stored: dict) -> int:
+        """
+        Restore the state of the latest block in blocks[synced:ix + 1]
+        that has a stored state to trust; reset it if there is none.
+
+        :return: the index of that block
+        Called by: records()
+        """
+        for start in range(ix, synced - 1, -1):
+            sunday = blocks[start][0]
+            entry = stored.get(sunday)
+            if entry is not None and entry['state'] is not None and \
+                    entry['previous'] == (blocks[start - 1][0] if start
+                                          else None):
+                self._restore_state(entry['state'])
+                self.in_week = False
+                return start
+        self._restart()
+        self.in_week = False
+        return 0
+
+    def _block_state(self) -> Optional[dict]:
+        """
+        :return: the state at the start of a block; None in a week
+        Called by: records()
+        """
+        return None if self.in_week else self._state(self.out_buffer)
+
+    def _parse_block(self, data: bytes):
+        """
+        :yield: the records of the complete nights that data completes
+        Called by: records()
+        """
+        out_buffer = self.out_buffer
+        for line in data.splitlines(keepends=True):
+            self.in_week = self._read_line(line.decode(), self.in_week,
+                                           out_buffer)
+            if self.ready:
+                yield from self._take_noted()
+
+
+class MappedExtract(Extract):
+    """
+    Extract, reading the bytes of the .csv file through mmap, and only
+    the lines of its weeks.
+
+    The week index holds the byte offset of each line that starts with a
+    Sunday's date. It is kept in a sidecar JSON file, with the size and
+    modification time of the .csv file it was built for, and rebuilt
+    when either changes. Each week is read from its offset to the line
+    that ends it, so the lines between weeks are never looked at. A
+    blank line is recognised in the mapped bytes without being copied,
+    and of a non-blank line only the fields of non-empty segments are
+    decoded. The output is the same as Extract's.
+
+    With since or until, only the nights that start in that range are
+    yielded (see src/date_range.py), and only the weeks around them are
+    read. The weeks read start before the range, at the last week with
+    a 'b' Event in it, so the incomplete-night state is as a full run's
+    by the range's first night; they end once the night after the range
+    has started, so the last night in range is known to be complete or
+    not.
+    """
+    INDEX_VERSION = 1
+    SPACE = rb'[ \t\r\x0b\x0c]*'
+    # a line whose first 22 fields are empty
+    BLANK_LINE = re.compile(SPACE + rb'(?:(?:,' + SPACE + rb'){0,21}|(?:,' +
+                            SPACE + rb'){21},[^\n]*)')
+    DATE_LINE = re.compile(rb'^' + SPACE + rb'(\d{1,2})/(\d{1,2})/(\d{4})',
+                           re.MULTILINE)
+    B_EVENT = re.compile(rb',' + SPACE + rb'b')
+
+    def __init__(self, infile: BinaryIO, index_name: Optional[str] = None,
+                 since: Optional[date] = None,
+                 until: Optional[date] = None) -> None:
+        """
+        infile: open for binary read
+        index_name: the sidecar file; if None, the index is not kept
+        """
+        super().__init__(infile)
+        self.index_name = index_name
+        self.since = since
+        self.until = until
+        self.date_range = DateRange(since, until)
+        self.night_day = None  # the day of the last night started
+
+    @staticmethod
+    def index_name_for(infile_name: str) -> str:
+        """
+        :return: the name of the sidecar file for .csv file infile_name
+        Called by: client code
+        """
+        return infile_name + '.index.json'
+
+    def records(self):
+        """
+        Read the weeks of the .csv file; yield week and day headers, and
+        events, as Extract.records() does
+
+        Called by: lines_in_weeks_out(), client code
+        """
+        size = os.fstat(self.infile.fileno()).st_size
+        if not size:
+            return  # an empty file can't be mapped
+        data = mmap.mmap(self.infile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self.date_range:
+                yield from self.date_range.extract_records(
+                    self._read_weeks(data))
+            else:
+                yield from self._read_weeks(data)
+        finally:
+            data.close()
+
+    def _read_weeks(self, data: mmap.mmap):
+        """
+        :yield: the records of the weeks in data, or of those around the
+                range if there is one
+        Called by: records()
+        """
+        weeks = self._read_index(data)
+        if self.date_range:
+            weeks = self._weeks_around_range(data, weeks)
+        out_buffer = []
+        end = 0
+        for sunday, offset in weeks:
+            if offset < end:
+                continue  # the line is in the week before
+            if self.until and sunday > self.until and \
+                    self.night_day and self.night_day > self.until:
+                break  # the last night in range is decided
+            self.new_week = Week.starting(sunday)
+            end = self._read_week(data, offset, out_buffer)
+            if self.ready:
+                yield from self._take_ready()
+        if end < len(data):  # as Extract, on the next line
+            self.new_week = None
+        # handle any data left in buffer
+        if out_buffer:
+            self._handle_leftovers(out_buffer)
+            yield from self._take_ready()
+
+    def _weeks_around_range(self, data: mmap.mmap,
+                            weeks: List[Tuple[date, int]]) -> \
+            List[Tuple[date, int]]:
+        """
+        :return: weeks from the last week before the range with a 'b'
+                 Event in it, or from the first week if there is none
+        Called by: _read_weeks()
+        """
+        if not self.since:
+            return weeks
+        first_sunday = self.since - datetime.timedelta(days=self.SUNDAY)
+        start = next((ix for ix, (sunday, _) in enumerate(weeks)
+                      if sunday >= first_sunday), len(weeks))
+        while start > 0:
+            start -= 1
+            week_end = weeks[start + 1][1] if start + 1 < len(weeks) \
+                else len(data)
+            if self.B_EVENT.search(data, weeks[start][1], week_end):
+                break
+        return weeks[start:]
+
+    def _write_or_discard_night(self, action_b_event: Event,
+                                datetime_date: date,
+                                out_buffer: list) -> None:
+        """
+        As Extract._write_or_discard_night(), noting the night's day
+
+        Called by: _manage_output_buffer()
+        """
+        super()._write_or_discard_night(action_b_event, datetime_date,
+                                        out_buffer)
+        self.night_day = datetime_date
+
+    def _read_week(self, data: mmap.mmap, pos: int, out_buffer: list) -> int:
+        """
+        Read the lines of self.new_week, which start at data[pos:]
+
+        :return: the offset of the line after the week's last line
+        Called by: records()
+        """
+        size = len(data)
+        in_week = True
+        while in_week and pos < size:
+            end = data.find(b'\n', pos)
+            if end < 0:
+                end = size
+            if self.BLANK_LINE.fullmatch(data, pos, end):
+                self.line_as_list = []
+            else:  # fields as bytes, for _get_events()
+                self.line_as_list = data[pos:end].split(b',', 22)[:22]
+            in_week = self._handle_week(out_buffer)
+            pos = end + 1
+        return pos
+
+    def _get_events(self) -> bool:
+        """
+        As Extract._get_events(), for a line whose fields are bytes: a
+        segment of empty fields is skipped before anything is decoded
+
+        Called by: _handle_week()
+        """
+        fields = self.line_as_list
+        have_events = False
+        for ix in range(7):
+            segment = fields[3 * ix + 1: 3 * ix + 4]
+            if len(segment) == 3 and not any(segment):
+                continue
+            segment = [field.strip().decode() for field in segment]
+            have_events = self._add_event(ix, segment) or have_events
+        return have_events
+
+    def _read_index(self, data: mmap.mmap) -> List[Tuple[date, int]]:
+        """
+        :return: the (Sunday, offset) pairs of the sidecar file if it was
+                 built for this .csv file, else those of a new index
+        Called by: records()
+        """
+        stat = os.fstat(self.infile.fileno())
+        built_for = {'version': self.INDEX_VERSION, 'size': stat.st_size,
+                     'mtime_ns': stat.st_mtime_ns}
+        if self.index_name:
+            try:
+                with open(self.index_name) as index_file:
+                    index = json.load(index_file)
+                if all(index.get(key) == value
+                       for key, value in built_for.items()):
+                    return [(date.fromisoformat(sunday), offset)
+                            for sunday, offset in index['weeks']]
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                read_logger.warning('Week index %s unreadable: rebuilt',
+                                    self.index_name)
+        weeks = self._build_index(data)
+        if self.index_name:
+            temp_name = self.index_name + '.tmp'
+            try:
+                with open(temp_name, 'w') as index_file:
+                    json.dump({**built_for, 'weeks': [
+                        [sunday.isoformat(), offset]
+                        for sunday, offset in weeks]}, index_file)
+                os.replace(temp_name, self.index_name)
+            except OSError as err:
+                read_logger.warning('Week index not saved: %s', err)
+        return weeks
+
+    def _build_index(self, data: mmap.mmap) -> List[Tuple[date, int]]:
+        """
+        :return: a (Sunday, offset) pair for each line of data that starts
+                 with a Sunday's date
+        Called by: _read_index()
+        """
+        weeks = []
+        for match_obj in self.DATE_LINE.finditer(data):
+            month, day, year = map(int, match_obj.groups())
+            try:
+                dt_date = date(year, month, day)
+            except ValueError:
+                continue
+            if self._is_a_sunday(dt_date):
+                weeks.append((dt_date, match_obj.start()))
+            else:
+                read_logger.warning('Non-Sunday date %s found in input',
+                                    dt_date)
+        return weeks
+
+
+class _WeekCollector(Extract):
+    """ Collect each finished Week, instead of writing it to out_buffer """
+    def __init__(self) -> None:
+        super().__init__(None)
+        self.weeks = []
+
+    def _manage_output_buffer(self, out_buffer: list) -> None:
+        if self.new_week:
+            self.weeks.append(self.new_week)
+
+
+def _parse_chunk(lines: list) -> Tuple[List[Week], Optional[Week]]:
+    """
+    Runs in a worker process. Weeks pickle compactly: each sends its
+    EventColumns as four byte strings.
+
+    :return: the Weeks that end in lines, and the Week (if any) that is
+             still open at the end of lines
+    Called by: ParallelExtract.records()
+    """
+    collector = _WeekCollector()
+    in_week = False
+    for line in lines:
+        in_week = collector._read_line(line, in_week, [])
+    return collector.weeks, collector.new_week
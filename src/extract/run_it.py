@@ -15,43 +15,68 @@ read_fns() reads raw data from the spreadsheet, and groups it by day and week.
 # import sys
 import argparse
 import logging
-import logging.handlers
+import sys
 
 # import container_objs
 import read_fns
+from src import date_range
+from src.binary_records import write_records
+from src.log_setup import start_stage_logging
 from tests.file_access_wrappers import FileReadAccessWrapper
 
 
-def set_up_loggers():
-    # from: https://docs.python.org/3/howto/
-    # logging-cookbook.html#network-logging
-    root_logger = logging.getLogger('')
-    root_logger.setLevel(logging.INFO)
-    socket_handler = logging.handlers.SocketHandler('localhost',
-                                                    logging.handlers.
-                                                    DEFAULT_TCP_LOGGING_PORT)
-    # don't bother with a formatter, since a socket handler sends the event as
-    # an unformatted pickle
-    root_logger.addHandler(socket_handler)
-
-    # read_logger will need a formatter since it is writing to file
-    read_logger = logging.getLogger('extract.read_fns')
-    read_logger.setLevel(logging.DEBUG)
-    file_handler = logging.FileHandler('src/extract/read_fns.log', mode='w')
-    formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    read_logger.addHandler(file_handler)
-    read_logger.propagate = False
-
-
 if __name__ == '__main__':
-    set_up_loggers()
+    start_stage_logging('extract.read_fns', 'src/extract/read_fns.log')
     logging.info('extract start')
     parser = argparse.ArgumentParser()
     parser.add_argument('infile_name', help='The name of a .csv file to read')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='parse the .csv file in this many processes')
+    parser.add_argument('--binary', action='store_true',
+                        help='write binary records instead of text')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--checkpoint',
+                       help='write only records newer than this '
+                            'checkpoint file, then update it')
+    modes.add_argument('--changes',
+                       help='write only the records of weeks changed '
+                            'since this week store was written, then '
+                            'update it')
+    modes.add_argument('--mmap', action='store_true',
+                       help='read the .csv file through mmap, with its '
+                            'week index in INFILE_NAME.index.json')
+    date_range.add_arguments(parser)
     args = parser.parse_args()
-    infile = read_fns.open_infile(FileReadAccessWrapper(args.infile_name))
-    extract = read_fns.Extract(infile)
-    extract.lines_in_weeks_out()
+    ranged = bool(args.since or args.until)  # read through mmap
+    if (args.checkpoint or args.changes) and ranged:
+        parser.error('--since and --until do not combine with --checkpoint '
+                     'or --changes')
+    if (args.checkpoint or args.changes or args.mmap or ranged) and \
+            args.jobs > 1:
+        parser.error('--checkpoint, --changes, --mmap, --since, and --until '
+                     'run in one process: omit --jobs')
+    if args.mmap or ranged:
+        infile = open(args.infile_name, 'rb')
+        extract = read_fns.MappedExtract(
+            infile, read_fns.MappedExtract.index_name_for(args.infile_name),
+            args.since, args.until)
+    elif args.checkpoint:
+        infile = open(args.infile_name, 'rb')
+        extract = read_fns.IncrementalExtract(infile, args.checkpoint)
+    elif args.changes:
+        infile = open(args.infile_name, 'rb')
+        extract = read_fns.ChangedWeeksExtract(infile, args.changes)
+    elif args.jobs > 1:
+        infile = read_fns.open_infile(FileReadAccessWrapper(args.infile_name))
+        extract = read_fns.ParallelExtract(infile, args.jobs)
+    else:
+        infile = read_fns.open_infile(FileReadAccessWrapper(args.infile_name))
+        extract = read_fns.Extract(infile)
+    if args.binary:
+        write_records(extract.records(), sys.stdout.buffer)
+    else:
+        extract.lines_in_weeks_out()
+    if args.changes:
+        logging.info('weeks added %d, changed %d, deleted %d',
+                     *map(len, extract.changes.values()))
     logging.info('extract finish')
@@ -0,0 +1,174 @@
+# file: src/load/bulk_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Load Night and Nap records with COPY ... FROM STDIN instead of one
+sl_insert_night() / sl_insert_nap() call per line.
+
+Every record is streamed into a temporary staging table with a
+single COPY. Nights then take their ids from sl_night_night_id_seq in
+input order, and all naps are linked to their nights by one set-based
+INSERT. The rows that end up in sl_night and sl_nap are the same as
+those written by the server functions.
+"""
+
+import logging
+
+from src.records import Night
+
+
+bulk_logger = logging.getLogger('load.bulk_load')
+
+STAGE_COLUMNS = ('line_no', 'night_seq', 'is_night', 'start_date',
+                 'start_time', 'start_no_data', 'end_no_data', 'duration')
+
+CREATE_STAGE = '''
+    CREATE TEMP TABLE sl_load_stage (
+        line_no integer NOT NULL,
+        night_seq integer NOT NULL,
+        is_night boolean NOT NULL,
+        start_date date,
+        start_time time NOT NULL,
+        start_no_data boolean,
+        end_no_data boolean,
+        duration interval hour to minute
+    ) ON COMMIT DROP
+'''
+
+COPY_STAGE = 'COPY sl_load_stage ({}) FROM STDIN'.format(
+    ', '.join(STAGE_COLUMNS))
+
+# nextval() is called in input order, as sl_insert_night() would call it
+NUMBER_NIGHTS = '''
+    CREATE TEMP TABLE sl_night_ids ON COMMIT DROP AS
+    SELECT night_seq, nextval('sl_night_night_id_seq') AS night_id
+    FROM (SELECT night_seq FROM sl_load_stage
+          WHERE is_night ORDER BY night_seq) AS ordered
+'''
+
+INSERT_NIGHTS = '''
+    INSERT INTO sl_night (night_id, start_date, start_time,
+                          start_no_data, end_no_data)
+    SELECT i.night_id, s.start_date, s.start_time,
+           s.start_no_data, s.end_no_data
+    FROM sl_load_stage s JOIN sl_night_ids i USING (night_seq)
+    WHERE s.is_night
+    ORDER BY i.night_id
+'''
+
+INSERT_NAPS = '''
+    INSERT INTO sl_nap (start_time, duration, night_id)
+    SELECT s.start_time, s.duration, i.night_id
+    FROM sl_load_stage s JOIN sl_night_ids i USING (night_seq)
+    WHERE NOT s.is_night
+    ORDER BY s.line_no
+'''
+
+NULL = '\\N'  # COPY text format null
+
+
+def is_true(flag):
+    """
+    :param flag: a no-data flag: 'true' or 'false' as parsed from a
+                 line, or a bool in a record made in process
+    Called by: stage_rows()
+    """
+    return str(flag).lower() == 'true'
+
+
+def stage_rows(records, counts, to_interval):
+    """
+    Turn Night and Nap records into COPY rows for sl_load_stage.
+
+    Each nap gets the night_seq of the most recent night; a nap before
+    any night is skipped, since sl_insert_nap() could not find a night
+    for it either. A night with both no-data flags set is skipped, with
+    the naps after it, as sl_insert_night() skips the row that fails
+    sl_night's CHECK, and sl_insert_nap() then finds no night.
+
+    :param records: an iterable of Night and Nap records
+    :param counts: a dict; its 'nights' and 'naps' are updated
+    :param to_interval: converts a decimal duration to an interval
+    :yield: one tab-separated, newline-terminated row per night or nap
+    Called by: bulk_load()
+    """
+    night_seq = 0
+    night_stored = False
+    counts.setdefault('nights', 0)
+    counts.setdefault('naps', 0)
+    for line_no, record in enumerate(records):
+        if isinstance(record, Night):
+            night_stored = not (is_true(record.start_no_data) and
+                                is_true(record.end_no_data))
+            if not night_stored:
+                bulk_logger.warning('NIGHT %s has both no-data flags set; '
+                                    'skipped', record)
+                continue
+            night_seq += 1
+            counts['nights'] += 1
+            row = [line_no, night_seq, 't', *record, NULL]
+        elif night_stored:
+            counts['naps'] += 1
+            row = [line_no, night_seq, 'f', NULL, record.start_time, NULL,
+                   NULL, to_interval(record.duration)]
+        else:
+            bulk_logger.warning('NAP %s has no NIGHT; skipped', record)
+            continue
+        yield '\t'.join(str(field) for field in row) + '\n'
+
+
+class CopySource:
+    """
+    A read-only file-like object over an iterator of strings, so COPY
+    can stream rows without the whole input being held in memory.
+    """
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.pending = ''
+
+    def read(self, size=-1):
+        """Called by: psycopg2 cursor.copy_expert()"""
+        chunks = [self.pending]
+        have = len(self.pending)
+        for row in self.rows:
+            chunks.append(row)
+            have += len(row)
+            if 0 <= size <= have:
+                break
+        data = ''.join(chunks)
+        if size < 0:
+            self.pending = ''
+            return data
+        self.pending = data[size:]
+        return data[:size]
+
+
+def bulk_load(connection, records, to_interval):
+    """
+    Stage records with COPY, then insert nights and naps set-wise.
+
+    Runs inside the caller's transaction; the staging tables are
+    dropped when it commits.
+
+    :param connection: an open SQLAlchemy connection
+    :param records: an iterable of Night and Nap records
+    :param to_interval: converts a decimal duration to an interval
+    :return: a dict holding the counts of nights and naps loaded
+    Called by: load_records()
+    """
+    counts = {}
+    connection.execute(CREATE_STAGE)
+    cursor = connection.connection.cursor()
+    try:
+        rows = stage_rows(records, counts, to_interval)
+        cursor.copy_expert(COPY_STAGE, CopySource(rows))
+    finally:
+        cursor.close()
+    connection.execute(NUMBER_NIGHTS)
+    connection.execute(INSERT_NIGHTS)
+    connection.execute(INSERT_NAPS)
+    bulk_logger.info('bulk loaded %s nights, %s naps',
+                     counts['nights'], counts['naps'])
+    return counts
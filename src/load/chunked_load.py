@@ -0,0 +1,223 @@
+# file: src/load/chunked_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Load Night and Nap records in chunks of nights, each committed in a
+transaction of its own, so that a failed load can resume where it left
+off.
+
+With each chunk, the same transaction writes a mark to sl_load_mark,
+keyed by the name of the input (its source): of the last night
+committed, its date, its night_id, and the records read from the input
+before it. Nights with both no-data flags set are never stored (they
+fail sl_night's CHECK), so they are passed over for the mark. Once a
+chunk is committed, so is its mark. A later load from the same source
+skips that many records and checks that the next is a night with the
+mark's date; if it is not, the input has changed, and the load stops
+rather than store nights twice.
+
+The last night committed is not taken as done: the input may since
+have grown by naps of that night, or its no-data flags may have been
+filled in. So the load goes on from that night, and the transaction of
+its first chunk deletes the row with the mark's night_id, with its
+naps, before storing the night again; a night of the same date stored
+by another source or load is left alone. The night_id is found as the
+chunk is committed, among the rows its own transaction inserted. A load
+that finishes leaves its mark too, so loading the source again stores
+only its last night and the records added since.
+
+To start again from the beginning, forget the source's mark (and
+delete what it stored).
+"""
+
+import itertools
+import logging
+
+from src.records import Night
+
+
+chunked_logger = logging.getLogger('load.chunked_load')
+
+CHUNK_NIGHTS = 1000  # default nights per transaction
+
+CREATE_MARKS = '''
+    CREATE TABLE IF NOT EXISTS sl_load_mark (
+        source text PRIMARY KEY,
+        last_date date NOT NULL,
+        records integer NOT NULL,
+        night_id integer,
+        updated timestamp NOT NULL DEFAULT now()
+    )
+'''
+
+READ_MARK = '''
+    SELECT last_date, records, night_id FROM sl_load_mark WHERE source = %s
+'''
+
+WRITE_MARK = '''
+    INSERT INTO sl_load_mark (source, last_date, records, night_id)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (source) DO UPDATE
+    SET last_date = EXCLUDED.last_date, records = EXCLUDED.records,
+        night_id = EXCLUDED.night_id, updated = now()
+'''
+
+FORGET_MARK = 'DELETE FROM sl_load_mark WHERE source = %s'
+
+# the night inserted by this transaction: xmin is the inserting xid,
+# which is txid_current() without its epoch
+MARKED_NIGHT_ID = '''
+    SELECT max(night_id) FROM sl_night
+    WHERE start_date = %s AND start_time = %s
+      AND xmin::text = (txid_current() % 4294967296)::text
+'''
+
+DELETE_MARKED_NAPS = 'DELETE FROM sl_nap WHERE night_id = %s'
+
+DELETE_MARKED_NIGHT = 'DELETE FROM sl_night WHERE night_id = %s'
+
+
+class MarkMismatchError(ValueError):
+    """ The input does not match the mark of an earlier load """
+
+
+def chunks(records, nights):
+    """
+    :param records: Night and Nap records, in input order
+    :param nights: the most nights in a chunk
+    :yield: lists of consecutive records holding up to nights nights;
+            each list after the first starts with a Night, and the first
+            holds any naps before the first Night along with it
+    Called by: store_in_chunks()
+    """
+    chunk = []
+    chunk_nights = 0
+    for record in records:
+        if isinstance(record, Night):
+            if chunk_nights == nights:
+                yield chunk
+                chunk, chunk_nights = [], 0
+            chunk_nights += 1
+        chunk.append(record)
+    if chunk:
+        yield chunk
+
+
+def last_night(records):
+    """
+    :return: the index in records of the last Night that can be stored,
+             and the Night, or (None, None) if there is none; a Night
+             with both no-data flags set cannot
+    Called by: store_in_chunks()
+    """
+    for index in range(len(records) - 1, -1, -1):
+        record = records[index]
+        if isinstance(record, Night) and not (
+                str(record.start_no_data).lower() == 'true' and
+                str(record.end_no_data).lower() == 'true'):
+            return index, record
+    return None, None
+
+
+def skip_to_mark(records, source, last_date, count):
+    """
+    Read the count records before the night an earlier load from source
+    committed last
+
+    :param records: an iterator over the input's records
+    :return: an iterator over the records from that night on
+    :raise MarkMismatchError: if the record after those skipped is not
+                              a Night starting on last_date
+    Called by: store_in_chunks()
+    """
+    skipped = sum(1 for _ in itertools.islice(records, count))
+    night = next(records, None)
+    found = night.start_date if isinstance(night, Night) else None
+    if skipped < count or str(found) != str(last_date):
+        raise MarkMismatchError(
+            'input {} does not match its load mark: night {} at record {} '
+            'was expected, {} was found'.format(
+                source, last_date, count,
+                'night {}'.format(found) if found is not None else
+                'no night'))
+    return itertools.chain([night], records)
+
+
+def read_mark(connection, source):
+    """
+    :return: the (last_date, records, night_id) mark for source, or
+             None
+    Called by: store_in_chunks(), client code
+    """
+    connection.execute(CREATE_MARKS)
+    return connection.execute(READ_MARK, source).first()
+
+
+def forget_mark(engine, source):
+    """
+    Delete the mark for source, so its next load starts from the
+    beginning
+
+    Called by: load.store_records(), client code
+    """
+    with engine.begin() as connection:
+        connection.execute(CREATE_MARKS)
+        connection.execute(FORGET_MARK, source)
+
+
+def store_in_chunks(engine, records, load_records, source,
+                    nights=CHUNK_NIGHTS, bulk=False):
+    """
+    Load records into the db, committing every nights nights, from the
+    mark of the last load from source on
+
+    :param engine: the db engine
+    :param records: Night and Nap records, from the transform stage
+    :param load_records: loads records on a connection, as
+                         load.load_records()
+    :param source: the name the input's mark is kept under
+    :param nights: the nights in each transaction
+    :param bulk: if True, load with COPY rather than record by record
+    :return: the number of records stored by this load, counting those
+             of the marked night, which is stored again
+    :raise MarkMismatchError: if the input does not match the mark
+    Called by: load.store_records()
+    """
+    records = iter(records)
+    stored = 0
+    with engine.connect() as connection:
+        mark = read_mark(connection, source)
+        last_date, offset, night_id = mark if mark else (None, 0, None)
+        if mark:
+            records = skip_to_mark(records, source, last_date, offset)
+            chunked_logger.info('resuming %s from night %s, record %s',
+                                source, last_date, offset)
+        reloading = bool(mark)
+        for chunk in chunks(records, nights):
+            index, night = last_night(chunk)
+            try:
+                with connection.begin():
+                    if reloading:
+                        connection.execute(DELETE_MARKED_NAPS, night_id)
+                        connection.execute(DELETE_MARKED_NIGHT, night_id)
+                    load_records(connection, chunk, bulk)
+                    if night is not None:
+                        last_date = night.start_date
+                        night_id = connection.execute(
+                            MARKED_NIGHT_ID, str(night.start_date),
+                            night.start_time).scalar()
+                        connection.execute(WRITE_MARK, source, last_date,
+                                           offset + index, night_id)
+            except Exception:
+                chunked_logger.error('load of %s failed after record %s; '
+                                     'the next load resumes from the last '
+                                     'night committed', source, offset)
+                raise
+            reloading = False
+            offset += len(chunk)
+            stored += len(chunk)
+            chunked_logger.info('committed %s through night %s, record %s',
+                                source, last_date, offset)
+    return stored
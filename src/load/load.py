@@ -5,13 +5,39 @@
 # 2017-02-20
 
 
+import argparse
 import logging
-import logging.handlers
 import fileinput
+from collections import namedtuple
 from sqlalchemy import create_engine, func
+from sqlalchemy.engine.url import make_url
 import os
 import sys
 
+from src import binary_records, date_range
+from src.load.bulk_load import bulk_load
+from src.load.chunked_load import CHUNK_NIGHTS, forget_mark, store_in_chunks
+from src.load.parallel_load import store_in_parallel
+from src.load.pipelined_load import BATCH_SIZE, QUEUE_DEPTH, store_pipelined
+from src.load.sqlite_load import BATCH_SIZE as SQLITE_BATCH_SIZE
+from src.load.sqlite_load import SqliteBackend
+from src.load.upsert_load import store_upserting
+from src.log_setup import start_stage_logging
+from src.records import Night, Nap
+
+
+load_logger = logging.getLogger('load.load')
+
+POOL_SIZE = 5  # SQLAlchemy's default connection pool size
+
+# How store_records() loads: the fields are as its docstring says
+LoadOptions = namedtuple('LoadOptions', ['bulk', 'jobs', 'two_phase',
+                                         'chunk_nights', 'source', 'upsert',
+                                         'batch_size', 'queue_depth',
+                                         'sqlite_batch'],
+                         defaults=[False, 1, False, 0, None, False, 0,
+                                   QUEUE_DEPTH, 0])
+
 
 def decimal_to_interval(dec_str):
     """
@@ -25,34 +51,169 @@ def decimal_to_interval(dec_str):
     try:
         mins = dec_mins_to_mins[dec_mins]
     except KeyError:
-        logging.warning('Value for dec_mins {} not found in '
-                        'decimal_to_interval()'.format(dec_mins))
+        logging.warning('Value for dec_mins %s not found in '
+                        'decimal_to_interval()', dec_mins)
     interval_str = '{}:{}'.format(hrs, mins)
     return interval_str
 
 
-def read_nights_naps(engine, infile_name):
+def read_nights_naps(backend, infile_name, options=LoadOptions(),
+                     binary=False, night_range=None):
     """
     Read NIGHT and NAP data from infile_name;
     call function to load that data into database.
 
-    :param engine: the db engine
+    :param backend: stores the data, as PostgresBackend
     :param infile_name: read data from file or stdin
+    :param options: a LoadOptions, as for store_records(); its source,
+                    if None, is as mark_source() gives it
+    :param binary: if True, read binary records rather than lines
+    :param night_range: if given, a DateRange: load only the nights in it
     :return: None
     Called by: connect()
     """
-    with fileinput.input(infile_name) as data_source:
-        connection = engine.connect()
-        trans = connection.begin()
-        try:
-            keep_going = True
-            while keep_going:
-                my_line = data_source.readline()
-                keep_going = store_nights_naps(connection, my_line)
-            trans.commit()
-        except Exception:
-            trans.rollback()
-            raise
+    options = options._replace(source=mark_source(infile_name,
+                                                  options.source))
+
+    def store(records):
+        if night_range:
+            records = night_range.night_naps(records)
+        backend.store(records, options)
+
+    if not binary:
+        with fileinput.input(infile_name) as data_source:
+            store(read_records(data_source))
+    elif infile_name == '-':
+        store(binary_records.read_records(sys.stdin.buffer))
+    else:
+        with open(infile_name, 'rb') as data_source:
+            store(binary_records.read_records(data_source))
+
+
+def mark_source(infile_name, source=None):
+    """
+    :return: the name to keep a chunked load's mark under: source if
+             given, else infile_name, unless that is '-' for stdin,
+             which names no input in particular
+    Called by: read_nights_naps(), connect()
+    """
+    if source:
+        return source
+    return None if infile_name == '-' else infile_name
+
+
+def store_records(engine, records, options=LoadOptions()):
+    """
+    Load records into the db, all or nothing, or in resumable chunks
+
+    :param engine: the db engine
+    :param records: Night and Nap records, from the transform stage
+    :param options: a LoadOptions, whose fields are:
+        bulk: if True, load with COPY rather than record by record
+        jobs: if more than 1, load date-range partitions of records on
+              this many connections at once (see
+              src/load/parallel_load.py)
+        two_phase: with jobs, commit by two-phase commit
+        chunk_nights: if given, commit every chunk_nights nights,
+                      resuming from the last load from source (see
+                      src/load/chunked_load.py)
+        source: with chunk_nights, the name of the input; required
+        upsert: if True, skip the nights already in the db, and update
+                those changed (see src/load/upsert_load.py)
+        batch_size: if given, parse records in a thread of their own,
+                    sending them to the db batch_size at a time (see
+                    src/load/pipelined_load.py)
+        queue_depth: with batch_size, the most batches parsed ahead
+        sqlite_batch: unused here; for sqlite_load.SqliteBackend, the
+                      rows in each executemany() call
+    :return: None
+    :raise ValueError: if chunk_nights is given without source
+    Called by: PostgresBackend.store(), client code
+    """
+    if options.chunk_nights and not options.source:
+        raise ValueError('a chunked load keeps its mark under the name of '
+                         'its input: give a source')
+    if options.batch_size:
+        store_pipelined(engine, records, decimal_to_interval,
+                        options.batch_size, options.queue_depth)
+    elif options.upsert:
+        store_upserting(engine, records, load_records, decimal_to_interval,
+                        options.bulk)
+    elif options.chunk_nights:
+        store_in_chunks(engine, records, load_records, options.source,
+                        options.chunk_nights, options.bulk)
+    elif options.jobs > 1:
+        store_in_parallel(engine, records, load_records, options.jobs,
+                          options.bulk, options.two_phase)
+    else:
+        store_in_transaction(engine, records, options.bulk)
+
+
+def store_in_transaction(engine, records, bulk=False):
+    """
+    Load records into the db in a single transaction
+
+    :param engine: the db engine
+    :param records: Night and Nap records, from the transform stage
+    :param bulk: if True, load with COPY rather than record by record
+    :return: None
+    Called by: store_records(), client code
+    """
+    connection = engine.connect()
+    trans = connection.begin()
+    try:
+        load_records(connection, records, bulk)
+        trans.commit()
+    except Exception:
+        trans.rollback()
+        raise
+
+
+def read_records(data_source):
+    """
+    Parse lines from the transform stage, up to the first line that
+    is neither a NIGHT nor a NAP
+
+    :yield: a Night or Nap record
+    Called by: read_nights_naps()
+    """
+    for my_line in data_source:
+        record = parse_line(my_line)
+        if record is None:
+            return
+        yield record
+
+
+def parse_line(my_line):
+    """
+    :return: a Night or Nap record, or None if my_line holds neither
+    Called by: read_records(), store_nights_naps()
+    """
+    line_list = my_line.rstrip().split(', ')
+    if line_list[0] == 'NIGHT':
+        return Night(*line_list[1:])
+    if line_list[0] == 'NAP':
+        return Nap(*line_list[1:])
+    return None
+
+
+def load_records(connection, records, bulk=False):
+    """
+    Insert Night and Nap records into the db
+
+    :param connection: an open db connection
+    :param records: Night and Nap records, from the transform stage
+    :param bulk: if True, load with COPY rather than record by record
+    :return: None
+    Called by: store_in_transaction(), parallel_load.store_in_parallel(),
+               chunked_load.store_in_chunks(),
+               upsert_load.store_upserting()
+    """
+    if bulk:
+        bulk_load(connection, records, decimal_to_interval)
+    else:
+        for record in records:
+            store_record(connection, record)
 
 
 def store_nights_naps(connection, my_line):
@@ -67,106 +228,209 @@ def store_nights_naps(connection, my_line):
     :param connection: an open db connection
     :param my_line: a line of data from the transform stage
     :return: True if the line was inserted, else False
-    Called by read_nights_naps()
+    Called by: client code
     """
-    success = False
-    line_list = my_line.rstrip().split(', ')
-    if line_list[0] == 'NIGHT':
-        result = connection.execute(
-            func.sl_insert_night(*line_list[1:])
-        )
-        load_logger.debug(result)
-        success = True
-    elif line_list[0] == 'NAP':
+    record = parse_line(my_line)
+    if record is None:
+        return False
+    store_record(connection, record)
+    return True
+
+
+def store_record(connection, record):
+    """
+    Insert a Night into sl_night, or a Nap into sl_nap
+
+    Called by: load_records(), store_nights_naps()
+    """
+    if isinstance(record, Night):
+        result = connection.execute(func.sl_insert_night(*record))
+    else:
         result = connection.execute(
-            func.sl_insert_nap(line_list[1],
-                               decimal_to_interval(line_list[2])
-                               )
+            func.sl_insert_nap(record.start_time,
+                               decimal_to_interval(record.duration))
         )
-        load_logger.debug(result)
-        success = True
-    return success
+    load_logger.debug(result)
 
 
-def connect(url):
+class PostgresBackend:
     """
-    Connect to the PostgreSQL db server;
-    invoke read_nights_naps() to load data from input to db_s_etl.
+    Stores records in PostgreSQL, by the sl_insert_night() and
+    sl_insert_nap() server functions or by any of the load modes of
+    store_records()
 
-    :param url: the db url
-    :return: None
-    Called by: client code
+    A backend is anything with store() and forget_mark() methods that
+    take these arguments; sqlite_load.SqliteBackend is the other.
+    Called by: open_backend(), client code
     """
-    engine = create_engine(url)
+    def __init__(self, url, pool_size=POOL_SIZE):
+        self.engine = create_engine(url, pool_size=pool_size)
 
-    try:
-        # if 'True' is a c.l. arg:
-        #     if a file name is also a c.l. arg:
-        #         read from file name
-        #     else:
-        #         read from stdin
-        sys.argv.remove('True')
-        infile_name = sys.argv[1] if len(sys.argv) > 1 else '-'
-        read_nights_naps(engine, infile_name)
-    except ValueError:
-        pass  # don't touch the db
+    def store(self, records, options=LoadOptions()):
+        """
+        As store_records(), on this backend's engine
+        """
+        store_records(self.engine, records, options)
 
+    def forget_mark(self, source):
+        """
+        As chunked_load.forget_mark(), on this backend's engine
+        """
+        forget_mark(self.engine, source)
 
-def main():
+
+def open_backend(url, jobs=1):
     """
-    Set up root (network) logger and load logger
+    :param url: a postgresql:// url, or sqlite:///<file name>
+    :param jobs: the connections a load may use at once
+    :return: the backend for url's db
+    Called by: connect(), pipeline.run_fused(), client code
+    """
+    if make_url(url).get_backend_name() == 'sqlite':
+        return SqliteBackend(url, decimal_to_interval)
+    return PostgresBackend(url, max(jobs, POOL_SIZE))
+
+
+def get_url():
+    """
+    :return: the url of the sleep db: DB_URL if it is set, else the
+             PostgreSQL db on this host
+    :raise KeyError: if neither DB_URL nor DB_USERNAME and DB_PASSWORD
+                     is set
     Called by: client code
     """
-    setup_network_logger()
-    return setup_load_logger()
+    if 'DB_URL' in os.environ:
+        return os.environ['DB_URL']
+    return 'postgresql://{}:{}@127.0.0.1/sleep'.format(
+            os.environ['DB_USERNAME'], os.environ['DB_PASSWORD'])
 
 
-def setup_network_logger():
+def connect(url, infile_name='-', options=LoadOptions(),
+            binary=False, night_range=None, restart=False):
     """
-    Set up a logger to handle messages from all processes
+    Connect to the db, PostgreSQL or SQLite as url says;
+    invoke read_nights_naps() to load data from input to db_s_etl.
+
+    :param url: the db url
+    :param infile_name: read from this file, or from stdin if '-'
+    :param options: a LoadOptions, as for store_records(); its source,
+                    the name to keep the chunked load's mark under, is
+                    as mark_source() gives it if None
+    :param binary: if True, read binary records rather than lines
+    :param night_range: if given, a DateRange: load only the nights in it
+    :param restart: if True, forget the mark and load from the start
     :return: None
-    Called by: main()
+    Called by: client code
     """
-    # https://docs.python.org/3/howto/logging-cookbook.html#network-logging
-    root_logger = logging.getLogger('')
-    root_logger.setLevel(logging.INFO)
-    socket_handler = logging.handlers.SocketHandler('localhost',
-                                                    logging.handlers.
-                                                    DEFAULT_TCP_LOGGING_PORT)
-    # don't bother with a formatter here, since a socket handler sends the
-    # event as an unformatted pickle
-    root_logger.addHandler(socket_handler)
-    # end of logging-cookbook code
+    backend = open_backend(url, options.jobs)
+    if restart:
+        backend.forget_mark(mark_source(infile_name, options.source))
+    read_nights_naps(backend, infile_name, options, binary, night_range)
 
 
-def setup_load_logger():
+def get_parse_args():
     """
-    Setup a logger for messages from the load process only
-    :return: the load logger
-    Called by: main()
+    Parse and return the c.l.a.'s
+
+    Called by: client code
     """
-    # load_logger will need a formatter since it is writing to file
-    load_logger = logging.getLogger('load.load')
-    load_logger.setLevel(logging.DEBUG)
-    file_handler = logging.FileHandler('src/load/load.log', mode='w')
-    formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    load_logger.addHandler(file_handler)
-    load_logger.propagate = False
+    parser = argparse.ArgumentParser()
+    parser.add_argument('store', choices=['True', 'False'],
+                        help="touch the db only if this is 'True'")
+    parser.add_argument('infile_name', nargs='?', default='-',
+                        help='read from this file instead of stdin')
+    parser.add_argument('-b', '--bulk', action='store_true',
+                        help='load with COPY instead of one function call '
+                             'per line')
+    parser.add_argument('--binary', action='store_true',
+                        help='read binary records instead of text')
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help='store in this SQLite file instead of the '
+                             'PostgreSQL db')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='load date-range partitions on this many '
+                             'connections at once')
+    parser.add_argument('--two-phase', action='store_true',
+                        help='with --jobs, commit by two-phase commit')
+    parser.add_argument('--chunk-nights', type=int, nargs='?', default=0,
+                        const=CHUNK_NIGHTS,
+                        help='commit every this many nights, resuming '
+                             'from the last night loaded from the same input '
+                             '(default: {})'.format(CHUNK_NIGHTS))
+    parser.add_argument('--source',
+                        help='with --chunk-nights, keep the resume mark '
+                             'under this name instead of infile_name')
+    parser.add_argument('--restart', action='store_true',
+                        help='with --chunk-nights, forget the resume mark '
+                             'and load from the start')
+    parser.add_argument('-u', '--upsert', action='store_true',
+                        help='skip the nights already in the db; update '
+                             'those changed')
+    parser.add_argument('--pipelined', type=int, nargs='?', default=0,
+                        const=BATCH_SIZE, metavar='BATCH_SIZE',
+                        help='parse in a thread of its own, sending this '
+                             'many records to the db at a time (default: '
+                             '{})'.format(BATCH_SIZE))
+    parser.add_argument('--queue-depth', type=int, default=QUEUE_DEPTH,
+                        help='with --pipelined, the most batches parsed '
+                             'ahead of the db')
+    parser.add_argument('--sqlite-batch', type=int, default=0, metavar='ROWS',
+                        help='with --sqlite, insert this many rows per '
+                             'executemany() call (default: {})'.format(
+                                 SQLITE_BATCH_SIZE))
+    date_range.add_arguments(parser)
+    args = parser.parse_args()
+    if args.sqlite and (args.bulk or args.jobs > 1 or args.chunk_nights or
+                        args.upsert or args.pipelined):
+        parser.error('--sqlite loads record by record in one transaction: '
+                     'omit --bulk, --jobs, --chunk-nights, --upsert, and '
+                     '--pipelined')
+    if args.sqlite_batch and not args.sqlite:
+        parser.error('--sqlite-batch loads into SQLite only: add --sqlite')
+    if args.pipelined and (args.bulk or args.jobs > 1 or args.chunk_nights
+                           or args.upsert):
+        parser.error('--pipelined loads record by record in one '
+                     'transaction: omit --bulk, --jobs, --chunk-nights, '
+                     'and --upsert')
+    if args.chunk_nights and args.jobs > 1:
+        parser.error('--chunk-nights loads on one connection: omit --jobs')
+    if (args.chunk_nights or args.restart) and args.infile_name == '-' and \
+            not args.source:
+        parser.error('--chunk-nights and --restart keep the resume mark '
+                     'under the input\'s name: give --source when reading '
+                     'stdin')
+    if args.upsert and (args.chunk_nights or args.jobs > 1):
+        parser.error('--upsert loads in one transaction: omit '
+                     '--chunk-nights and --jobs')
+    return args
+
 
-    return load_logger
+def main():
+    """
+    Set up root (network) logger and load logger
+    Called by: client code
+    """
+    return start_stage_logging('load.load', 'src/load/load.log')
 
 
 if __name__ == '__main__':
+    args = get_parse_args()
     load_logger = main()
     logging.info('load start')
     try:
-        url = 'postgresql://{}:{}@127.0.0.1/sleep'.format(
-                os.environ['DB_USERNAME'], os.environ['DB_PASSWORD'])
+        url = 'sqlite:///' + args.sqlite if args.sqlite else get_url()
     except KeyError:
-        print('Please set the environment variables DB_USERNAME and '
-              'DB_PASSWORD')
+        print('Please set the environment variable DB_URL, or DB_USERNAME '
+              'and DB_PASSWORD')
         sys.exit(1)
-    connect(url)  # only c.l.a. will be 'True' or 'False'
+    if args.store == 'True':
+        options = LoadOptions(bulk=args.bulk, jobs=args.jobs,
+                              two_phase=args.two_phase,
+                              chunk_nights=args.chunk_nights,
+                              source=args.source, upsert=args.upsert,
+                              batch_size=args.pipelined,
+                              queue_depth=args.queue_depth,
+                              sqlite_batch=args.sqlite_batch)
+        connect(url, args.infile_name, options, args.binary,
+                date_range.DateRange(args.since, args.until), args.restart)
     logging.info('load finish')
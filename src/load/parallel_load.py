@@ -0,0 +1,115 @@
+# file: src/load/parallel_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Load Night and Nap records over several db connections at once.
+
+The records are split into partitions of consecutive nights, so each
+covers a range of dates. A partition after the first starts with a
+Night, so naps stay with their night. Each partition is loaded by a
+worker thread, on a connection of its own from the engine's pool and in
+a transaction of its own. The worker loads it as the single-connection
+load would, record by record or with COPY. psycopg2 releases the GIL
+while it waits on the server, so the partitions load concurrently.
+
+The load is all or nothing. No transaction is committed until every
+partition has loaded, and if any partition fails, all are rolled back.
+With two_phase, each transaction is PREPAREd before any is committed,
+so a failure while committing cannot leave only some committed. The
+server's max_prepared_transactions must be at least jobs.
+
+Each connection takes night ids from the sequence as it goes. Within a
+partition they follow date order, but across partitions they do not.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.records import Night
+
+
+parallel_logger = logging.getLogger('load.parallel_load')
+
+
+def partition(records, parts):
+    """
+    :param records: a list of Night and Nap records, in date order
+    :param parts: the most partitions to make
+    :return: lists of consecutive records, about equal in length; each
+             list after the first starts with a Night, and the first
+             holds any naps before the first Night along with it
+    Called by: store_in_parallel()
+    """
+    if not records:
+        return []
+    partitions = [[]]
+    night_seen = False
+    for ix, record in enumerate(records):
+        if isinstance(record, Night):
+            # split where this partition's share of the records is done
+            if night_seen and ix * parts >= len(records) * len(partitions):
+                partitions.append([])
+            night_seen = True
+        partitions[-1].append(record)
+    return partitions
+
+
+def store_in_parallel(engine, records, load_records, jobs, bulk=False,
+                      two_phase=False):
+    """
+    Load records into the db over up to jobs connections, all or nothing
+
+    :param engine: the db engine; its pool should hold jobs connections
+    :param records: Night and Nap records, from the transform stage
+    :param load_records: loads records on a connection, as
+                         load.load_records()
+    :param jobs: the most connections to load on at once
+    :param bulk: if True, load with COPY rather than record by record
+    :param two_phase: if True, prepare every transaction before
+                      committing any
+    :return: None
+    :raise: the first exception of a partition that failed to load
+    Called by: load.store_records()
+    """
+    partitions = partition(list(records), jobs)
+    connections = []
+    transactions = []
+    committed = 0
+    try:
+        for _ in partitions:
+            connection = engine.connect()
+            connections.append(connection)
+            transactions.append(connection.begin_twophase() if two_phase
+                                else connection.begin())
+        with ThreadPoolExecutor(len(partitions) or 1) as executor:
+            futures = [executor.submit(load_records, connection, part, bulk)
+                       for connection, part in zip(connections, partitions)]
+        errors = [future.exception() for future in futures
+                  if future.exception() is not None]
+        if errors:
+            parallel_logger.error('%s of %s partitions failed to load; '
+                                  'rolling back all', len(errors),
+                                  len(partitions))
+            raise errors[0]
+        if two_phase:
+            for transaction in transactions:
+                transaction.prepare()
+        for transaction in transactions:
+            transaction.commit()
+            committed += 1
+    except Exception:
+        if committed:
+            parallel_logger.error('commit failed after %s of %s partitions '
+                                  'were committed', committed,
+                                  len(partitions))
+        for transaction in transactions[committed:]:
+            if transaction.is_active:
+                transaction.rollback()
+        raise
+    finally:
+        for connection in connections:
+            connection.close()
+    parallel_logger.info('loaded %s records in %s partitions', sum(
+        map(len, partitions)), len(partitions))
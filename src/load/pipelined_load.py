@@ -0,0 +1,188 @@
+# file: src/load/pipelined_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Load Night and Nap records record by record, as the plain load does,
+with reading and parsing the input overlapped with the db's work.
+
+A parser thread reads the records, converts each nap's duration to an
+interval, and puts batches of calls, ready to send, on a bounded
+queue: each batch is a single SELECT from a VALUES list with a row for
+each sl_insert_night() or sl_insert_nap() call, in input order, with
+the parameters to them. The rows of a VALUES list are computed in
+order, so each nap is inserted after its night, as by the plain load.
+The calling thread takes the batches off the queue and executes each
+in one round trip to the server, all in a single transaction, and logs
+the text each call returned, as the plain load does. psycopg2 releases
+the GIL while it waits on the server, so the parser goes on parsing.
+
+The time each side spends working, and the time it spends blocked on
+the queue, are logged and returned. If the parser is mostly blocked
+waiting for room in a full queue, the load is bound by the db; if the
+db thread is mostly blocked waiting for batches, by parsing.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from src.records import Night
+
+
+pipelined_logger = logging.getLogger('load.pipelined_load')
+
+BATCH_SIZE = 500  # default records in a batch
+QUEUE_DEPTH = 8  # default batches waiting on the queue at most
+PUT_TIMEOUT = 0.1  # seconds between checks that the db thread still runs
+
+INSERT_NIGHT = '(sl_insert_night(%s, %s, %s, %s))'
+INSERT_NAP = '(sl_insert_nap(%s, %s))'
+SELECT_CALLS = 'SELECT result FROM (VALUES {}) AS calls (result)'
+
+DONE = None  # put on the queue after the last batch
+
+
+class LoadTimes(namedtuple('LoadTimesTuple',
+                           'records, batches, parse_seconds, '
+                           'parse_blocked_seconds, db_seconds, '
+                           'db_blocked_seconds')):
+    """
+    records, batches -- the records loaded, and the batches they took
+    parse_seconds -- the parser thread's time reading and batching
+    parse_blocked_seconds -- its time waiting for room on the queue
+    db_seconds -- the db thread's time executing batches
+    db_blocked_seconds -- its time waiting for a batch
+    """
+
+
+def param_batches(records, size, to_interval):
+    """
+    :param records: Night and Nap records, in input order
+    :param size: the most records in a batch
+    :param to_interval: converts a decimal duration to an interval
+    :yield: (statement, parameters, record count) for each batch
+    Called by: store_pipelined()
+    """
+    calls, params = [], []
+    for record in records:
+        if isinstance(record, Night):
+            calls.append(INSERT_NIGHT)
+            params += record
+        else:
+            calls.append(INSERT_NAP)
+            params += (record.start_time, to_interval(record.duration))
+        if len(calls) == size:
+            yield SELECT_CALLS.format(', '.join(calls)), params, len(calls)
+            calls, params = [], []
+    if calls:
+        yield SELECT_CALLS.format(', '.join(calls)), params, len(calls)
+
+
+class _Parser(threading.Thread):
+    """
+    Puts param_batches() on a bounded queue, then DONE; or, if reading
+    the records fails, the exception
+    """
+    def __init__(self, batches, stop, records, size, to_interval):
+        super().__init__(name='load-parser', daemon=True)
+        self.batches = batches
+        self.stop = stop
+        self.param_batches = param_batches(records, size, to_interval)
+        self.seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def run(self):
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = next(self.param_batches, DONE)
+                self.seconds += time.perf_counter() - start
+                if not self._put(batch) or batch is DONE:
+                    return
+        except Exception as err:
+            self._put(err)
+
+    def _put(self, item):
+        """
+        :return: True once item is on the queue, False if the db thread
+                 stopped first
+        """
+        start = time.perf_counter()
+        try:
+            while not self.stop.is_set():
+                try:
+                    self.batches.put(item, timeout=PUT_TIMEOUT)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            self.blocked_seconds += time.perf_counter() - start
+
+
+def store_pipelined(engine, records, to_interval, batch_size=BATCH_SIZE,
+                    queue_depth=QUEUE_DEPTH):
+    """
+    Load records into the db in a single transaction, parsing them in
+    one thread while executing them in this one
+
+    :param engine: the db engine
+    :param records: Night and Nap records, from the transform stage;
+                    read in the parser thread
+    :param to_interval: converts a decimal duration to an interval
+    :param batch_size: the most records sent to the server at once
+    :param queue_depth: the most batches parsed ahead of the db
+    :return: a LoadTimes
+    Called by: load.store_records()
+    """
+    batches = queue.Queue(queue_depth)
+    stop = threading.Event()
+    parser = _Parser(batches, stop, records, batch_size, to_interval)
+    count = batch_count = 0
+    db_seconds = db_blocked_seconds = 0.0
+    connection = engine.connect()
+    trans = connection.begin()
+    cursor = connection.connection.cursor()
+    try:
+        parser.start()
+        while True:
+            start = time.perf_counter()
+            batch = batches.get()
+            db_blocked_seconds += time.perf_counter() - start
+            if batch is DONE:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            statement, params, batch_records = batch
+            start = time.perf_counter()
+            cursor.execute(statement, params)
+            results = cursor.fetchall()
+            db_seconds += time.perf_counter() - start
+            for (result,) in results:
+                if result:
+                    pipelined_logger.debug(result)
+            count += batch_records
+            batch_count += 1
+        trans.commit()
+    except Exception:
+        stop.set()
+        trans.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+    parser.join()
+    times = LoadTimes(count, batch_count, parser.seconds,
+                      parser.blocked_seconds, db_seconds, db_blocked_seconds)
+    pipelined_logger.info(
+        '%s records in %s batches; parser %.3f s working, %.3f s blocked; '
+        'db %.3f s working, %.3f s blocked: bound by %s', count,
+        batch_count, times.parse_seconds, times.parse_blocked_seconds,
+        times.db_seconds, times.db_blocked_seconds,
+        'the db' if times.parse_blocked_seconds > times.db_blocked_seconds
+        else 'parsing')
+    return times
@@ -0,0 +1,232 @@
+# file: src/load/sqlite_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Store Night and Nap records in an SQLite file instead of PostgreSQL.
+
+The tables are those of db_s_etl/create_tables.sql, with dates, times,
+and durations as 'YYYY-MM-DD' and 'HH:MM' text and the no-data flags
+as 0 or 1. They are made on first use, and the file is put in WAL
+mode, so charts can read it while a load writes it.
+
+There are no server functions, so what sl_insert_night() and
+sl_insert_nap() do is done here in Python:
+
+    each Night takes the next night_id, even if it is not stored, as
+        nextval() takes it; a Night that fails the CHECK on its no-data
+        flags is not stored
+    each Nap is stored with the night_id last taken, as currval() gives
+        it; a Nap before any Night, or after a Night not stored, is not
+
+The rows are then inserted with executemany(), batch_size at a time
+(load.py's --sqlite-batch), all in one transaction. SqliteBackend
+serves load.py as its PostgreSQL backend does, for the record-by-record
+load; the PostgreSQL-only load modes (--bulk, --jobs, --chunk-nights,
+--upsert, and --pipelined) are refused. read_rows() reads the rows
+back for the chart, as db_input.read_rows() does.
+"""
+
+import logging
+from datetime import date, time, timedelta
+
+from sqlalchemy import create_engine
+
+from src.records import Night
+
+
+sqlite_logger = logging.getLogger('load.sqlite_load')
+
+BATCH_SIZE = 1000  # default rows in an executemany() call
+
+PRAGMAS = ('PRAGMA journal_mode = WAL',
+           'PRAGMA synchronous = NORMAL',
+           'PRAGMA foreign_keys = ON')
+
+CREATE_TABLES = ('''
+    CREATE TABLE IF NOT EXISTS sl_night (
+        night_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_date TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        start_no_data INTEGER,
+        end_no_data INTEGER,
+        CHECK (start_no_data IS 0 OR end_no_data IS 0)
+    )''', '''
+    CREATE TABLE IF NOT EXISTS sl_nap (
+        nap_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_time TEXT NOT NULL,
+        duration TEXT NOT NULL,
+        night_id INTEGER NOT NULL REFERENCES sl_night (night_id)
+    )''', '''
+    CREATE INDEX IF NOT EXISTS sl_night_start_date ON sl_night (start_date)
+''', '''
+    CREATE INDEX IF NOT EXISTS sl_nap_night_id ON sl_nap (night_id)
+''')
+
+# the last night_id taken; AUTOINCREMENT, as a sequence, never reuses one
+LAST_NIGHT_ID = '''
+    SELECT coalesce((SELECT seq FROM sqlite_sequence
+                     WHERE name = 'sl_night'), 0)
+'''
+
+INSERT_NIGHT = '''
+    INSERT INTO sl_night (night_id, start_date, start_time, start_no_data,
+                          end_no_data)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+INSERT_NAP = 'INSERT INTO sl_nap (start_time, duration, night_id) ' \
+             'VALUES (?, ?, ?)'
+
+SELECT_ROWS = '''
+    SELECT n.night_id, n.start_date, n.start_time, n.start_no_data,
+           n.end_no_data, p.start_time, p.duration
+    FROM sl_night n LEFT JOIN sl_nap p ON p.night_id = n.night_id
+    WHERE (:first IS NULL OR n.start_date >= :first)
+      AND (:last IS NULL OR n.start_date <= :last)
+    ORDER BY n.start_date, n.night_id, p.nap_id
+'''
+
+
+def set_up(dbapi_connection):
+    """
+    Put the db in WAL mode, and make its tables if need be
+
+    Called by: SqliteBackend.store()
+    """
+    for statement in PRAGMAS + CREATE_TABLES:
+        dbapi_connection.execute(statement)
+
+
+def insert_rows(records, last_night_id, to_interval):
+    """
+    Do what sl_insert_night() and sl_insert_nap() would do with records
+
+    :param records: Night and Nap records, in input order
+    :param last_night_id: the night_id last taken
+    :param to_interval: converts a decimal duration to an interval
+    :yield: (INSERT_NIGHT or INSERT_NAP, the row to insert)
+    Called by: store_rows()
+    """
+    night_id = last_night_id
+    night_stored = False
+    for record in records:
+        if isinstance(record, Night):
+            night_id += 1
+            # a record made in process holds a date and bools
+            start_no_data = str(record.start_no_data).lower() == 'true'
+            end_no_data = str(record.end_no_data).lower() == 'true'
+            night_stored = not (start_no_data and end_no_data)
+            if night_stored:
+                yield INSERT_NIGHT, (night_id, str(record.start_date),
+                                     record.start_time, start_no_data,
+                                     end_no_data)
+            else:
+                sqlite_logger.warning('error inserting night into db: %s',
+                                      record)
+        elif night_stored:
+            yield INSERT_NAP, (record.start_time,
+                               to_interval(record.duration), night_id)
+        else:
+            sqlite_logger.warning('error inserting nap into db: %s', record)
+
+
+def store_rows(dbapi_connection, records, to_interval,
+               batch_size=BATCH_SIZE):
+    """
+    Insert records, batch_size rows at a time, in the transaction open
+    on dbapi_connection
+
+    :return: a dict holding the counts of nights and naps stored
+    Called by: SqliteBackend.store()
+    """
+    last_night_id = dbapi_connection.execute(LAST_NIGHT_ID).fetchone()[0]
+    nights, naps = [], []
+    counts = {'nights': 0, 'naps': 0}
+
+    def flush():
+        # each batch's nights go first, for its naps' foreign keys
+        dbapi_connection.executemany(INSERT_NIGHT, nights)
+        dbapi_connection.executemany(INSERT_NAP, naps)
+        counts['nights'] += len(nights)
+        counts['naps'] += len(naps)
+        nights.clear()
+        naps.clear()
+
+    for statement, row in insert_rows(records, last_night_id, to_interval):
+        (nights if statement is INSERT_NIGHT else naps).append(row)
+        if len(nights) + len(naps) >= batch_size:
+            flush()
+    flush()
+    return counts
+
+
+class SqliteBackend:
+    """
+    Stores records in the SQLite file of an sqlite:/// url
+
+    Called by: load.open_backend(), client code
+    """
+    def __init__(self, url, to_interval):
+        """
+        :param to_interval: converts a decimal duration to an interval
+        """
+        self.engine = create_engine(url)
+        self.to_interval = to_interval
+
+    def store(self, records, options):
+        """
+        Store records in a single transaction
+
+        :param options: a load.LoadOptions, as for load.store_records();
+                        its sqlite_batch is the rows in each
+                        executemany() call, or 0 for BATCH_SIZE
+        :raise ValueError: if a load mode only PostgreSQL has is asked for
+        """
+        if options.bulk or options.jobs > 1 or options.chunk_nights or \
+                options.upsert or options.batch_size:
+            raise ValueError('--bulk, --jobs, --chunk-nights, --upsert, and '
+                             '--pipelined load into PostgreSQL only')
+        dbapi_connection = self.engine.raw_connection()
+        try:
+            # BEGIN and COMMIT are executed here, not by the sqlite3 module
+            dbapi_connection.connection.isolation_level = None
+            set_up(dbapi_connection)
+            dbapi_connection.execute('BEGIN IMMEDIATE')
+            try:
+                counts = store_rows(dbapi_connection, records,
+                                    self.to_interval,
+                                    options.sqlite_batch or BATCH_SIZE)
+                dbapi_connection.execute('COMMIT')
+            except Exception:
+                dbapi_connection.execute('ROLLBACK')
+                raise
+        finally:
+            dbapi_connection.close()
+        sqlite_logger.info('stored %s nights, %s naps', counts['nights'],
+                           counts['naps'])
+        return counts
+
+    def forget_mark(self, source):
+        """ No chunked load runs here, so there is no mark to forget """
+
+
+def read_rows(engine, first=None, last=None, fetch_size=None):
+    """
+    As db_input.read_rows(), from an SQLite db
+
+    Called by: db_input.read_rows()
+    """
+    dbapi_connection = engine.raw_connection()
+    try:
+        cursor = dbapi_connection.execute(SELECT_ROWS,
+                                          {'first': first, 'last': last})
+        for row in cursor:
+            yield (row[0], date.fromisoformat(row[1]),
+                   time.fromisoformat(row[2]), bool(row[3]), bool(row[4]),
+                   row[5] and time.fromisoformat(row[5]),
+                   row[6] and timedelta(hours=int(row[6][:2]),
+                                        minutes=int(row[6][3:])))
+    finally:
+        dbapi_connection.close()
@@ -0,0 +1,192 @@
+# file: src/load/upsert_load.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Load Night and Nap records idempotently: a night already in the db is
+skipped if unchanged, and updated in place if changed.
+
+A night is known by its start_date and start_time. Before anything is
+written, the nights in the db over the input's range of dates are read
+with their naps, in one query, into a dict keyed that way. Each night
+in the input, with its naps, is then looked up:
+
+    not found -- the night and its naps are inserted, as they would
+                 be by the plain load
+    found, with the same no-data flags and the same naps -- skipped
+    found, otherwise -- its flags are updated, and if its naps differ,
+                        they are replaced, keeping its night_id; if
+                        both its no-data flags are now set, it is
+                        skipped with its naps, as the other loads skip
+                        a night failing sl_night's CHECK
+
+The writes are batched by kind, and all are made in one transaction.
+Loading the same input again writes nothing, so the time a reload
+takes grows with the new and changed data, not with the whole input.
+"""
+
+import logging
+from collections import namedtuple
+
+from src.records import Night
+
+
+upsert_logger = logging.getLogger('load.upsert_load')
+
+# the values come back in the text forms of the transform stage's output
+READ_STORED = '''
+    SELECT n.night_id, to_char(n.start_date, 'YYYY-MM-DD'),
+           to_char(n.start_time, 'HH24:MI'), n.start_no_data::text,
+           n.end_no_data::text, to_char(p.start_time, 'HH24:MI'),
+           to_char(p.duration, 'HH24:MI')
+    FROM sl_night n LEFT JOIN sl_nap p USING (night_id)
+    WHERE n.start_date BETWEEN %s AND %s
+    ORDER BY n.night_id, p.nap_id
+'''
+
+UPDATE_NIGHT = '''
+    UPDATE sl_night SET start_no_data = %s, end_no_data = %s
+    WHERE night_id = %s
+'''
+
+DELETE_NAPS = 'DELETE FROM sl_nap WHERE night_id = %s'
+
+INSERT_NAP = '''
+    INSERT INTO sl_nap (start_time, duration, night_id) VALUES (%s, %s, %s)
+'''
+
+
+class StoredNight(namedtuple('StoredNightTuple', 'night_id, flags, naps')):
+    """
+    night_id -- the night's id in sl_night
+    flags -- its (start_no_data, end_no_data), as 'true' or 'false'
+    naps -- a tuple of (start_time, duration) for each of its naps, in
+            nap_id order, as 'HH:MM'
+    """
+
+
+def text_flag(value):
+    """
+    :param value: a no-data flag: 'true' or 'false' as parsed from a
+                  line, or a bool in a record made in process
+    :return: value as 'true' or 'false'
+    Called by: store_upserting()
+    """
+    return str(value).lower()
+
+
+def nights_with_naps(records):
+    """
+    :param records: Night and Nap records, in input order
+    :yield: each Night with a list of the Naps after it; naps before the
+            first Night are skipped, as the plain load skips them
+    Called by: store_upserting()
+    """
+    night, naps = None, []
+    for record in records:
+        if isinstance(record, Night):
+            if night:
+                yield night, naps
+            night, naps = record, []
+        elif night:
+            naps.append(record)
+        else:
+            upsert_logger.warning('NAP %s has no NIGHT; skipped', record)
+    if night:
+        yield night, naps
+
+
+def read_stored(connection, first, last):
+    """
+    :param first, last: dates, as 'YYYY-MM-DD'
+    :return: a dict mapping (start_date, start_time) to a StoredNight,
+             for each night in the db starting from first through last;
+             of two nights with the same key, the earlier stored is kept
+    Called by: store_upserting()
+    """
+    stored = {}
+    night_id, key, flags, naps = None, None, None, []
+    for row in connection.execute(READ_STORED, first, last):
+        if row[0] != night_id:
+            if key and key not in stored:
+                stored[key] = StoredNight(night_id, flags, tuple(naps))
+            night_id, key, flags, naps = (row[0], tuple(row[1:3]),
+                                          tuple(row[3:5]), [])
+        if row[5] is not None:
+            naps.append(tuple(row[5:7]))
+    if key and key not in stored:
+        stored[key] = StoredNight(night_id, flags, tuple(naps))
+    return stored
+
+
+def store_upserting(engine, records, load_records, to_interval, bulk=False):
+    """
+    Load the nights in records that are new or changed, in a single
+    transaction
+
+    :param engine: the db engine
+    :param records: Night and Nap records, from the transform stage
+    :param load_records: loads records on a connection, as
+                         load.load_records()
+    :param to_interval: converts a decimal duration to an interval
+    :param bulk: if True, insert the new nights with COPY
+    :return: a dict of the nights 'inserted', 'updated', and 'unchanged'
+    Called by: load.store_records()
+    """
+    counts = dict.fromkeys(('inserted', 'updated', 'unchanged'), 0)
+    groups = list(nights_with_naps(records))
+    if not groups:
+        return counts
+    dates = [str(night.start_date) for night, _ in groups]
+    connection = engine.connect()
+    trans = connection.begin()
+    try:
+        stored = read_stored(connection, min(dates), max(dates))
+        new_records, flag_rows, nap_rows, replaced = [], [], [], []
+        seen = set()
+        for night, naps in groups:
+            key = (str(night.start_date), night.start_time)
+            if key in seen:
+                upsert_logger.warning('NIGHT %s repeated; skipped', night)
+                continue
+            seen.add(key)
+            old = stored.get(key)
+            flags = (text_flag(night.start_no_data),
+                     text_flag(night.end_no_data))
+            nap_values = tuple((nap.start_time, to_interval(nap.duration))
+                               for nap in naps)
+            if old is None:
+                new_records += [night, *naps]
+                counts['inserted'] += 1
+            elif old.flags == flags and old.naps == nap_values:
+                counts['unchanged'] += 1
+            elif flags == ('true', 'true'):  # would fail sl_night's CHECK
+                upsert_logger.warning('NIGHT %s has both no-data flags '
+                                      'set; skipped', night)
+            else:
+                if old.flags != flags:
+                    flag_rows.append((*flags, old.night_id))
+                if old.naps != nap_values:
+                    replaced.append((old.night_id,))
+                    nap_rows += [(*value, old.night_id)
+                                 for value in nap_values]
+                counts['updated'] += 1
+        if flag_rows:
+            connection.execute(UPDATE_NIGHT, flag_rows)
+        if replaced:
+            connection.execute(DELETE_NAPS, replaced)
+        if nap_rows:
+            connection.execute(INSERT_NAP, nap_rows)
+        if new_records:
+            load_records(connection, new_records, bulk)
+        trans.commit()
+    except Exception:
+        trans.rollback()
+        raise
+    finally:
+        connection.close()
+    upsert_logger.info('%s nights inserted, %s updated, %s unchanged',
+                       counts['inserted'], counts['updated'],
+                       counts['unchanged'])
+    return counts
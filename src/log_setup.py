@@ -0,0 +1,241 @@
+# file: src/log_setup.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Logging for the pipeline stages that never blocks the stage's own work.
+
+Loggers hand their records to a RepeatQueueHandler, which only puts them
+on a queue. A BatchQueueListener thread takes them off in batches and
+passes them to the real handlers: each stage logger's FileHandler, and
+for the root logger, a BatchSocketHandler, which sends a whole batch to
+the logging receiver in one write (the wire format is that of
+logging.handlers.SocketHandler). Messages are formatted on the listener
+thread, so log with lazy %-style arguments:
+
+    read_logger.warning('segment %s not valid', segment)
+
+A record logged with extra=repeats(summary, group) is passed on only the
+first time in its group. If it is repeated, one more record,
+summary.format(count, group), is passed on when the group changes or at
+exit; count includes the first record:
+
+    segment invalid ×3,412 in week 2019-03-03
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+
+BATCH_SIZE = 256  # most records a listener passes to a handler at once
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def repeats(summary, group):
+    """
+    :param summary: a format string taking the repeat count and group
+    :param group: the current group, e.g. a week's Sunday
+    :return: a dict to pass as a logging call's extra argument
+    Called by: client code
+    """
+    return {'summary': summary, 'group': group}
+
+
+class RepeatQueueHandler(logging.handlers.QueueHandler):
+    """ A QueueHandler that folds repeated records into summaries """
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.repeated = {}  # (logger, summary) => [group, count, levelno]
+
+    def prepare(self, record):
+        """ Leave the message to be formatted on the listener thread """
+        return record
+
+    def emit(self, record):
+        summary = getattr(record, 'summary', None)
+        if summary is None:
+            super().emit(record)
+            return
+        key = record.name, summary
+        repeated = self.repeated.get(key)
+        if repeated is not None and repeated[0] == record.group:
+            repeated[1] += 1
+            return
+        if repeated is not None:
+            self._emit_summary(key, repeated)
+        self.repeated[key] = [record.group, 0, record.levelno]
+        super().emit(record)
+
+    def flush_repeats(self):
+        """
+        Called by: stop()
+        """
+        for key, repeated in self.repeated.items():
+            self._emit_summary(key, repeated)
+        self.repeated.clear()
+
+    def _emit_summary(self, key, repeated):
+        """
+        Called by: emit(), flush_repeats()
+        """
+        group, count, levelno = repeated
+        if count:
+            name, summary = key
+            super().emit(logging.makeLogRecord({
+                'name': name, 'levelno': levelno,
+                'levelname': logging.getLevelName(levelno),
+                'msg': summary.format(count + 1, group)}))
+
+
+class BatchQueueListener:
+    """
+    As logging.handlers.QueueListener, with handler levels respected,
+    but a thread of its own takes the records off the queue in batches
+    """
+    STOP = object()  # put on the queue by stop()
+
+    def __init__(self, record_queue, *handlers):
+        self.queue = record_queue
+        self.handlers = handlers
+        self._thread = None
+
+    def start(self):
+        """
+        Start the listener thread
+
+        Called by: start_logging(), client code
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Handle the records on the queue, then stop the listener thread
+
+        Called by: start_logging(), client code
+        """
+        self.queue.put_nowait(self.STOP)
+        self._thread.join()
+        self._thread = None
+
+    def run(self):
+        """
+        Take up to BATCH_SIZE records at a time off the queue, until
+        STOP
+
+        Called by: the listener thread
+        """
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE and batch[-1] is not self.STOP:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self.STOP:
+                self.handle_batch(batch[:-1])
+                return
+            self.handle_batch(batch)
+
+    def handle_batch(self, records):
+        """
+        Pass each handler the records it would accept, all at once if it
+        has an emit_batch() method
+
+        Called by: run()
+        """
+        for handler in self.handlers:
+            accepted = [record for record in records
+                        if record.levelno >= handler.level and
+                        handler.filter(record)]
+            if not accepted:
+                continue
+            if hasattr(handler, 'emit_batch'):
+                with handler.lock:
+                    handler.emit_batch(accepted)
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+
+class BatchSocketHandler(logging.handlers.SocketHandler):
+    """ A SocketHandler that sends a batch of records in one write """
+    def emit_batch(self, records):
+        """
+        Called by: BatchQueueListener.handle_batch()
+        """
+        try:
+            self.send(b''.join(self.makePickle(record) for record in records))
+        except Exception:
+            self.handleError(records[0])
+
+
+def start_logging(stage_logs, root_handler=None):
+    """
+    Route each stage logger's records to its log file only, and other
+    records to root_handler, through one queue and listener thread.
+    Logging is stopped at exit, after any repeat summaries, unless the
+    function returned stops it first; that also detaches the loggers
+    and closes the handlers, so logging may be started again.
+
+    :param stage_logs: (logger name, log file name) pairs
+    :param root_handler: a handler for the root logger's records
+    :return: a function that stops logging before exit
+    Called by: client code
+    """
+    record_queue = queue.SimpleQueue()
+    queue_handler = RepeatQueueHandler(record_queue)
+    handlers = []
+    loggers = []
+    stage_filters = []
+    formatter = logging.Formatter(LOG_FORMAT)
+    for name, filename in stage_logs:
+        stage_logger = logging.getLogger(name)
+        loggers.append(stage_logger)
+        stage_logger.setLevel(logging.DEBUG)
+        stage_logger.addHandler(queue_handler)
+        stage_logger.propagate = False
+        file_handler = logging.FileHandler(filename, mode='w')
+        file_handler.setFormatter(formatter)
+        stage_filter = logging.Filter(name)
+        file_handler.addFilter(stage_filter)
+        handlers.append(file_handler)
+        stage_filters.append(stage_filter)
+    if root_handler is not None:
+        root_logger = logging.getLogger('')
+        loggers.append(root_logger)
+        root_logger.setLevel(logging.INFO)
+        root_logger.addHandler(queue_handler)
+        root_handler.addFilter(lambda record: not any(
+            stage_filter.filter(record) for stage_filter in stage_filters))
+        handlers.append(root_handler)
+    listener = BatchQueueListener(record_queue, *handlers)
+    listener.start()
+
+    def stop():
+        atexit.unregister(stop)
+        queue_handler.flush_repeats()
+        listener.stop()
+        for logger in loggers:
+            logger.removeHandler(queue_handler)
+        for handler in handlers:
+            handler.close()
+    atexit.register(stop)
+    return stop
+
+
+def start_stage_logging(name, filename):
+    """
+    Log as a pipeline subprocess: the stage logger to its log file, and
+    the root logger to the logging receiver (src/logging/receiver.py)
+
+    :return: the stage logger
+    Called by: client code
+    """
+    start_logging(((name, filename),), BatchSocketHandler(
+        'localhost', logging.handlers.DEFAULT_TCP_LOGGING_PORT))
+    return logging.getLogger(name)
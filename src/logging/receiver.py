@@ -1,89 +1,263 @@
 #!/usr/bin/python3
 
-# from: https://docs.python.org/3/howto/logging-cookbook.html#network-logging
+# file: src/logging/receiver.py
+# andrew jarcho
+# 2026-10-18
 
-import pickle
+
+"""
+Receive the stages' log records over TCP and write them to stderr.
+
+The wire protocol is that of logging.handlers.SocketHandler (and of the
+cookbook receiver this replaces): each record is a 4-byte big-endian
+length, then a pickled dict of the record's attributes.
+
+Each connection reads into a buffer of its own, which is reused from
+one read to the next and grown only for a record too big to fit. All
+the complete records in a read are decoded as one batch, and written to
+a BufferedSink, which writes its lines out at most every FLUSH_INTERVAL
+seconds, or sooner once FLUSH_SIZE characters are waiting. Lines are
+formatted as the cookbook receiver's were, but with each second's
+asctime formatted only once.
+
+On SIGINT or SIGTERM the receiver stops accepting connections, waits up
+to DRAIN_TIMEOUT seconds for the open ones to close, then flushes.
+"""
+
+import argparse
+import asyncio
 import logging
 import logging.handlers
-import socketserver
+import pickle
+import signal
 import struct
+import sys
+import time
+
+
+BUFFER_SIZE = 1 << 16  # bytes in a new connection's read buffer
+FLUSH_INTERVAL = 0.1  # most seconds a line waits in the sink
+FLUSH_SIZE = 1 << 16  # characters waiting in the sink that force a flush
+DRAIN_TIMEOUT = 5  # seconds to wait for open connections on shutdown
+FRAME_LENGTH = struct.Struct('>L')
+LOG_FORMAT = '%(asctime)s  %(levelname)-8s %(message)s'
 
 
-class LogRecordStreamHandler(socketserver.StreamRequestHandler):
-    """Handler for a streaming logging request.
+_RECORD_DEFAULTS = vars(logging.makeLogRecord({}))
 
-    Logs the record using whatever logging policy is
-    configured locally.
+
+def decode_frames(view, start, end):
+    """
+    :param view: a memoryview of a read buffer
+    :return: the records in the complete frames in view[start:end], and
+             the offset of the first byte not in a complete frame
+    Called by: LogRecordProtocol.buffer_updated()
     """
+    records = []
+    unpack_length = FRAME_LENGTH.unpack_from
+    header_size = FRAME_LENGTH.size
+    new_record = logging.LogRecord.__new__
+    while end - start >= header_size:
+        length, = unpack_length(view, start)
+        body_start = start + header_size
+        if end - body_start < length:
+            break
+        start = body_start + length
+        # as logging.makeLogRecord(), without LogRecord.__init__()
+        record = new_record(logging.LogRecord)
+        record.__dict__ = {**_RECORD_DEFAULTS,
+                           **pickle.loads(view[body_start:start])}
+        records.append(record)
+    return records, start
+
 
-    def handle(self):
-        """Handle multiple requests - each expected to be a 4-byte field,
-        followed by the LogRecord in pickle format.
+class CachedTimeFormatter(logging.Formatter):
+    """ A Formatter that formats each second's asctime only once """
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self.second = None
+        self.second_text = None
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self.second:
+            self.second_text = time.strftime(self.default_time_format,
+                                             self.converter(second))
+            self.second = second
+        return self.default_msec_format % (self.second_text, record.msecs)
+
+
+class BufferedSink:
+    """ Formats records into lines, and writes them out in bulk """
+    def __init__(self, stream, formatter, flush_interval=FLUSH_INTERVAL,
+                 flush_size=FLUSH_SIZE):
+        self.stream = stream
+        self.formatter = formatter
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.lines = []
+        self.size = 0
+
+    def write_batch(self, records):
+        """
+        Called by: LogRecordProtocol.buffer_updated()
+        """
+        lines = list(map(self.formatter.format, records))
+        self.lines += lines
+        self.size += sum(map(len, lines))
+        if self.size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Called by: write_batch(), flush_periodically(), LogReceiver.stop()
+        """
+        if self.lines:
+            self.lines.append('')
+            self.stream.write('\n'.join(self.lines))
+            self.stream.flush()
+            self.lines = []
+            self.size = 0
+
+    async def flush_periodically(self):
+        """
+        Called by: LogReceiver.start()
         """
         while True:
-            chunk = self.connection.recv(4)
-            if len(chunk) < 4:
-                break
-            slen = struct.unpack('>L', chunk)[0]
-            chunk = self.connection.recv(slen)
-            while len(chunk) < slen:
-                chunk = chunk + self.connection.recv(slen - len(chunk))
-            obj = self.unPickle(chunk)
-            record = logging.makeLogRecord(obj)
-            self.handleLogRecord(record)
-
-    def unPickle(self, data):
-        return pickle.loads(data)
-
-    def handleLogRecord(self, record):
-        # if a name is specified, we use the named logger rather than the one
-        # implied by the record.
-        if self.server.logname is not None:
-            name = self.server.logname
-        else:
-            name = record.name
-        logger = logging.getLogger(name)
-        # N.B. EVERY record gets logged. This is because Logger.handle
-        # is normally called AFTER logger-level filtering. If you want
-        # to do filtering, do it at the client end to avoid wasting
-        # cycles and network bandwidth!
-        logger.handle(record)
-
-
-class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+
+class LogRecordProtocol(asyncio.BufferedProtocol):
+    """ Reads one connection's frames, and passes their records on """
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.transport = None
+        self.buffer = bytearray(BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.end = 0  # buffer[:end] holds bytes not yet decoded
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.receiver.connections.add(self)
+
+    def get_buffer(self, sizehint):
+        return self.view[self.end:]
+
+    def buffer_updated(self, nbytes):
+        self.end += nbytes
+        records, start = decode_frames(self.view, 0, self.end)
+        if records:
+            self.receiver.sink.write_batch(records)
+        rest = self.end - start
+        needed = rest
+        if rest >= FRAME_LENGTH.size:
+            needed = FRAME_LENGTH.size + \
+                FRAME_LENGTH.unpack_from(self.view, start)[0]
+        if needed > len(self.buffer):
+            self._grow(needed, start)
+        elif start:
+            self.buffer[:rest] = self.view[start:self.end]
+        self.end = rest
+
+    def _grow(self, size, start):
+        """
+        Move the undecoded bytes from start to a new buffer, of at least
+        size bytes and at least twice the old buffer's size
+
+        Called by: buffer_updated()
+        """
+        buffer = bytearray(max(size, 2 * len(self.buffer)))
+        buffer[:self.end - start] = self.view[start:self.end]
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    def connection_lost(self, exc):
+        self.receiver.connections.discard(self)
+        if not self.receiver.connections:
+            self.receiver.all_closed.set()
+
+
+class LogReceiver:
+    """ An asyncio TCP server for the records of SocketHandler clients """
+    def __init__(self, sink):
+        self.sink = sink
+        self.connections = set()
+        self.all_closed = asyncio.Event()
+        self.server = None
+        self.flusher = None
+
+    async def start(self, host='localhost',
+                    port=logging.handlers.DEFAULT_TCP_LOGGING_PORT):
+        """
+        :return: the port listened on, which port=0 leaves to the OS
+        Called by: serve(), client code
+        """
+        self.server = await asyncio.get_running_loop().create_server(
+            lambda: LogRecordProtocol(self), host, port, reuse_address=True)
+        self.flusher = asyncio.ensure_future(self.sink.flush_periodically())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self, timeout=DRAIN_TIMEOUT):
+        """
+        Stop accepting connections; give the open ones timeout seconds to
+        close before closing them; flush the sink.
+
+        Called by: serve(), client code
+        """
+        self.server.close()
+        if self.connections:
+            self.all_closed.clear()
+            try:
+                await asyncio.wait_for(self.all_closed.wait(), timeout)
+            except asyncio.TimeoutError:
+                for connection in list(self.connections):
+                    connection.transport.close()
+        await self.server.wait_closed()
+        self.flusher.cancel()
+        self.sink.flush()
+
+
+async def serve(host, port, flush_interval):
     """
-    Simple TCP socket-based logging receiver SUITABLE FOR TESTING!!!
+    Receive records until SIGINT or SIGTERM
+
+    Called by: main()
     """
+    sink = BufferedSink(sys.stderr, CachedTimeFormatter(LOG_FORMAT),
+                        flush_interval)
+    receiver = LogReceiver(sink)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await receiver.start(host, port)
+    print('Starting TCP server...', flush=True)
+    await stopping.wait()
+    await receiver.stop()
 
-    allow_reuse_address = True
 
-    def __init__(self, host='localhost',
-                 port=logging.handlers.DEFAULT_TCP_LOGGING_PORT,
-                 handler=LogRecordStreamHandler):
-        socketserver.ThreadingTCPServer.__init__(self, (host, port), handler)
-        self.abort = 0
-        self.timeout = 1
-        self.logname = None
+def get_parse_args():
+    """
+    Parse and return the c.l.a.'s
 
-    def serve_until_stopped(self):
-        import select
-        abort = 0
-        while not abort:
-            rd, wr, ex = select.select([self.socket.fileno()],
-                                       [], [],
-                                       self.timeout)
-            if rd:
-                self.handle_request()
-            abort = self.abort
+    Called by: main()
+    """
+    parser = argparse.ArgumentParser(description='Receive log records')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int,
+                        default=logging.handlers.DEFAULT_TCP_LOGGING_PORT)
+    parser.add_argument('--flush-interval', type=float,
+                        default=FLUSH_INTERVAL,
+                        help='Most seconds a record waits to be written')
+    return parser.parse_args()
 
 
 def main():
-    logging.basicConfig(
-            format='%(asctime)s  %(levelname)-8s %(message)s'
-    )
-    tcpserver = LogRecordSocketReceiver()
-    print('Starting TCP server...')
-    tcpserver.serve_until_stopped()
+    args = get_parse_args()
+    asyncio.run(serve(args.host, args.port, args.flush_interval))
 
 
 if __name__ == '__main__':
@@ -7,55 +7,331 @@
 Create and connect the subprocesses that run the extract, transform,
 and load stages.
 
-logging_process runs the network logging receiver that allows all 3 stages
+The network logging receiver allows all 3 stages
 to log to the same file.
+
+The stages are connected by pipes and started together, as soon as the
+logging receiver accepts connections; each is then waited on until it
+exits. If a stage fails, the stages still running are terminated. The
+exit code and run time of each stage are reported at the end.
+
+With the -f switch, the stages run instead as chained generators in this
+process (see src/pipeline.py). With --binary, the stages pass binary
+records (see src/binary_records.py) through the pipes instead of text.
+With --checkpoint, only the data added to the .csv file since the last
+run with that checkpoint file is processed (see
+read_fns.IncrementalExtract). With --changes, only the weeks changed
+since the last run with that week store are (see
+read_fns.ChangedWeeksExtract). With --mmap, the .csv file is read
+through mmap, by a week index kept beside it (see read_fns.MappedExtract).
+With --since and --until, which imply --mmap, only the nights starting
+in that range of days are processed (see src/date_range.py).
+With --load-jobs, the records are loaded on that many db connections at
+once (see src/load/parallel_load.py). With --chunk-nights, they are
+committed every so many nights, and a failed load resumes where it left
+off (see src/load/chunked_load.py). With --upsert, the nights already
+in the db are skipped, or updated if changed (see
+src/load/upsert_load.py). With --pipelined, the input is parsed in one
+thread while the db works in another (see src/load/pipelined_load.py).
+With --sqlite, the records are stored in an SQLite file instead of
+PostgreSQL (see src/load/sqlite_load.py).
 """
 
-import subprocess
-import time
 import argparse
+import asyncio
+import logging.handlers
+import os
+import signal
+import sys
+import time
+
+from src import date_range
+from src.load.chunked_load import CHUNK_NIGHTS
+from src.load.pipelined_load import BATCH_SIZE, QUEUE_DEPTH
+
+
+RECEIVER_TIMEOUT = 5  # seconds to wait for the logging receiver to listen
+
+
+class Stage:
+    """ A pipeline subprocess, with its exit code and run time """
+    def __init__(self, name, argv):
+        self.name = name
+        self.argv = argv
+        self.process = None
+        self.started = None
+        self.returncode = None
+        self.seconds = None
+
+    async def start(self, stdin=None, stdout=None):
+        """
+        Called by: run_stages()
+        """
+        self.started = time.perf_counter()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.argv, stdin=stdin, stdout=stdout)
+
+    async def wait(self):
+        """
+        :return: the stage's exit code
+        Called by: run_stages()
+        """
+        self.returncode = await self.process.wait()
+        self.seconds = time.perf_counter() - self.started
+        return self.returncode
+
+    def terminate(self):
+        """
+        Called by: run_stages()
+        """
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+
+
+async def wait_for_receiver(host='localhost',
+                            port=logging.handlers.DEFAULT_TCP_LOGGING_PORT,
+                            timeout=RECEIVER_TIMEOUT):
+    """
+    Poll until the logging receiver accepts connections.
+
+    :return: True if it did so within timeout seconds
+    Called by: run_stages()
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.05)
+        else:
+            writer.close()
+            return True
+    return False
+
+
+async def run_stages(infile_name, store_in_db, load_args, extract_args=(),
+                     binary=False):
+    """
+    Run the logging receiver and the three stages; wait for each to exit.
+
+    :return: the extract, transform, and load Stages
+    Called by: main()
+    """
+    receiver = Stage('receiver', ['./src/logging/receiver.py'])
+    format_args = ['--binary'] if binary else []
+    stages = [Stage('extract', ['./src/extract/run_it.py', infile_name,
+                                *extract_args, *format_args]),
+              Stage('transform', ['./src/transform/do_transform.py',
+                                  *format_args]),
+              Stage('load', ['./src/load/load.py', store_in_db, *load_args,
+                             *format_args])]
+    await receiver.start()
+    try:
+        if not await wait_for_receiver():
+            print('logging receiver did not start', file=sys.stderr)
+            return stages
+        await start_piped(stages)
+
+        async def wait_or_stop_all(stage):
+            if await stage.wait():  # a stage failed: stop the others
+                for other in stages:
+                    other.terminate()
+
+        await asyncio.gather(*(wait_or_stop_all(stage) for stage in stages))
+    finally:
+        for stage in stages:
+            stage.terminate()
+        if receiver.process.returncode is None:
+            # let the receiver finish reading the stages' last records
+            receiver.process.send_signal(signal.SIGINT)
+        await receiver.wait()
+    return stages
+
+
+async def start_piped(stages):
+    """
+    Start each stage with its stdin reading the previous stage's stdout.
 
-note = 'Runs in debug mode unless -s switch is given.'
-parser = argparse.ArgumentParser(description=note)
-parser.add_argument('infile_name', help='The name of a .csv file to read')
-parser.add_argument('-s', '--store', help='Store output in database',
-                    action='store_true')
-args = parser.parse_args()
+    Called by: run_stages()
+    """
+    stdin = None
+    last = len(stages) - 1
+    for ix, stage in enumerate(stages):
+        read_fd, write_fd = os.pipe() if ix < last else (None, None)
+        try:
+            await stage.start(stdin=stdin, stdout=write_fd)
+        finally:
+            # the child processes hold their own copies of these
+            for fd in (stdin, write_fd):
+                if fd is not None:
+                    os.close(fd)
+        stdin = read_fd
 
-# remove the --store argument from the args Namespace, if present
-args_dict = args.__dict__
-# args_dict[store] has been set to True if present
-store_in_db = str(args_dict.pop('store', False))
 
-logging_process = subprocess.Popen(
-    ['./src/logging/receiver.py'],
-)
+def report(stages):
+    """
+    Print each stage's exit code and run time.
 
-time.sleep(1)
+    :return: 0 if every stage succeeded, else 1
+    Called by: main()
+    """
+    print('{:10} {:>5} {:>9}'.format('stage', 'exit', 'seconds'),
+          file=sys.stderr)
+    for stage in stages:
+        seconds = '-' if stage.seconds is None else \
+            '{:.3f}'.format(stage.seconds)
+        returncode = '-' if stage.returncode is None else stage.returncode
+        print('{:10} {:>5} {:>9}'.format(stage.name, returncode, seconds),
+              file=sys.stderr)
+    return 0 if all(stage.returncode == 0 for stage in stages) else 1
 
-extract_process = subprocess.Popen(
-    ['./src/extract/run_it.py', args.infile_name],
-    stdout=subprocess.PIPE,
-)
 
-time.sleep(5)
+def get_parse_args():
+    """
+    Parse and return the c.l.a.'s
 
-transform_process = subprocess.Popen(
-    ['./src/transform/do_transform.py'],
-    stdin=extract_process.stdout,
-    stdout=subprocess.PIPE,
-)
+    Called by: main()
+    """
+    note = 'Runs in debug mode unless -s switch is given.'
+    parser = argparse.ArgumentParser(description=note)
+    parser.add_argument('infile_name', help='The name of a .csv file to read')
+    parser.add_argument('-s', '--store', help='Store output in database',
+                        action='store_true')
+    parser.add_argument('-b', '--bulk', help='Store with COPY (implies -s)',
+                        action='store_true')
+    parser.add_argument('-f', '--fused', help='Run all stages in one process',
+                        action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Parse the .csv file in this many processes')
+    parser.add_argument('--binary', action='store_true',
+                        help='Pass binary records between the stages')
+    parser.add_argument('--sqlite', metavar='FILE',
+                        help='Store in this SQLite file instead of the '
+                             'PostgreSQL database')
+    parser.add_argument('--load-jobs', type=int, default=1,
+                        help='Load date-range partitions on this many '
+                             'database connections at once')
+    parser.add_argument('--two-phase', action='store_true',
+                        help='With --load-jobs, commit by two-phase commit')
+    parser.add_argument('--chunk-nights', type=int, nargs='?', default=0,
+                        const=CHUNK_NIGHTS,
+                        help='Commit every this many nights, resuming '
+                             'from the last night loaded from the same '
+                             '.csv file '
+                             '(default: {})'.format(CHUNK_NIGHTS))
+    parser.add_argument('--restart', action='store_true',
+                        help='With --chunk-nights, load from the start')
+    parser.add_argument('-u', '--upsert', action='store_true',
+                        help='Skip the nights already in the database; '
+                             'update those changed')
+    parser.add_argument('--pipelined', type=int, nargs='?', default=0,
+                        const=BATCH_SIZE, metavar='BATCH_SIZE',
+                        help='Load in two threads, parsing while the '
+                             'database works, this many records at a time '
+                             '(default: {})'.format(BATCH_SIZE))
+    parser.add_argument('--queue-depth', type=int, default=QUEUE_DEPTH,
+                        help='With --pipelined, the most batches parsed '
+                             'ahead of the database')
+    parser.add_argument('--sqlite-batch', type=int, default=0, metavar='ROWS',
+                        help='With --sqlite, insert this many rows per '
+                             'executemany() call (default: that of '
+                             'src/load/sqlite_load.py)')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--checkpoint',
+                       help='Process only data added since this '
+                            'checkpoint file was written; update it')
+    modes.add_argument('--changes',
+                       help='Process only weeks changed since this week '
+                            'store was written; update it')
+    modes.add_argument('--mmap', action='store_true',
+                       help='Read the .csv file through mmap, by a week '
+                            'index kept beside it')
+    date_range.add_arguments(parser)
+    args = parser.parse_args()
+    ranged = bool(args.since or args.until)
+    if (args.checkpoint or args.changes) and ranged:
+        parser.error('--since and --until do not combine with --checkpoint '
+                     'or --changes')
+    if (args.checkpoint or args.changes or args.mmap or ranged) and \
+            args.jobs > 1:
+        parser.error('--checkpoint, --changes, --mmap, --since, and --until '
+                     'run in one process: omit --jobs')
+    if args.chunk_nights and args.load_jobs > 1:
+        parser.error('--chunk-nights loads on one connection: omit '
+                     '--load-jobs')
+    if args.pipelined and (args.bulk or args.load_jobs > 1 or
+                           args.chunk_nights or args.upsert):
+        parser.error('--pipelined loads record by record in one '
+                     'transaction: omit --bulk, --load-jobs, '
+                     '--chunk-nights, and --upsert')
+    if args.upsert and (args.chunk_nights or args.load_jobs > 1):
+        parser.error('--upsert loads in one transaction: omit '
+                     '--chunk-nights and --load-jobs')
+    if args.sqlite and (args.bulk or args.load_jobs > 1 or
+                        args.chunk_nights or args.upsert or args.pipelined):
+        parser.error('--sqlite loads record by record in one transaction: '
+                     'omit --bulk, --load-jobs, --chunk-nights, --upsert, '
+                     'and --pipelined')
+    if args.sqlite_batch and not args.sqlite:
+        parser.error('--sqlite-batch loads into SQLite only: add --sqlite')
+    return args
 
-time.sleep(6)
 
-load_process = subprocess.Popen(
-    ['./src/load/load.py', store_in_db],
-    stdin=transform_process.stdout,
-)
+def main():
+    args = get_parse_args()
+    store_in_db = str(args.store or args.bulk)
+    load_args = ['--bulk'] if args.bulk else []
+    load_args += ['--jobs', str(args.load_jobs)]
+    if args.two_phase:
+        load_args.append('--two-phase')
+    if args.chunk_nights:
+        load_args += ['--chunk-nights', str(args.chunk_nights),
+                      '--source', args.infile_name]
+    if args.restart:
+        load_args.append('--restart')
+    if args.upsert:
+        load_args.append('--upsert')
+    if args.pipelined:
+        load_args += ['--pipelined', str(args.pipelined),
+                      '--queue-depth', str(args.queue_depth)]
+    if args.sqlite:
+        load_args += ['--sqlite', args.sqlite]
+    if args.sqlite_batch:
+        load_args += ['--sqlite-batch', str(args.sqlite_batch)]
+    if args.fused:
+        # the stages' modules are needed only to run them in this process
+        from src import pipeline
+        from src.load.load import LoadOptions
+        pipeline.set_up_loggers()
+        options = LoadOptions(bulk=args.bulk, jobs=args.load_jobs,
+                              two_phase=args.two_phase,
+                              chunk_nights=args.chunk_nights,
+                              upsert=args.upsert,
+                              batch_size=args.pipelined,
+                              queue_depth=args.queue_depth,
+                              sqlite_batch=args.sqlite_batch)
+        pipeline.run_fused(args.infile_name, store_in_db == 'True',
+                           jobs=args.jobs, checkpoint=args.checkpoint,
+                           changes=args.changes, mapped=args.mmap,
+                           since=args.since, until=args.until,
+                           options=options, restart=args.restart,
+                           url=args.sqlite and 'sqlite:///' + args.sqlite)
+        return 0
+    extract_args = ['--jobs', str(args.jobs)]
+    if args.mmap:
+        extract_args.append('--mmap')
+    if args.since:
+        extract_args += ['--since', args.since.isoformat()]
+    if args.until:
+        extract_args += ['--until', args.until.isoformat()]
+    if args.checkpoint:
+        extract_args += ['--checkpoint', args.checkpoint]
+    if args.changes:
+        extract_args += ['--changes', args.changes]
+    stages = asyncio.run(run_stages(args.infile_name, store_in_db,
+                                    load_args, extract_args, args.binary))
+    return report(stages)
 
-time.sleep(15)
 
-extract_process.terminate()
-transform_process.terminate()
-load_process.terminate()
-logging_process.terminate()
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# file: src/pipeline.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Run the extract, transform, and load stages in a single process.
+
+Extract.records() feeds Transform.read_records(), which feeds
+load.load_records(): the stages are chained generators passing
+records, so no text is written to a pipe or parsed back.
+
+The db ends up holding the same rows as after a run of the three
+subprocesses started by mk_processes.py.
+"""
+
+import logging
+
+from src.extract.read_fns import (ChangedWeeksExtract, Extract,
+                                  IncrementalExtract, MappedExtract,
+                                  ParallelExtract, open_infile)
+from src.transform.do_transform import Transform
+from src.load import load
+from src.log_setup import start_logging
+from tests.file_access_wrappers import FileReadAccessWrapper
+
+
+STAGE_LOGS = (('extract.read_fns', 'src/extract/read_fns.log'),
+              ('transform.do_transform', 'src/transform/do_transform.log'),
+              ('load.load', 'src/load/load.log'))
+
+
+def set_up_loggers():
+    """
+    Log as the three stage processes and the logging receiver would,
+    without the receiver: root logger records go to stderr.
+
+    Called by: client code
+    """
+    stderr_handler = logging.StreamHandler()
+    stderr_handler.setFormatter(
+        logging.Formatter('%(asctime)s  %(levelname)-8s %(message)s'))
+    start_logging(STAGE_LOGS, stderr_handler)
+
+
+def nights_naps(infile_name, jobs=1, checkpoint=None, changes=None,
+                mapped=False, since=None, until=None):
+    """
+    :param jobs: parse the .csv file in this many processes
+    :param checkpoint: if given, the name of a checkpoint file: read only
+                       the data added since it was written (see
+                       IncrementalExtract), then update it
+    :param changes: if given, the name of a week store: read only the
+                    weeks changed since it was written (see
+                    ChangedWeeksExtract), then update it
+    :param mapped: read the .csv file through mmap (see MappedExtract)
+    :param since, until: if given, datetime.dates: only the nights that
+                         start in that range (implies mapped)
+    :yield: the Night and Nap records for infile_name
+    Called by: run_fused()
+    """
+    mapped = mapped or since or until
+    if checkpoint or changes or mapped:
+        infile = open(infile_name, 'rb')
+    else:
+        infile = open_infile(FileReadAccessWrapper(infile_name))
+    with infile:
+        if mapped:
+            extract = MappedExtract(
+                infile, MappedExtract.index_name_for(infile_name), since,
+                until)
+        elif checkpoint:
+            extract = IncrementalExtract(infile, checkpoint)
+        elif changes:
+            extract = ChangedWeeksExtract(infile, changes)
+        elif jobs > 1:
+            extract = ParallelExtract(infile, jobs)
+        else:
+            extract = Extract(infile)
+        yield from Transform().read_records(extract.records())
+
+
+def run_fused(infile_name, store_in_db=False, jobs=1, checkpoint=None,
+              changes=None, mapped=False, since=None, until=None,
+              options=load.LoadOptions(), restart=False, url=None):
+    """
+    Extract, transform, and (if store_in_db) load infile_name
+
+    :param options: a load.LoadOptions, as for load.store_records(); the
+                    resume mark is kept under infile_name
+    :param restart: with options.chunk_nights, forget the mark and load
+                    from the start
+    :param url: the url of the db to load into, if not load.get_url()
+    :return: None
+    Called by: client code
+    """
+    logging.info('pipeline start')
+    records = nights_naps(infile_name, jobs, checkpoint, changes, mapped,
+                          since, until)
+    if store_in_db:
+        backend = load.open_backend(url or load.get_url(), options.jobs)
+        if restart:
+            backend.forget_mark(infile_name)
+        backend.store(records, options._replace(source=infile_name))
+    else:
+        for _ in records:  # run the stages; as load.py, don't touch the db
+            pass
+    logging.info('pipeline finish')
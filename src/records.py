@@ -0,0 +1,54 @@
+# file: src/records.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Records passed between the extract, transform, and load stages.
+
+Extract emits WeekHeader and DayHeader records, along with the
+container_objs.Event records for each day. Transform turns those into
+Night and Nap records for Load.
+
+Each record's line() gives the text the subprocess pipeline writes
+to its pipes, so the same records serve both the text format and the
+fused, in-process pipeline.
+"""
+
+from collections import namedtuple
+
+
+class WeekHeader(namedtuple('WeekHeaderTuple', 'sunday')):
+    """ sunday -- the datetime.date starting the week """
+    def line(self):
+        wk_header = '\nWeek of Sunday, {}:'.format(self.sunday)
+        return wk_header + '\n' + '=' * (len(wk_header) - 2)
+
+
+class DayHeader(namedtuple('DayHeaderTuple', 'dt_date')):
+    """ dt_date -- a datetime.date """
+    def line(self):
+        return '    {}'.format(self.dt_date)  # four leading spaces
+
+
+class Night(namedtuple('NightTuple',
+                       'start_date, start_time, start_no_data, '
+                       'end_no_data')):
+    """
+    start_date -- a datetime.date, or a 'YYYY-MM-DD' string
+    start_time -- an 'HH:MM' string
+    start_no_data, end_no_data -- bools, or 'true' / 'false' strings
+    """
+    def line(self):
+        return 'NIGHT, {}, {}, {}, {}'.format(
+            self.start_date, self.start_time,
+            str(self.start_no_data).lower(), str(self.end_no_data).lower())
+
+
+class Nap(namedtuple('NapTuple', 'start_time, duration')):
+    """
+    start_time -- an 'HH:MM' string
+    duration -- a decimal string such as '04.25'
+    """
+    def line(self):
+        return 'NAP, {}, {}'.format(self.start_time, self.duration)
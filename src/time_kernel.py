@@ -0,0 +1,95 @@
+# file: src/time_kernel.py
+# andrew jarcho
+# 2026-10-18
+
+
+"""
+Time arithmetic shared by the transform stage and the chart.
+
+A time of day is handled as a minute index: minutes since midnight,
+0 through 1439. An interval is a number of minutes, less than a day.
+The lookup tables below are built once, at import:
+
+    MINUTE_INDEX -- 'H:MM' or 'HH:MM' => minute index
+    HH_MM -- minute index => 'HH:MM'
+    DECIMAL_HOURS -- interval => decimal hours string, e.g. '04.25'
+    DECIMAL_INTERVAL -- decimal hours string => interval
+    QUARTERS -- interval => number of quarter hours
+
+An interval is rounded to a quarter hour (see nearest_quarter()) before
+it is given as decimal hours or quarter hours. slot_counts() gives a
+table like QUARTERS for slots of other sizes.
+"""
+
+MINUTES_IN_DAY = 24 * 60
+
+
+def nearest_quarter(minutes):
+    """
+    Coerce a number of minutes past the hour to a quarter hour.
+
+    Minutes past 45 are rounded down, so the hour is unchanged.
+    :return: an integer in {0, 15, 30, 45}
+    """
+    if minutes < 8:
+        return 0
+    if minutes < 23:
+        return 15
+    if minutes < 37:
+        return 30
+    return 45
+
+
+MINUTE_INDEX = {fmt.format(*divmod(minute, 60)): minute
+                for minute in range(MINUTES_IN_DAY)
+                for fmt in ('{}:{:02}', '{:02}:{:02}')}
+
+HH_MM = tuple('{:02}:{:02}'.format(*divmod(minute, 60))
+              for minute in range(MINUTES_IN_DAY))
+
+DECIMAL_HOURS = tuple('{:02}.{:02}'.format(interval // 60,
+                                           nearest_quarter(interval % 60)
+                                           // 3 * 5)
+                      for interval in range(MINUTES_IN_DAY))
+
+DECIMAL_INTERVAL = {DECIMAL_HOURS[quarter]: quarter
+                    for quarter in range(0, MINUTES_IN_DAY, 15)}
+
+QUARTERS = tuple(interval // 60 * 4 + nearest_quarter(interval % 60) // 15
+                 for interval in range(MINUTES_IN_DAY))
+
+
+def minute_index(hh_mm):
+    """
+    :param hh_mm: a time as 'H:MM' or 'HH:MM'
+    :return: its minute index
+    """
+    try:
+        return MINUTE_INDEX[hh_mm]
+    except KeyError:  # an hour past 23: wrap it, as an interval would
+        hours, minutes = hh_mm.split(':')
+        return (int(hours) * 60 + int(minutes)) % MINUTES_IN_DAY
+
+
+def interval(start_minute, end_minute):
+    """
+    :return: the minutes from start_minute to end_minute, which may be
+             on the next day
+    """
+    return (end_minute - start_minute) % MINUTES_IN_DAY
+
+
+def slot_counts(resolution):
+    """
+    :param resolution: the minutes in a slot: a divisor of 60
+    :return: a table: interval => number of slots, the interval rounded
+             to the nearest slot but, as nearest_quarter() does, never
+             up to the next hour. For 15, QUARTERS itself.
+    """
+    if resolution == 15:
+        return QUARTERS
+    per_hour = 60 // resolution
+    return tuple(interval // 60 * per_hour +
+                 min((interval % 60 + resolution // 2) // resolution,
+                     per_hour - 1)
+                 for interval in range(MINUTES_IN_DAY))
@@ -11,20 +11,38 @@ Read lines from stdin, transform to a db-friendly format, and write to stdout.
 
 The output will be usable by the database with a minimum of further
 processing, and will hold all relevant data from the input.
+
+read_records() does the same work on the records from Extract.records(),
+yielding Night and Nap records instead of writing lines.
+
+With a DateRange (see src/date_range.py), only the nights in range are
+transformed: the actions of other nights are skipped, and reading stops
+at the first night after the range.
 """
 
+import argparse
 import sys
 import fileinput
 import logging
-import logging.handlers
 import re
 
+from datetime import date
+
+from src import binary_records, date_range
+from src.log_setup import repeats, start_stage_logging
+from src.records import WeekHeader, DayHeader, Night, Nap
+from src.time_kernel import (DECIMAL_HOURS, MINUTES_IN_DAY, QUARTERS,
+                             interval, minute_index)
+
+
+BAD_VALUE = 'bad value \u00d7{:,} after {}'
+
 
 class Transform:
     transform_logger = logging.getLogger('transform.do_transform')
     transform_logger.setLevel('DEBUG')
 
-    def __init__(self, data_source=fileinput):
+    def __init__(self, data_source=fileinput, night_range=None):
         """
         The data source will be a file or FakeFileReadWrapper object
         if either is passed as a ctor argument. Otherwise the
@@ -32,6 +50,7 @@ class Transform:
         'extract' phase subprocess.
         """
         self.data_source = data_source
+        self.night_range = night_range or date_range.DateRange()
         self.out_val = None
         self.last_date = ''
         self.last_sleep_time = ''
@@ -51,6 +70,8 @@ class Transform:
         with self.data_source.input() as infile:
             for curr_line in infile:
                 self.process_curr(curr_line.rstrip('\n'))
+                if self.night_range.past:
+                    break
 
     def process_curr(self, cur_l):
         """
@@ -72,11 +93,90 @@ class Transform:
         elif cur_l.startswith('action: '):
             self.handle_action_line(cur_l)
         else:
-            Transform.transform_logger.warning('Bad value {} in input'.
-                                               format(cur_l))
+            Transform.transform_logger.warning(
+                'Bad value %s in input', cur_l,
+                extra=repeats(BAD_VALUE, self.last_date))
         if self.out_val is not None:
             self.output_val()
 
+    def read_records(self, records):
+        """
+        Process each record from the extract stage
+
+        :param records: WeekHeader, DayHeader, and Event records
+        :yield: a Night or Nap record when one is complete
+        Called by: client code
+        """
+        for record in records:
+            self.process_record(record)
+            if self.out_val is not None:
+                yield self.out_val
+                self.out_val = None
+            if self.night_range.past:
+                return
+
+    def read_fields(self, fields):
+        """
+        As read_records(), for the fields of binary records (see
+        src/binary_records.py). Times stay minute indexes throughout;
+        nothing is parsed or formatted.
+
+        :param fields: (kind, code, date, minute, value) tuples
+        :yield: the fields of a Night or Nap record when one is complete
+        Called by: __main__()
+        """
+        last_ordinal = 0
+        sleep_minute = None
+        night_range = self.night_range
+        for kind, code, ordinal, minute, _ in fields:
+            if kind == binary_records.DAY:
+                last_ordinal = ordinal
+                continue
+            if kind != binary_records.EVENT:
+                continue
+            action = binary_records.ACTIONS[code]
+            if night_range:
+                if action in date_range.NIGHT_STARTS:
+                    night_range.starts_night(date.fromordinal(last_ordinal))
+                    if night_range.past:
+                        return
+                if not night_range.in_range:
+                    continue
+            if action == 'w':
+                minutes = interval(sleep_minute, minute)
+                if minutes % 15:
+                    Transform.transform_logger.warning(
+                        'Invalid quarter %s in do_transform.py '
+                        'read_fields()', minutes % 60)
+                yield (binary_records.NAP, 0, 0, sleep_minute,
+                       QUARTERS[minutes] * 15)
+                continue
+            sleep_minute = minute % MINUTES_IN_DAY
+            if action == 'b':
+                flags = 0
+            elif action == 'N':
+                flags = binary_records.START_NO_DATA
+            elif action == 'Y':
+                flags = binary_records.END_NO_DATA
+            else:  # 's'
+                continue
+            yield binary_records.NIGHT, flags, last_ordinal, sleep_minute, 0
+
+    def process_record(self, record):
+        """
+        Process a single record. As process_curr(), but nothing is parsed.
+        Called by: read_records()
+        """
+        if isinstance(record, WeekHeader):
+            self.handle_header_line()
+        elif isinstance(record, DayHeader):
+            self.last_date = record.dt_date
+        else:
+            mil_time = record.mil_time
+            self.handle_action(record.action[0],
+                               '0' + mil_time if len(mil_time) == 4
+                               else mil_time)
+
     def handle_header_line(self):
         self.out_val = None
 
@@ -84,30 +184,39 @@ class Transform:
         self.last_date = line[4:]
 
     def handle_action_line(self, line):
-        if line.startswith('action: b'):
-            self.last_sleep_time = self.get_time_part_from(line)
-            self.out_val = 'NIGHT, {}, {}, {}, {}'.format(self.last_date,
-                                                          self.last_sleep_time,
-                                                          'false', 'false')
-        elif line.startswith('action: s'):
-            self.last_sleep_time = self.get_time_part_from(line)
-        elif line.startswith('action: w'):
-            wake_time = self.get_time_part_from(line)
-            duration = self.get_duration(wake_time, self.last_sleep_time)
-            self.out_val = 'NAP, {}, {}'.format(self.last_sleep_time, duration)
-        elif line.startswith('action: N'):
-            self.last_sleep_time = self.get_time_part_from(line)
-            self.out_val = 'NIGHT, {}, {}, {}, {}'.format(self.last_date,
-                                                          self.last_sleep_time,
-                                                          'true', 'false')
-        elif line.startswith('action: Y'):
-            self.last_sleep_time = self.get_time_part_from(line)
-            self.out_val = 'NIGHT, {}, {}, {}, {}'.format(self.last_date,
-                                                          self.last_sleep_time,
-                                                          'false', 'true')
+        self.handle_action(line[8:9], self.get_time_part_from(line))
+
+    def handle_action(self, action, time_part):
+        """
+        :param action: one of 'b', 's', 'w', 'N', 'Y'
+        :param time_part: the event's time in 'hh:mm' format
+        Called by: handle_action_line(), process_record()
+        """
+        if self.night_range:
+            if action in date_range.NIGHT_STARTS:
+                self.night_range.starts_night(self.last_date)
+            if not self.night_range.in_range:
+                return
+        if action == 'b':
+            self.last_sleep_time = time_part
+            self.out_val = Night(self.last_date, self.last_sleep_time,
+                                 False, False)
+        elif action == 's':
+            self.last_sleep_time = time_part
+        elif action == 'w':
+            duration = self.get_duration(time_part, self.last_sleep_time)
+            self.out_val = Nap(self.last_sleep_time, duration)
+        elif action == 'N':
+            self.last_sleep_time = time_part
+            self.out_val = Night(self.last_date, self.last_sleep_time,
+                                 True, False)
+        elif action == 'Y':
+            self.last_sleep_time = time_part
+            self.out_val = Night(self.last_date, self.last_sleep_time,
+                                 False, True)
 
     def output_val(self):
-        print(self.out_val)
+        print(self.out_val.line())
         self.out_val = None
 
     @staticmethod
@@ -134,95 +243,46 @@ class Transform:
         get_duration() calculates the interval between them as a
         string in decimal format e.g.,
             04.25 for 4 1/4 hours
-        Called by: process_curr()
+        rounding it to a quarter hour if need be.
+        Called by: handle_action()
         Returns: the calculated interval, whose value will be
                 non-negative.
         """
-        w_time_list = list(map(int, w_time.split(':')))
-        s_time_list = list(map(int, s_time.split(':')))
-        if w_time_list[1] < s_time_list[1]:  # wake minute < sleep minute
-            w_time_list[1] += 60
-            w_time_list[0] -= 1
-        if w_time_list[0] < s_time_list[0]:  # wake hour < sleep hour
-            w_time_list[0] += 24
-        dur_list = [(w_time_list[x] - s_time_list[x])
-                    for x in range(len(w_time_list))]
-        duration = str(dur_list[0])
-        if len(duration) == 1:  # change hour from '1' to '01', e.g.
-            duration = '0' + duration
-        duration += Transform.quarter_hour_to_decimal(dur_list[1])
-        return duration
-
-    @staticmethod
-    def quarter_hour_to_decimal(quarter):
-        """
-        Convert an integer number of minutes into a decimal string
-
-        Argument is a number of minutes past the hour. If that number
-        is a quarter-hour, convert it to a decimal quarter represented
-        as a string.
-
-        Called by: get_duration()
-        Returns: a number of minutes represented as a decimal fraction
-        """
-        valid_quarters = (0, 15, 30, 45)
-        if quarter not in valid_quarters:
+        minutes = interval(minute_index(s_time), minute_index(w_time))
+        if minutes % 15:
             transform_logger = logging.getLogger('transform.do_transform')
-            transform_logger.warning('Invalid quarter {} in do_transform.py '
-                                     'quarter_hour_to_decimal()'.
-                                     format(quarter))
-            quarter = Transform.get_closest_quarter(quarter)
-        return Transform.quarter_to_decimal(quarter)
+            transform_logger.warning('Invalid quarter %s in do_transform.py '
+                                     'get_duration()', minutes % 60)
+        return DECIMAL_HOURS[minutes]
 
-    @staticmethod
-    def quarter_to_decimal(quarter):
-        """
-        0 => '.00', 15 => '.25', 30 => '.50', 45 => '.75'
 
-        "pre: quarter % 15 == 0"
-        Called by: _quarter_hour_to_decimal()
-        """
-        return '.' + str(quarter // 3 * 5).zfill(2)
+def main():
+    start_stage_logging('transform.do_transform',
+                        'src/transform/do_transform.log')
 
-    @staticmethod
-    def get_closest_quarter(q):
-        if q < 8:
-            closest_quarter = 0
-        elif 8 <= q < 23:
-            closest_quarter = 15
-        elif 23 <= q < 37:
-            closest_quarter = 30
-        else:
-            closest_quarter = 45
-        return closest_quarter
 
-def main():
-    # from: https://docs.python.org/3/howto/
-    # logging-cookbook.html#network-logging
-    root_logger = logging.getLogger('')
-    root_logger.setLevel(logging.INFO)
-    socket_handler = logging.handlers.SocketHandler('localhost',
-                                                    logging.handlers.
-                                                    DEFAULT_TCP_LOGGING_PORT)
-    # don't bother with a formatter, since a socket handler sends the event as
-    # an unformatted pickle
-    root_logger.addHandler(socket_handler)
-
-    # transform_logger will need a formatter since it is writing to file
-    transform_logger = logging.getLogger('transform.do_transform')
-    transform_logger.setLevel(logging.DEBUG)
-    file_handler = logging.FileHandler('src/transform/do_transform.log',
-                                       mode='w')
-    formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    transform_logger.addHandler(file_handler)
-    transform_logger.propagate = False
+def get_parse_args():
+    """
+    Parse and return the c.l.a.'s
+
+    Called by: __main__()
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--binary', action='store_true',
+                        help='read and write binary records instead of text')
+    date_range.add_arguments(parser)
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
+    args = get_parse_args()
     main()
     logging.info('transform start')
-    t = Transform()
-    t.read_each_line()
+    t = Transform(night_range=date_range.DateRange(args.since, args.until))
+    if args.binary:
+        binary_records.write_fields(
+            t.read_fields(binary_records.read_fields(sys.stdin.buffer)),
+            sys.stdout.buffer)
+    else:
+        t.read_each_line()
     logging.info('transform finish')
@@ -0,0 +1,98 @@
+# file: tests/sample_csv.py
+# andrew jarcho
+# 2026-10-18
+
+"""
+Make synthetic spreadsheets in the layout read by read_fns.Extract,
+for tests and benchmarks.
+"""
+
+import random
+from datetime import date, timedelta
+
+
+HEADER = 'w,Sun,,,Mon,,,Tue,,,Wed,,,Thu,,,Fri,,,Sat,,,,'
+BLANK_ROW = ',' * 23
+
+
+def _mil_time(minutes):
+    return '{}:{:02d}'.format(minutes // 60, minutes % 60)
+
+
+def _hours(minutes):
+    return '{:.2f}'.format(minutes / 60)
+
+
+def make_day_events(rnd, missing_data_rate):
+    """
+    :return: a list of [action, time, hours] segments for one day: a wake
+             from the night, naps, and the start of the next night
+    """
+    events = [['w', _mil_time(rnd.choice((5, 6, 7)) * 60 +
+                              rnd.choice((0, 15, 30, 45))), '']]
+    now = 8 * 60
+    for _ in range(rnd.randint(0, 3)):
+        start = now + rnd.randint(1, 8) * 30
+        length = rnd.randint(1, 6) * 15
+        events.append(['s', _mil_time(start), ''])
+        events.append(['w', _mil_time(start + length), _hours(length)])
+        now = start + length
+    bedtime = rnd.choice((21 * 60 + 45, 22 * 60 + 30, 23 * 60 + 15))
+    complete = rnd.random() >= missing_data_rate
+    events.append(['b', _mil_time(bedtime),
+                   _hours(rnd.randint(24, 36) * 15) if complete else ''])
+    return events
+
+
+def make_csv(weeks, seed=0, missing_data_rate=0.05,
+             first_sunday=date(2016, 12, 4)):
+    """
+    :return: the text of a .csv file holding weeks weeks of data
+    """
+    rnd = random.Random(seed)
+    rows = [HEADER]
+    prev_bedtime = None
+    for week_ix in range(weeks):
+        sunday = first_sunday + timedelta(weeks=week_ix)
+        days = []
+        for _ in range(7):
+            day = make_day_events(rnd, missing_data_rate)
+            if prev_bedtime is not None:  # wake's hours cover the night
+                wake = int(day[0][1].split(':')[0]) * 60 + \
+                    int(day[0][1].split(':')[1])
+                day[0][2] = _hours(wake + 24 * 60 - prev_bedtime)
+            else:
+                day = day[1:]  # no night before the first day
+            bed_h, bed_m = day[-1][1].split(':')
+            prev_bedtime = int(bed_h) * 60 + int(bed_m)
+            days.append(day)
+        for row_ix in range(max(len(day) for day in days)):
+            fields = ['{}/{}/{}'.format(sunday.month, sunday.day,
+                                        sunday.year) if not row_ix else '']
+            for day in days:
+                fields.extend(day[row_ix] if row_ix < len(day)
+                              else ['', '', ''])
+            rows.append(','.join(fields) + ',,')
+        rows.append(BLANK_ROW)
+    rows.append(BLANK_ROW)
+    return '\n'.join(rows) + '\n'
+
+
+def csv_through_day(csv_text, days):
+    """
+    :return: csv_text as it was when it held only its first days days
+    """
+    rows = []
+    days_left = days + 7  # the first date row starts a week
+    for row in csv_text.splitlines():
+        fields = row.split(',')
+        if fields[0][:1].isdigit():
+            days_left -= 7
+            if days_left <= 0:
+                break
+        if days_left < 7:
+            fields[1 + 3 * days_left: 22] = [''] * (21 - 3 * days_left)
+            if not any(fields):
+                continue
+        rows.append(','.join(fields))
+    return '\n'.join(rows + [',' * 23]) + '\n'
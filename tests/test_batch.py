@@ -0,0 +1,58 @@
+# file: tests/test_batch.py
+# andrew jarcho
+# 2026-10-18
+
+import os
+
+from tests.sample_csv import make_csv
+from src import batch, pipeline
+from src.records import Night
+
+
+def write_csvs(tmp_path):
+    sheets = tmp_path / 'sheets'
+    sheets.mkdir()
+    for weeks in (2, 5, 3):
+        (sheets / 'subject{}.csv'.format(weeks)).write_text(
+            make_csv(weeks, seed=weeks))
+    csv_text = make_csv(1)
+    bad_date = csv_text.splitlines()[1].split(',')[0]
+    (sheets / 'broken.csv').write_text(csv_text.replace(bad_date,
+                                                        '2/30/2017', 1))
+    return sheets
+
+
+def test_find_files_takes_directories_and_globs_largest_first(tmp_path):
+    sheets = write_csvs(tmp_path)
+    (sheets / 'notes.txt').write_text('not a sheet')
+    by_dir = batch.find_files([str(sheets)])
+    assert [os.path.basename(name) for name in by_dir] == \
+        ['subject5.csv', 'subject3.csv', 'subject2.csv', 'broken.csv']
+    assert batch.find_files([str(sheets / 'subject*.csv'),
+                             str(sheets / 'subject5.csv')]) == by_dir[:3]
+
+
+def test_log_dir_names_are_unique():
+    assert batch.log_dir_names(['a/s1.csv', 'b/s1.csv', 'a/s2.csv']) == \
+        ['s1', 's1.2', 's2']
+
+
+def test_a_failed_file_does_not_stop_the_others(tmp_path):
+    infile_names = batch.find_files([str(write_csvs(tmp_path))])
+    log_dir = tmp_path / 'logs'
+    results = {os.path.basename(result.infile_name): result
+               for result in batch.run_batch(infile_names, str(log_dir),
+                                             workers=2)}
+    assert results['broken.csv'].error.startswith('ValueError')
+    for infile_name in infile_names[:3]:
+        records = list(pipeline.nights_naps(infile_name))
+        nights = sum(isinstance(record, Night) for record in records)
+        result = results[os.path.basename(infile_name)]
+        assert result.error is None
+        assert (result.nights, result.naps) == \
+            (nights, len(records) - nights)
+    assert (log_dir / 'broken' / 'pipeline.log').read_text().count(
+        'ValueError') >= 1
+    assert 'pipeline finish' in \
+        (log_dir / 'subject5' / 'pipeline.log').read_text()
+    assert (log_dir / 'subject5' / 'read_fns.log').exists()
@@ -0,0 +1,98 @@
+# file: tests/test_binary_records.py
+# andrew jarcho
+# 2026-10-18
+
+import datetime
+import io
+from argparse import Namespace
+
+import pytest
+
+from tests.file_access_wrappers import FakeFileReadWrapper
+from tests.sample_csv import make_csv
+from src import binary_records
+from src.chart.chart_new import Chart
+from src.extract.container_objs import Event
+from src.extract.read_fns import Extract, open_infile
+from src.records import WeekHeader, DayHeader, Night, Nap
+from src.transform.do_transform import Transform
+
+
+def round_trip(records):
+    stream = io.BytesIO()
+    binary_records.write_records(records, stream)
+    stream.seek(0)
+    return list(binary_records.read_records(stream))
+
+
+def test_each_kind_of_record_survives_a_round_trip():
+    records = [WeekHeader(datetime.date(2016, 12, 4)),
+               DayHeader(datetime.date(2016, 12, 4)),
+               Event('b', '23:45', ''), Event('w', '7:15', '7.50'),
+               Event('Y', '22:00', '8.25'), Event('N', '21:30', ''),
+               Night(datetime.date(2016, 12, 4), '23:45', False, True),
+               Nap('13:00', '01.25')]
+    assert round_trip(records) == records
+
+
+def test_text_night_fields_are_read_back_as_they_print():
+    night = Night('2016-12-04', '23:45', 'true', 'false')
+    assert round_trip([night])[0].line() == night.line()
+
+
+def test_records_are_split_into_frames(monkeypatch):
+    monkeypatch.setattr(binary_records, 'MAX_FRAME_RECORDS', 2)
+    stream = io.BytesIO()
+    records = [Nap('13:00', '01.25')] * 5
+    assert binary_records.write_records(records, stream) == 5
+    frame_bytes = binary_records.FRAME_HEADER.size * 3 + \
+        binary_records.RECORD.size * 5
+    assert len(stream.getvalue()) == frame_bytes
+
+
+def test_read_records_raises_on_wrong_version():
+    stream = io.BytesIO(binary_records.FRAME_HEADER.pack(b'SLR', 99, 0))
+    with pytest.raises(ValueError):
+        list(binary_records.read_records(stream))
+
+
+def test_read_records_raises_on_truncated_frame():
+    stream = io.BytesIO()
+    binary_records.write_records([Nap('13:00', '01.25')], stream)
+    with pytest.raises(ValueError):
+        list(binary_records.read_records(io.BytesIO(stream.getvalue()[:-1])))
+
+
+def extract_binary(csv_text):
+    stream = io.BytesIO()
+    binary_records.write_records(
+        Extract(open_infile(FakeFileReadWrapper(csv_text))).records(), stream)
+    return stream.getvalue()
+
+
+def test_transform_read_fields_matches_read_records():
+    data = extract_binary(make_csv(8, missing_data_rate=0.2))
+    expected = list(Transform().read_records(
+        binary_records.read_records(io.BytesIO(data))))
+    out = io.BytesIO()
+    binary_records.write_fields(
+        Transform().read_fields(
+            binary_records.read_fields(io.BytesIO(data))), out)
+    out.seek(0)
+    assert list(binary_records.read_records(out)) == expected
+
+
+def test_chart_reads_binary_file_as_it_reads_text(tmp_path):
+    csv_text = make_csv(4, missing_data_rate=0.2)
+    text_file, binary_file = tmp_path / 'in.txt', tmp_path / 'in.bin'
+    text_out = io.StringIO()
+    Extract(open_infile(FakeFileReadWrapper(csv_text))).lines_in_weeks_out(
+        text_out)
+    text_file.write_text(text_out.getvalue())
+    binary_file.write_bytes(extract_binary(csv_text))
+    triples = [list(Chart(Namespace(debug=True, filename=str(name),
+                                    binary=binary, since=None,
+                                    until=None)).read_file())
+               for name, binary in ((text_file, False), (binary_file, True))]
+    assert triples[0] == triples[1]
+    assert triples[0]
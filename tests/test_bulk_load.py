@@ -0,0 +1,65 @@
+# file: tests/test_bulk_load.py
+# andrew jarcho
+# 2026-10-18
+
+from src.load.bulk_load import stage_rows, CopySource
+from src.load.load import decimal_to_interval, read_records
+
+
+def test_stage_rows_links_naps_to_most_recent_night():
+    lines = ['NIGHT, 2016-12-07, 23:45, false, false\n',
+             'NAP, 23:45, 04.00\n',
+             'NIGHT, 2016-12-08, 23:15, true, false\n',
+             'NAP, 23:15, 02.75\n',
+             'NAP, 03:30, 05.25\n']
+    counts = {}
+    rows = list(stage_rows(read_records(lines), counts, decimal_to_interval))
+    assert rows == [
+        '0\t1\tt\t2016-12-07\t23:45\tfalse\tfalse\t\\N\n',
+        '1\t1\tf\t\\N\t23:45\t\\N\t\\N\t04:00\n',
+        '2\t2\tt\t2016-12-08\t23:15\ttrue\tfalse\t\\N\n',
+        '3\t2\tf\t\\N\t23:15\t\\N\t\\N\t02:45\n',
+        '4\t2\tf\t\\N\t03:30\t\\N\t\\N\t05:15\n']
+    assert counts == {'nights': 2, 'naps': 3}
+
+
+def test_stage_rows_skips_nap_before_first_night():
+    lines = ['NAP, 03:30, 05.25\n',
+             'NIGHT, 2016-12-08, 23:15, false, false\n']
+    counts = {}
+    rows = list(stage_rows(read_records(lines), counts, decimal_to_interval))
+    assert len(rows) == 1
+    assert counts == {'nights': 1, 'naps': 0}
+
+
+def test_read_records_stops_at_first_other_line():
+    lines = ['NIGHT, 2016-12-08, 23:15, false, false\n',
+             '\n',
+             'NIGHT, 2016-12-09, 23:30, false, false\n']
+    assert len(list(read_records(lines))) == 1
+
+
+def test_copy_source_read_returns_requested_sizes():
+    source = CopySource(['abc\n', 'defgh\n', 'ij\n'])
+    assert source.read(5) == 'abc\nd'
+    assert source.read(5) == 'efgh\n'
+    assert source.read(5) == 'ij\n'
+    assert source.read(5) == ''
+
+
+def test_copy_source_read_all():
+    source = CopySource(['abc\n', 'de\n'])
+    assert source.read() == 'abc\nde\n'
+
+
+def test_stage_rows_skips_night_failing_check_with_its_naps():
+    lines = ['NIGHT, 2016-12-07, 23:45, true, true\n',
+             'NAP, 23:45, 04.00\n',
+             'NIGHT, 2016-12-08, 23:15, true, false\n',
+             'NAP, 23:15, 02.75\n']
+    counts = {}
+    rows = list(stage_rows(read_records(lines), counts, decimal_to_interval))
+    assert rows == [
+        '2\t1\tt\t2016-12-08\t23:15\ttrue\tfalse\t\\N\n',
+        '3\t1\tf\t\\N\t23:15\t\\N\t\\N\t02:45\n']
+    assert counts == {'nights': 1, 'naps': 1}
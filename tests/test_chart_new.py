@@ -1,9 +1,15 @@
 # file: test_chart_new.py
 # andrew jarcho
 # 10/2018
+import contextlib
+import io
 import pytest
+from datetime import date
 from unittest.mock import Mock
 from src.chart.chart_new import Chart  # , get_parse_args, ASLEEP, AWAKE, NO_DATA, QS_IN_DAY, Triple
+from src.chart.chart_new import MatrixChart
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
 from argparse import Namespace
 
 
@@ -13,9 +19,9 @@ def my_side_effect(q):
     return q
 
 
-@pytest.fixture("module")
+@pytest.fixture(scope="module")
 def chart():
-    return Chart(Namespace(debug=False,
+    return Chart(Namespace(debug=False, binary=False, since=None, until=None,
                            filename='/home/jazcap53/python_projects'
                                     '/spreadsheet_etl/tests'
                                     '/test_chart_new.py'))
@@ -27,6 +33,115 @@ def test_quarter_too_large(chart):
         chart._get_closest_quarter = Mock(side_effect=my_side_effect(q))
 
 
+def chart_rows(filename, since=None, until=None):
+    my_chart = Chart(Namespace(debug=True, binary=False, filename=filename,
+                               since=since, until=until))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        my_chart.make_output(my_chart.read_file())
+    return [line for line in out.getvalue().splitlines() if '|' in line]
+
+
+def test_range_charts_the_rows_of_a_full_chart(tmp_path):
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(make_csv(6, missing_data_rate=0))) \
+            .lines_in_weeks_out(outfile)
+    full = chart_rows(str(extract_file))
+    in_range = chart_rows(str(extract_file), date(2016, 12, 13),
+                          date(2016, 12, 21))
+    assert [row[:10] for row in in_range] == \
+        ['2016-12-{}'.format(day) for day in range(13, 22)]
+    assert in_range == [row for row in full if row[:10] in
+                        ['2016-12-{}'.format(day) for day in range(13, 22)]]
+
+
+def chart_output(chart_class, filename, debug, since=None, until=None):
+    my_chart = chart_class(Namespace(debug=debug, binary=False,
+                                     filename=filename, since=since,
+                                     until=until))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        my_chart.make_output(my_chart.read_file())
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('debug', [True, False])
+@pytest.mark.parametrize('missing_data_rate, seed', [(0, 0), (0.2, 6)])
+@pytest.mark.parametrize('since, until', [(None, None),
+                                          (date(2016, 12, 13),
+                                           date(2017, 1, 21))])
+def test_matrix_chart_output_matches_chart(tmp_path, debug,
+                                           missing_data_rate, seed, since,
+                                           until):
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(make_csv(
+            10, seed, missing_data_rate))) \
+            .lines_in_weeks_out(outfile)
+    expected = chart_output(Chart, str(extract_file), debug, since, until)
+    assert expected.count('|') > 60
+    assert chart_output(MatrixChart, str(extract_file), debug, since,
+                        until) == expected
+
+
+@pytest.mark.parametrize('chart_class', [Chart, MatrixChart])
+def test_five_minute_rows_repeat_each_quarter_three_times(tmp_path,
+                                                          chart_class):
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(make_csv(10, 6, 0.2))).lines_in_weeks_out(outfile)
+    quarters = chart_output(Chart, str(extract_file), True).splitlines()
+    chart = chart_class(Namespace(debug=True, binary=False,
+                                  filename=str(extract_file), since=None,
+                                  until=None), 5)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        chart.make_output(chart.read_file())
+    fives = out.getvalue().splitlines()
+    assert len(fives) == len(quarters)
+    for five, quarter in zip(fives, quarters):
+        if '|' in quarter:
+            day, row = quarter.split(' |')
+            assert five.lower() == day + ' |' + \
+                ''.join(3 * symbol for symbol in row[:-1].lower()) + '|'
+            assert five[12:-1:12] == row[:-1:4]
+        else:
+            assert five == chart.create_ruler()
+
+
+def test_one_minute_rows_keep_minutes_off_the_quarter(tmp_path):
+    extract_file = tmp_path / 'extract.txt'
+    extract_file.write_text('\n'.join([
+        'Week of Sunday, 2016-12-04:', '=' * 26,
+        '    2016-12-04', 'action: b, time: 1:07, hours: 1.87',
+        'action: w, time: 2:59, hours: 1.87',
+        'action: s, time: 13:01', 'action: w, time: 13:04, hours: 0.05',
+        'action: b, time: 23:58, hours: 0.07',
+        '    2016-12-05', 'action: w, time: 0:02, hours: 0.07', '']))
+    chart = MatrixChart(Namespace(debug=False, binary=False,
+                                  filename=str(extract_file), since=None,
+                                  until=None), 1)
+    chart.fill_matrix(chart.read_file())
+    row = chart.row_codes(0).decode()
+    assert row.index('x') == 67 and row.index('o', 67) == 179
+    assert row[781:784] == 'xxx' and row[780] == row[784] == 'o'
+    assert row[1438:] == 'xx' and chart.row_codes(1)[:2] == b'xx'
+    assert len(chart.matrix) == 2 * 1440 // 4
+
+
+def test_matrix_rows_are_packed_2_bits_to_a_slot():
+    chart = MatrixChart(Namespace(debug=False, binary=False, filename=None,
+                                  since=None, until=None), 5)
+    chart.output_date = '2016-12-04'
+    rows = [b'xo-x' * 72, b'-' * 286 + b'xx', b'o' * 288]
+    for row in rows:
+        chart._write_output(bytearray(row))
+    assert len(chart.matrix) == 3 * 72
+    assert chart.matrix[72:] == bytes([0b1010_1010] * 71 + [0b0000_1010]) \
+        + bytes([0b0101_0101] * 72)
+    assert list(chart.rows()) == rows
+
 
 # from collections import namedtuple
 # from tests.file_access_wrappers import FakeFileReadWrapper
@@ -0,0 +1,226 @@
+# file: tests/test_chunked_load.py
+# andrew jarcho
+# 2026-10-18
+
+from datetime import date
+
+import pytest
+
+from src.load import chunked_load
+from src.load.chunked_load import (MarkMismatchError, chunks,
+                                   store_in_chunks)
+from src.load.load import (LoadOptions, mark_source, read_records,
+                           store_records)
+from src.records import Nap, Night
+
+
+def make_records(nights):
+    lines = []
+    for day in range(1, nights + 1):
+        lines.append('NIGHT, 2017-01-{:02}, 23:15, false, false\n'.format(day))
+        lines += ['NAP, 04:30, 01.25\n'] * (day % 3)
+    return list(read_records(lines))
+
+
+class FakeDb:
+    """ Holds committed records, with their night ids, and marks """
+    def __init__(self):
+        self.stored = []  # (night_id, record); None for a nap
+        self.marks = {}
+        self.next_id = 1  # as sl_night_night_id_seq
+
+    def records(self):
+        return [record for _, record in self.stored]
+
+    def delete_night(self, night_id):
+        """ Delete the night with night_id, and its naps """
+        ids = [row[0] for row in self.stored]
+        if night_id in ids:
+            start = ids.index(night_id)
+            end = next((ix for ix in range(start + 1, len(ids))
+                        if ids[ix] is not None), len(ids))
+            del self.stored[start:end]
+
+
+class FakeTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.pending = []
+        self.connection.pending_mark = None
+        self.connection.pending_delete = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            db = self.connection.db
+            if self.connection.pending_delete is not None:
+                db.delete_night(self.connection.pending_delete)
+            db.stored.extend(self.connection.pending)
+            if self.connection.pending_mark:
+                source, *mark = self.connection.pending_mark
+                db.marks[source] = tuple(mark)
+        return False
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+    def scalar(self):
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def begin(self):
+        return FakeTransaction(self)
+
+    def store(self, record):
+        night_id = None
+        if isinstance(record, Night):
+            night_id, self.db.next_id = self.db.next_id, self.db.next_id + 1
+        self.pending.append((night_id, record))
+
+    def execute(self, statement, *params):
+        if statement == chunked_load.READ_MARK:
+            return FakeResult(self.db.marks.get(params[0]))
+        if statement == chunked_load.WRITE_MARK:
+            self.pending_mark = params
+        if statement == chunked_load.DELETE_MARKED_NIGHT:
+            self.pending_delete = params[0]
+        if statement == chunked_load.MARKED_NIGHT_ID:
+            return FakeResult(max(
+                (night_id for night_id, record in self.pending
+                 if night_id and str(record.start_date) == params[0] and
+                 record.start_time == params[1]), default=None))
+        return FakeResult(None)
+
+
+class FakeEngine:
+    def __init__(self, db):
+        self.db = db
+
+    def connect(self):
+        return FakeConnection(self.db)
+
+
+def fail_at(date):
+    def load_records(connection, records, bulk):
+        for record in records:
+            if isinstance(record, Night) and record.start_date == date:
+                raise ValueError('cannot load ' + date)
+            connection.store(record)
+    return load_records
+
+
+def test_chunks_hold_nights_with_their_naps():
+    records = [Nap('04:30', '01.25')] + make_records(7)
+    parts = list(chunks(records, 3))
+    assert [sum(isinstance(record, Night) for record in part)
+            for part in parts] == [3, 3, 1]
+    assert [record for part in parts for record in part] == records
+    assert isinstance(parts[0][0], Nap)
+    assert all(isinstance(part[0], Night) for part in parts[1:])
+
+
+def test_failed_load_resumes_after_last_committed_chunk():
+    db = FakeDb()
+    records = make_records(10)
+    with pytest.raises(ValueError):
+        store_in_chunks(FakeEngine(db), records, fail_at('2017-01-08'), 'in',
+                        nights=3)
+    assert db.records() == make_records(6)
+    assert db.marks['in'] == ('2017-01-06', len(make_records(5)), 6)
+    stored = store_in_chunks(FakeEngine(db), records, fail_at(''), 'in',
+                             nights=3)
+    assert db.records() == records
+    assert stored == len(records) - len(make_records(5))
+    # nights 7 and 8 took ids 7 and 8 in the failed load, as nextval()
+    assert db.marks['in'] == ('2017-01-10', len(make_records(9)), 12)
+
+
+def test_loading_a_grown_input_stores_the_last_night_and_new_records():
+    db = FakeDb()
+    store_in_chunks(FakeEngine(db), make_records(4), fail_at(''), 'in')
+    assert store_in_chunks(FakeEngine(db), make_records(9), fail_at(''),
+                           'in', nights=2) == \
+        len(make_records(9)) - len(make_records(3))
+    assert db.records() == make_records(9)
+
+
+def test_nap_added_to_the_last_night_is_stored_with_it():
+    db = FakeDb()
+    records = make_records(4)
+    store_in_chunks(FakeEngine(db), records, fail_at(''), 'in')
+    grown = records + [Nap('14:00', '00.50')]
+    chunks_loaded = []
+
+    def load_records(connection, records, bulk):
+        chunks_loaded.append(records)
+        fail_at('')(connection, records, bulk)
+
+    assert store_in_chunks(FakeEngine(db), grown, load_records, 'in') == \
+        len(grown) - len(make_records(3))
+    assert chunks_loaded[0][0] == records[len(make_records(3))]
+    assert db.records() == grown
+    assert db.marks['in'] == ('2017-01-04', len(make_records(3)), 5)
+
+
+def test_resume_leaves_another_sources_night_of_the_same_date():
+    db = FakeDb()
+    records = make_records(4)
+    store_in_chunks(FakeEngine(db), records, fail_at(''), 'in')
+    last_night = records[len(make_records(3)):]
+    store_in_chunks(FakeEngine(db), last_night, fail_at(''), 'other')
+    grown = records + [Nap('14:00', '00.50')]
+    store_in_chunks(FakeEngine(db), grown, fail_at(''), 'in')
+    assert db.records() == \
+        make_records(3) + last_night + grown[len(make_records(3)):]
+    assert db.stored[len(make_records(3))][0] == db.marks['other'][2] == 5
+
+
+def test_mark_passes_over_a_night_that_fails_the_check():
+    db = FakeDb()
+    unstorable = Night('2017-01-03', '23:15', 'true', 'true')
+    store_in_chunks(FakeEngine(db), make_records(2) + [unstorable],
+                    fail_at(''), 'in')
+    assert db.marks['in'] == ('2017-01-02', len(make_records(1)), 2)
+
+
+def test_chunked_load_needs_a_source():
+    assert mark_source('-') is None
+    assert mark_source('-', 'feed') == 'feed'
+    assert mark_source('sheet.csv') == 'sheet.csv'
+    with pytest.raises(ValueError):
+        store_records(None, make_records(2), LoadOptions(chunk_nights=3))
+
+
+def test_changed_input_does_not_match_mark():
+    db = FakeDb()
+    store_in_chunks(FakeEngine(db), make_records(4), fail_at(''), 'in')
+    with pytest.raises(MarkMismatchError):
+        store_in_chunks(FakeEngine(db), make_records(9)[2:], fail_at(''),
+                        'in')
+    assert db.records() == make_records(4)
+
+
+def test_resume_matches_mark_for_records_with_dates():
+    db = FakeDb()
+    records = [Night(date(2017, 1, day), '23:15', False, False)
+               for day in range(1, 6)]
+    store_in_chunks(FakeEngine(db), records[:3], fail_at(''), 'in')
+    assert store_in_chunks(FakeEngine(db), records, fail_at(''), 'in') == 3
+    assert db.records() == records
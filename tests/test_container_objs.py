@@ -4,9 +4,11 @@
 
 
 from datetime import date, timedelta
+import pickle
 import pytest
 
-from src.extract.container_objs import validate_segment, Event, Day, Week
+from src.extract.container_objs import validate_segment, Event, Day, Week, \
+    EventColumns
 
 
 # test validate_segment()
@@ -123,3 +125,47 @@ def test_days_two_thru_seven_of_Week_have_no_Sunday(make_week):
         return make_week[x].dt_date.weekday == 6
     # f = lambda x: make_week[x].dt_date.weekday() == 6
     assert not any(f(x) for x in range(1, 7))
+
+
+# test Week's EventColumns
+
+def test_Week_ctor_copies_Day_events_into_columns():
+    days = [Day(date(2017, 1, 15) + timedelta(days=x), []) for x in range(7)]
+    days[2].events.append(Event('b', '23:45', ''))
+    days[3].events.append(Event('w', '7:15', '7.50'))
+    week = Week(*days)
+    assert len(week.columns) == 2
+    assert week.Tuesday.events == [Event('b', '23:45', '')]
+    assert list(week[3].events) == [Event('w', '7:15', '7.50')]
+    assert week[0].events == []
+
+
+def test_Week_starting_makes_empty_Week_without_checks():
+    week = Week.starting(date(2017, 1, 15))
+    assert [day.dt_date for day in week] == \
+        [date(2017, 1, 15) + timedelta(days=x) for x in range(7)]
+    assert all(len(day.events) == 0 for day in week)
+
+
+def test_appending_to_Week_Day_events_stores_in_columns():
+    week = Week.starting(date(2017, 1, 15))
+    week[6].events.append(Event('s', '13:15', ''))
+    week[6].events.append(Event('w', '14:00', '0.75'))
+    assert week[6].events[-1] == Event('w', '14:00', '0.75')
+    assert len(week.Saturday.events) == 2
+
+
+def test_EventColumns_normalizes_hours_and_keeps_odd_times():
+    columns = EventColumns()
+    columns.append(0, 'b', '07:05', '6.5')
+    columns.append(0, 'w', '7:05', '6.50')
+    assert columns.event(0) == Event('b', '07:05', '6.50')
+    assert columns.event(1) == Event('w', '7:05', '6.50')
+    assert columns.odd_times == {0: '07:05'}
+    assert pickle.loads(pickle.dumps(columns)).event(0) == columns.event(0)
+
+
+def test_Week_pickles_with_its_events():
+    week = Week.starting(date(2017, 1, 15))
+    week[1].events.append(Event('b', '22:30', '8.25'))
+    assert pickle.loads(pickle.dumps(week)) == week
@@ -0,0 +1,45 @@
+# file: tests/test_date_range.py
+# andrew jarcho
+# 2026-10-18
+
+from datetime import date
+
+from container_objs import Event
+from src.date_range import DateRange
+from src.records import DayHeader, Nap, Night, WeekHeader
+
+
+def day(n):
+    return DayHeader(date(2017, 1, n))
+
+
+def test_extract_records_yields_the_nights_starting_in_range():
+    records = [WeekHeader(date(2017, 1, 1)),
+               day(1), Event('w', '6:00', '8.00'), Event('b', '22:00', ''),
+               day(2), Event('w', '6:00', '8.00'), Event('s', '13:00', ''),
+               Event('w', '14:00', '1.00'), Event('N', '22:30', ''),
+               day(3), Event('Y', '23:00', ''),
+               day(4), Event('w', '7:00', '8.00'), Event('b', '23:00', ''),
+               day(5), Event('w', '7:00', '8.00')]
+    in_range = list(DateRange(date(2017, 1, 2), date(2017, 1, 3))
+                    .extract_records(iter(records)))
+    assert in_range == records[:1] + records[4:5] + records[8:13]
+
+
+def test_extract_records_without_a_range_yields_everything():
+    records = [WeekHeader(date(2017, 1, 1)), day(1),
+               Event('b', '22:00', '')]
+    assert list(DateRange().extract_records(records)) == records
+
+
+def test_night_naps_keeps_each_nap_with_its_night():
+    records = [Night('2017-01-01', '22:00', 'false', 'false'),
+               Nap('22:00', '08.00'),
+               Night('2017-01-02', '22:30', 'false', 'false'),
+               Nap('22:30', '07.50'), Nap('13:00', '01.00'),
+               Night('2017-01-03', '23:00', 'false', 'false'),
+               Nap('23:00', '08.00')]
+    assert list(DateRange(date(2017, 1, 2), date(2017, 1, 2))
+                .night_naps(records)) == records[2:5]
+    assert list(DateRange(since=date(2017, 1, 3)).night_naps(records)) == \
+        records[5:]
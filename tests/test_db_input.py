@@ -0,0 +1,97 @@
+# file: tests/test_db_input.py
+# andrew jarcho
+# 2026-10-18
+
+import contextlib
+import datetime
+import io
+from argparse import Namespace
+
+import pytest
+
+from src.binary_records import DAY, EVENT
+from src.chart import db_input
+from src.chart.chart_new import Chart
+from src.extract.read_fns import Extract
+from src.records import Night
+from src.time_kernel import DECIMAL_INTERVAL, minute_index
+from src.transform.do_transform import Transform
+from tests.sample_csv import make_csv
+
+
+def stored_rows(records):
+    """
+    :return: the rows read_rows() would give once records were loaded:
+             naps go with the last night, and are dropped before the first
+    """
+    def to_time(hh_mm):
+        return datetime.time(*divmod(minute_index(hh_mm), 60))
+
+    rows = []
+    night = None
+    for record in records:
+        if isinstance(record, Night):
+            night = (len(rows) + 1, record.start_date,
+                     to_time(record.start_time), record.start_no_data,
+                     record.end_no_data)
+            rows.append(night + (None, None))
+        elif night is not None:
+            nap = (to_time(record.start_time), datetime.timedelta(
+                minutes=DECIMAL_INTERVAL[record.duration]))
+            if rows[-1][0] == night[0] and rows[-1][5] is None:
+                rows[-1] = night + nap
+            else:
+                rows.append(night + nap)
+    return rows
+
+
+def chart_output(read, since=None, until=None, filename=None):
+    chart = Chart(Namespace(debug=True, binary=False, filename=filename,
+                            since=since, until=until))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        chart.make_output(read(chart))
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('since, until', [(None, None),
+                                          (datetime.date(2016, 12, 20),
+                                           datetime.date(2017, 1, 14))])
+def test_chart_from_db_rows_matches_chart_from_file(tmp_path, monkeypatch,
+                                                    since, until):
+    csv_text = make_csv(10, missing_data_rate=0.2)
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(csv_text)).lines_in_weeks_out(outfile)
+    rows = stored_rows(Transform().read_records(
+        Extract(io.StringIO(csv_text)).records()))
+    queried = []
+
+    def read_rows(engine, first, last, fetch_size):
+        queried.append((first, last))
+        return iter(rows)
+
+    monkeypatch.setattr(db_input, 'read_rows', read_rows)
+    expected = chart_output(Chart.read_file, since, until,
+                            str(extract_file))
+    assert chart_output(lambda chart: chart.read_db(None), since,
+                        until) == expected
+    assert queried == [(since and '2016-12-19', until and '2017-01-15')]
+
+
+def test_rows_to_fields_dates_events_after_midnight():
+    rows = [(1, datetime.date(2017, 3, 4), datetime.time(23, 0), False,
+             False, datetime.time(23, 0), datetime.timedelta(hours=7)),
+            (1, datetime.date(2017, 3, 4), datetime.time(23, 0), False,
+             False, datetime.time(13, 0), datetime.timedelta(hours=1)),
+            (2, datetime.date(2017, 3, 7), datetime.time(1, 0), True,
+             False, None, None)]
+    day = datetime.date(2017, 3, 4).toordinal()
+    events = [(kind, code, ordinal, minute)
+              for kind, code, ordinal, minute, _ in
+              db_input.rows_to_fields(rows)]
+    assert events == [(DAY, 0, day, 0), (EVENT, 0, 0, 23 * 60),
+                      (DAY, 0, day + 1, 0), (EVENT, 2, 0, 6 * 60),
+                      (EVENT, 1, 0, 13 * 60), (EVENT, 2, 0, 14 * 60),
+                      (DAY, 0, day + 2, 0), (DAY, 0, day + 3, 0),
+                      (EVENT, 3, 0, 60)]
@@ -2,7 +2,13 @@
 # andrew jarcho
 # 2017-03-15
 
+import io
+from datetime import date
+
 from tests.file_access_wrappers import FakeFileReadWrapper
+from tests.sample_csv import make_csv
+from src.date_range import DateRange
+from src.extract.read_fns import Extract
 from src.transform.do_transform import Transform
 
 
@@ -64,3 +70,27 @@ def test_read_date_b_date_w_sets_last_date_to_2nd_date():
     my_transform = Transform(file_wrapper)
     my_transform.read_each_line()
     assert my_transform.last_date == '2016-12-08'
+
+
+def test_get_duration_wraps_past_midnight():
+    assert Transform.get_duration('06:15', '22:30') == '07.75'
+
+
+def test_get_duration_rounds_to_quarter_hour():
+    assert Transform.get_duration('01:10', '00:00') == '01.25'
+
+
+def test_night_range_keeps_only_its_nights_and_their_naps(capsys):
+    night_range = DateRange(date(2016, 12, 15), date(2016, 12, 24))
+    extract_out = io.StringIO()
+    Extract(io.StringIO(make_csv(5, missing_data_rate=0.2))) \
+        .lines_in_weeks_out(extract_out)
+    Transform(FakeFileReadWrapper(extract_out.getvalue())).read_each_line()
+    full = capsys.readouterr().out.splitlines()
+    Transform(FakeFileReadWrapper(extract_out.getvalue()),
+              night_range).read_each_line()
+    in_range = capsys.readouterr().out.splitlines()
+    assert in_range[0].startswith('NIGHT, 2016-12-15, ')
+    first = full.index(in_range[0])
+    assert full[first:first + len(in_range)] == in_range
+    assert full[first + len(in_range)].startswith('NIGHT, 2016-12-25, ')
@@ -0,0 +1,67 @@
+# file: tests/test_follow.py
+# andrew jarcho
+# 2026-10-18
+
+import contextlib
+import io
+from argparse import Namespace
+
+import pytest
+
+from src import binary_records
+from src.chart.chart_new import Chart
+from src.chart.follow import FollowedFile
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
+
+
+class Stop(Exception):
+    pass
+
+
+def chart_rows(filename, binary, follow=None, out=None):
+    chart = Chart(Namespace(debug=True, binary=binary, filename=filename,
+                            since=None, until=None))
+    out = out or io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.suppress(Stop):
+        chart.make_output(chart.read_file(follow))
+    return [line for line in out.getvalue().splitlines() if '|' in line]
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_follow_charts_rows_as_the_file_grows(tmp_path, monkeypatch, binary):
+    csv_text = make_csv(6, missing_data_rate=0.2)
+    if binary:  # in frames of 50 records, as a live writer might flush
+        out = io.BytesIO()
+        records = list(Extract(io.StringIO(csv_text)).records())
+        for start in range(0, len(records), 50):
+            binary_records.write_records(records[start:start + 50], out)
+    else:
+        out = io.StringIO()
+        Extract(io.StringIO(csv_text)).lines_in_weeks_out(out)
+    data = out.getvalue()
+    full_file = tmp_path / 'full'
+    growing_file = tmp_path / 'growing'
+    mode = 'b' if binary else ''
+    with open(str(full_file), 'w' + mode) as outfile:
+        outfile.write(data)
+    chunks = [data[start:start + 997] for start in range(0, len(data), 997)]
+    chunks_left = iter(chunks)
+    printed = io.StringIO()
+    rows_at = []  # the rows printed when each chunk is appended
+
+    def wait(self):
+        chunk = next(chunks_left, None)
+        if chunk is None:
+            raise Stop
+        rows_at.append(printed.getvalue().count('\n'))
+        with open(str(growing_file), 'a' + mode) as outfile:
+            outfile.write(chunk)
+
+    growing_file.write_bytes(b'')
+    monkeypatch.setattr(FollowedFile, 'wait', wait)
+    expected = chart_rows(str(full_file), binary)
+    followed = chart_rows(str(growing_file), binary, 0.1, printed)
+    assert followed == expected[:len(followed)]
+    assert len(followed) >= len(expected) - 1
+    assert 0 < rows_at[len(chunks) // 2] < len(followed)
@@ -0,0 +1,98 @@
+# file: tests/test_log_setup.py
+# andrew jarcho
+# 2026-10-18
+
+import logging
+import pickle
+import queue
+import socket
+import struct
+
+from src.log_setup import (BatchQueueListener, BatchSocketHandler,
+                           RepeatQueueHandler, repeats)
+
+
+def make_record(msg, args=(), **extra):
+    record = logging.makeLogRecord({'name': 'extract.read_fns', 'msg': msg,
+                                    'args': args, 'levelno': logging.WARNING,
+                                    'levelname': 'WARNING'})
+    record.__dict__.update(extra)
+    return record
+
+
+def drain(record_queue):
+    records = []
+    while not record_queue.empty():
+        records.append(record_queue.get_nowait())
+    return records
+
+
+def test_repeats_in_a_group_are_folded_into_a_summary():
+    record_queue = queue.SimpleQueue()
+    handler = RepeatQueueHandler(record_queue)
+    summary = 'segment invalid ×{:,} in week {}'
+    for week in ('2019-03-03',) * 3 + ('2019-03-10',):
+        handler.handle(make_record('segment %s not valid', (['q'],),
+                                   **repeats(summary, week)))
+    messages = [record.getMessage() for record in drain(record_queue)]
+    assert messages == ["segment ['q'] not valid",
+                        'segment invalid ×3 in week 2019-03-03',
+                        "segment ['q'] not valid"]
+
+
+def test_flush_repeats_emits_pending_summaries():
+    record_queue = queue.SimpleQueue()
+    handler = RepeatQueueHandler(record_queue)
+    for _ in range(2):
+        handler.handle(make_record('bad', **repeats('bad ×{} on {}', 1)))
+    handler.flush_repeats()
+    assert drain(record_queue)[-1].getMessage() == 'bad ×2 on 1'
+
+
+def test_queue_handler_leaves_message_unformatted():
+    record_queue = queue.SimpleQueue()
+    RepeatQueueHandler(record_queue).handle(make_record('date %s', ('x',)))
+    record = record_queue.get_nowait()
+    assert (record.msg, record.args) == ('date %s', ('x',))
+
+
+class BatchRecorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def emit_batch(self, records):
+        self.batches.append(records)
+
+
+def test_listener_passes_records_to_emit_batch_in_batches():
+    record_queue = queue.SimpleQueue()
+    recorder = BatchRecorder()
+    listener = BatchQueueListener(record_queue, recorder)
+    for ix in range(10):
+        record_queue.put(make_record('record %s', (ix,)))
+    listener.start()
+    listener.stop()
+    assert [record.args[0] for batch in recorder.batches
+            for record in batch] == list(range(10))
+    assert len(recorder.batches) < 10
+
+
+def test_batch_socket_handler_keeps_the_socket_handler_wire_format():
+    handler = BatchSocketHandler('localhost', 0)
+    handler.sock, receiver = socket.socketpair()
+    handler.emit_batch([make_record('one'), make_record('two %s', (2,))])
+    handler.close()
+    data = b''
+    while True:
+        chunk = receiver.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    receiver.close()
+    messages = []
+    while data:
+        length = struct.unpack('>L', data[:4])[0]
+        messages.append(pickle.loads(data[4: 4 + length])['msg'])
+        data = data[4 + length:]
+    assert messages == ['one', 'two 2']
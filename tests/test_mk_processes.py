@@ -0,0 +1,34 @@
+# file: tests/test_mk_processes.py
+# andrew jarcho
+# 2026-10-18
+
+import asyncio
+
+from src.mk_processes import Stage, start_piped, report
+
+
+def test_start_piped_connects_stdout_to_next_stdin(capfd):
+    stages = [Stage('first', ['printf', 'b\\na\\n']),
+              Stage('second', ['sort'])]
+
+    async def run():
+        await start_piped(stages)
+        return [await stage.wait() for stage in stages]
+
+    assert asyncio.run(run()) == [0, 0]
+    assert capfd.readouterr().out == 'a\nb\n'
+    assert all(stage.seconds >= 0 for stage in stages)
+
+
+def test_report_returns_1_if_any_stage_failed(capsys):
+    ok, failed = Stage('extract', []), Stage('load', [])
+    ok.returncode, ok.seconds = 0, 0.25
+    failed.returncode, failed.seconds = 1, 0.5
+    assert report([ok, failed]) == 1
+    assert 'load           1     0.500' in capsys.readouterr().err
+
+
+def test_report_returns_0_if_all_stages_succeeded(capsys):
+    ok = Stage('extract', [])
+    ok.returncode, ok.seconds = 0, 0.25
+    assert report([ok]) == 0
@@ -0,0 +1,108 @@
+# file: tests/test_parallel_load.py
+# andrew jarcho
+# 2026-10-18
+
+import pytest
+
+from src.load.load import read_records
+from src.load.parallel_load import partition, store_in_parallel
+from src.records import Nap, Night
+
+
+def make_records(nights):
+    lines = []
+    for day in range(1, nights + 1):
+        lines.append('NIGHT, 2017-01-{:02}, 23:15, false, false\n'.format(day))
+        lines += ['NAP, 04:30, 01.25\n'] * (day % 3)
+    return list(read_records(lines))
+
+
+class FakeTransaction:
+    def __init__(self, log, two_phase):
+        self.log = log
+        self.is_active = True
+        self.two_phase = two_phase
+
+    def prepare(self):
+        self.log.append('prepare')
+
+    def commit(self):
+        self.is_active = False
+        self.log.append('commit')
+
+    def rollback(self):
+        self.is_active = False
+        self.log.append('rollback')
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+        self.closed = False
+
+    def begin(self):
+        return FakeTransaction(self.log, False)
+
+    def begin_twophase(self):
+        return FakeTransaction(self.log, True)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEngine:
+    def __init__(self):
+        self.log = []
+        self.connections = []
+
+    def connect(self):
+        self.connections.append(FakeConnection(self.log))
+        return self.connections[-1]
+
+
+def test_partitions_split_before_nights_only():
+    records = make_records(20)
+    parts = partition(records, 4)
+    assert len(parts) == 4
+    assert [record for part in parts for record in part] == records
+    assert all(isinstance(part[0], Night) for part in parts)
+    assert max(map(len, parts)) - min(map(len, parts)) <= 4
+
+
+def test_partition_leading_naps_stay_in_first_partition():
+    records = [Nap('04:30', '01.25')] + make_records(3)
+    parts = partition(records, 8)
+    assert len(parts) == 3
+    assert parts[0] == records[:3]
+    assert partition([], 4) == []
+
+
+@pytest.mark.parametrize('two_phase', [False, True])
+def test_store_in_parallel_commits_all_partitions(two_phase):
+    engine = FakeEngine()
+    loaded = []
+
+    def load_records(connection, records, bulk):
+        loaded.append(records)
+
+    records = make_records(12)
+    store_in_parallel(engine, iter(records), load_records, 3,
+                      two_phase=two_phase)
+    loaded.sort(key=lambda part: part[0].start_date)
+    assert [record for part in loaded for record in part] == records
+    assert len(engine.connections) == 3
+    assert all(connection.closed for connection in engine.connections)
+    assert engine.log == ['prepare'] * 3 * two_phase + ['commit'] * 3
+
+
+def test_store_in_parallel_failure_rolls_back_every_partition():
+    engine = FakeEngine()
+
+    def load_records(connection, records, bulk):
+        if records[0].start_date == '2017-01-05':
+            raise ValueError('bad partition')
+
+    with pytest.raises(ValueError, match='bad partition'):
+        store_in_parallel(engine, make_records(12), load_records, 3)
+    assert engine.log == ['rollback'] * 3
+    assert all(connection.closed for connection in engine.connections)
@@ -0,0 +1,37 @@
+# file: tests/test_pipeline.py
+# andrew jarcho
+# 2026-10-18
+
+import io
+
+from tests.file_access_wrappers import FakeFileReadWrapper
+from tests.sample_csv import make_csv
+from src.extract.read_fns import Extract, open_infile
+from src.transform.do_transform import Transform
+from src import pipeline
+
+
+def text_pipeline(csv_text, capsys):
+    extract_out = io.StringIO()
+    Extract(open_infile(FakeFileReadWrapper(csv_text))).lines_in_weeks_out(
+        extract_out)
+    Transform(FakeFileReadWrapper(extract_out.getvalue())).read_each_line()
+    return capsys.readouterr().out.splitlines()
+
+
+def test_fused_records_match_text_pipeline(capsys):
+    csv_text = make_csv(8, missing_data_rate=0.2)
+    expected = text_pipeline(csv_text, capsys)
+    extract = Extract(open_infile(FakeFileReadWrapper(csv_text)))
+    fused = [r.line() for r in Transform().read_records(extract.records())]
+    assert fused == expected
+    assert any(line.endswith('true, false') for line in fused)
+
+
+def test_nights_naps_reads_named_file(tmp_path, capsys):
+    csv_text = make_csv(3)
+    csv_file = tmp_path / 'sleep.csv'
+    csv_file.write_text(csv_text)
+    expected = text_pipeline(csv_text, capsys)
+    records = pipeline.nights_naps(str(csv_file))
+    assert [r.line() for r in records] == expected
@@ -0,0 +1,135 @@
+# file: tests/test_pipelined_load.py
+# andrew jarcho
+# 2026-10-18
+
+import logging
+import threading
+import time
+
+import pytest
+
+from src.load.load import decimal_to_interval, read_records
+from src.load.pipelined_load import (INSERT_NAP, INSERT_NIGHT,
+                                     SELECT_CALLS, param_batches,
+                                     store_pipelined)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, statements, params):
+        if self.db.fail_at is not None and \
+                len(self.db.executed) == self.db.fail_at:
+            raise RuntimeError('server gone')
+        self.db.executed.append((statements, list(params)))
+        self.rows = [(self.db.result,)] * statements.count('sl_insert_')
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeTransaction:
+    def __init__(self, db):
+        self.db = db
+
+    def commit(self):
+        self.db.ended = 'commit'
+
+    def rollback(self):
+        self.db.ended = 'rollback'
+
+
+class FakeDb:
+    """ Stands for the engine, its connection, and the DBAPI connection """
+    def __init__(self, fail_at=None, result=None):
+        self.fail_at = fail_at
+        self.result = result
+        self.executed = []
+        self.ended = None
+        self.connection = self
+
+    def connect(self):
+        return self
+
+    def begin(self):
+        return FakeTransaction(self)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+def make_lines(nights):
+    lines = []
+    for day in range(1, nights + 1):
+        lines.append('NIGHT, 2017-01-{:02}, 23:15, false, false\n'.format(day))
+        lines += ['NAP, 04:30, 01.25\n'] * (day % 3)
+    return lines
+
+
+def test_param_batches_keep_input_order():
+    records = read_records(make_lines(2))
+    batches = list(param_batches(records, 2, decimal_to_interval))
+    night_nap = SELECT_CALLS.format(INSERT_NIGHT + ', ' + INSERT_NAP)
+    assert batches == [
+        (night_nap,
+         ['2017-01-01', '23:15', 'false', 'false', '04:30', '01:15'], 2),
+        (night_nap,
+         ['2017-01-02', '23:15', 'false', 'false', '04:30', '01:15'], 2),
+        (SELECT_CALLS.format(INSERT_NAP), ['04:30', '01:15'], 1)]
+
+
+def test_store_pipelined_sends_every_batch_and_commits():
+    db = FakeDb()
+    lines = make_lines(20)
+    times = store_pipelined(db, read_records(lines), decimal_to_interval,
+                            batch_size=7, queue_depth=2)
+    assert db.ended == 'commit'
+    assert (times.records, times.batches) == (len(lines), len(db.executed))
+    assert db.executed == list(
+        batch[:2] for batch in param_batches(read_records(lines), 7,
+                                             decimal_to_interval))
+    assert min(times) >= 0
+
+
+@pytest.mark.parametrize('result, logged', [
+    ('error inserting nap into db', True), (None, False), ('', False)])
+def test_store_pipelined_logs_the_calls_results(caplog, result, logged):
+    caplog.set_level(logging.DEBUG, logger='load.pipelined_load')
+    store_pipelined(FakeDb(result=result), read_records(make_lines(2)),
+                    decimal_to_interval, batch_size=2)
+    results = [record for record in caplog.records
+               if record.levelno == logging.DEBUG]
+    assert bool(results) == logged
+    assert all(record.getMessage() == result for record in results)
+
+
+def test_store_pipelined_rolls_back_when_parsing_fails():
+    db = FakeDb()
+    lines = make_lines(5) + ['NAP, 04:30\n']  # a Nap without a duration
+    with pytest.raises(TypeError):
+        store_pipelined(db, read_records(lines), decimal_to_interval,
+                        batch_size=3)
+    assert db.ended == 'rollback'
+
+
+def test_store_pipelined_stops_the_parser_when_the_db_fails():
+    db = FakeDb(fail_at=1)
+    records = read_records(make_lines(31) * 20)
+    with pytest.raises(RuntimeError):
+        store_pipelined(db, records, decimal_to_interval, batch_size=2,
+                        queue_depth=1)
+    assert db.ended == 'rollback'
+    for _ in range(50):
+        if not any(thread.name == 'load-parser'
+                   for thread in threading.enumerate()):
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail('the parser thread did not stop')
@@ -4,15 +4,21 @@
 
 import io
 import re
-import sys
+from collections import Counter
 import datetime
 import pytest
 from datetime import date
 
 from tests.file_access_wrappers import FakeFileReadWrapper
+from tests.sample_csv import BLANK_ROW, csv_through_day, make_csv
 from src.extract.read_fns import open_infile
-from src.extract.read_fns import Extract
+from src.extract.read_fns import (ChangedWeeksExtract, Extract,
+                                  IncrementalExtract, MappedExtract,
+                                  ParallelExtract)
 from container_objs import Event, Day, Week
+from src.date_range import DateRange
+from src.records import WeekHeader, DayHeader, Night
+from src.transform.do_transform import Transform
 
 
 @pytest.fixture
@@ -140,15 +146,6 @@ def test_is_a_sunday_returns_false_on_non_sunday_input(extract):
     assert not extract._is_a_sunday(date(2019, 4, 1))
 
 
-def test_make_day_list(extract):
-    sunday_date = datetime.date(2016, 12, 11)
-    assert extract._make_day_list(sunday_date
-                                  ) == [Day(sunday_date +
-                                        datetime.timedelta(days=x),
-                                        [])  # [] will hold Event list for Day
-                                        for x in range(Extract.DAYS_IN_A_WEEK)]
-
-
 def test_handle_week_works_for_full_week(infile_wrapper):
     extr = Extract(infile_wrapper)
     extr.line_as_list = ['12/4/2016', '', '', '', '', '', '', '', '', '',
@@ -228,7 +225,7 @@ def test_manage_output_buffer_leaves_last_event_in_buffer(extract):
     extract.new_week = Week(*day_list)
     extract.new_week[6].events.append(Event('w', '13:15', '6.5'))
     extract._manage_output_buffer(out_buffer)
-    assert out_buffer[-1] == 'action: w, time: 13:15, hours: 6.50'
+    assert out_buffer[-1].line() == 'action: w, time: 13:15, hours: 6.50'
 
 
 def test_manage_output_buffer_leaves_date_in_buffer_if_no_events(extract):
@@ -239,7 +236,7 @@ def test_manage_output_buffer_leaves_date_in_buffer_if_no_events(extract):
                 for x in range(7)]
     extract.new_week = Week(*day_list)
     extract._manage_output_buffer(out_buffer)
-    assert out_buffer[-1] == '    2016-04-16'
+    assert out_buffer[-1].line() == '    2016-04-16'
 
 
 def test_get_week_header(extract):
@@ -248,119 +245,299 @@ def test_get_week_header(extract):
                     datetime.timedelta(days=x), [])
                 for x in range(7)]
     extract.new_week = Week(*day_list)
-    assert extract._get_week_header() == '\nWeek of Sunday, 2019-03-24:\n' + \
-        '=' * 26
+    assert extract._get_week_header().line() == \
+        '\nWeek of Sunday, 2019-03-24:\n' + '=' * 26
 
 
 def test_get_day_header(day=Day(datetime.date(2018, 10, 14), [])):
-    assert Extract._get_day_header(day) == '    2018-10-14'
+    assert Extract._get_day_header(day).line() == '    2018-10-14'
 
 
 def test_write_or_discard_night_3_element_b_event_flushes_buffer(extract):
-    output = io.StringIO()
-    out_buffer = ['bongo', 'Hello World']
+    out_buffer = [DayHeader(datetime.date(2017, 10, 11)),
+                  Event('s', '23:00', '')]
     extract._write_or_discard_night(Event(action='b', mil_time='8:15',
                                           hours='4.25'),
-                                    datetime.date(2017, 10, 12), out_buffer,
-                                    output)
-    assert output.getvalue() == 'bongo\nHello World\n'
+                                    datetime.date(2017, 10, 12), out_buffer)
+    assert [r.line() for r in extract.ready] == ['    2017-10-11',
+                                                 'action: s, time: 23:00']
     assert out_buffer == []
 
 
 def test_write_or_discard_night_2_elem_b_event_no_output_pop_actions(extract):
-    output = io.StringIO()
-    out_buffer = ['bongobongo', 'action: s, time: 19:00']
+    header = WeekHeader(datetime.date(2017, 5, 14))
+    out_buffer = [header, Event('s', '19:00', '')]
     extract._write_or_discard_night(Event(action='b', mil_time='10:00',
                                           hours=''),
-                                    datetime.date(2017, 5, 17), out_buffer,
-                                    output)
-    assert output.getvalue() == ''
-    assert out_buffer == ['bongobongo']
+                                    datetime.date(2017, 5, 17), out_buffer)
+    assert extract.ready == []
+    assert out_buffer == [header]
 
 
-def test_write_or_discard_night_2_elem_b_event_long_b_str_in_buffer(extract):
-    output = io.StringIO()
-    out_buffer = ['bbbbbbbbbbbbbbbbbbbbbbbbbbbbbb', 'action: s, time: 17:00']
+def test_write_or_discard_night_2_elem_b_event_leaves_headers(extract):
+    headers = [DayHeader(datetime.date(2017, 3, 18)),
+               DayHeader(datetime.date(2017, 3, 19))]
+    out_buffer = [Event('s', '17:00', ''), *headers]
     extract._write_or_discard_night(Event(action='b', mil_time='23:15',
                                           hours=''),
-                                    datetime.date(2017, 3, 19), out_buffer,
-                                    output)
-    assert output.getvalue() == ''
-    assert out_buffer == ['bbbbbbbbbbbbbbbbbbbbbbbbbbbbbb']
-
-
-def test_write_complete_night(extract, capfd):
-    extract.out_buffer = ['hello', 'there']
-    extract.outfile = sys.stdout
-    extract._write_complete_night(extract.out_buffer, extract.outfile)
-    fd1, fd2 = capfd.readouterr()
-    assert fd1 == 'hello\nthere\n'
-    assert fd2 == ''
-    assert extract.out_buffer == []
-
+                                    datetime.date(2017, 3, 19), out_buffer)
+    assert extract.ready == []
+    assert out_buffer == headers
 
-def test_discard_incomplete_night(extract, capfd):
-    datetime_date = datetime.date(2017, 1, 3)
-    out_buffer = ['action: b, time: 23:00, hours: 7.00',
-                  '\nWeek of Sunday, 2017-01-01:\n==========================',
-                  '    2017-01-01', '    2017-01-02', '    2017-01-03']
-    outfile = sys.stdout
-    extract._discard_incomplete_night(out_buffer, outfile)
-    fd1, fd2 = capfd.readouterr()
-    assert fd1 == 'action: N, time: 23:00\n'
-    assert fd2 == ''
-
-
-def test_match_complete_b_event_line_returns_true_on_complete_b_event_line():
-    line = 'action: b, time: 21:45, hours: 3.75'
-    assert bool(Extract._match_complete_b_event_line(line))
-
-
-def test_match_complete_b_event_line_returns_false_on_incomplete_b_event_line():
-    line = 'action: b, time: 17:25'
-    assert not bool(Extract._match_complete_b_event_line(line))
 
+def test_write_complete_night(extract):
+    out_buffer = [DayHeader(datetime.date(2017, 1, 2)),
+                  Event('w', '6:00', '7.00')]
+    extract._write_complete_night(out_buffer)
+    assert [r.line() for r in extract.ready] == [
+        '    2017-01-02', 'action: w, time: 6:00, hours: 7.00']
+    assert out_buffer == []
 
-def test_match_complete_b_event_line_returns_false_on_non_b_event_line_input():
-    line = 'action: s, time: 17:25'
-    assert not bool(Extract._match_complete_b_event_line(line))
+
+def test_write_complete_night_after_missing_data_marks_b_event_y(extract):
+    extract.in_missing_data = True
+    out_buffer = [Event('b', '23:00', ''), Event('w', '6:00', '7.00')]
+    extract._write_complete_night(out_buffer)
+    assert extract.ready[0].line() == 'action: Y, time: 23:00'
+    assert not extract.in_missing_data
 
 
-def test_match_complete_b_event_line_returns_false_on_non_event_line_input():
-    line = 'cowabunga!!!'
-    assert not bool(Extract._match_complete_b_event_line(line))
+def test_discard_incomplete_night(extract):
+    out_buffer = [Event('b', '23:00', '7.00'),
+                  WeekHeader(datetime.date(2017, 1, 1)),
+                  DayHeader(datetime.date(2017, 1, 1)),
+                  DayHeader(datetime.date(2017, 1, 2)),
+                  DayHeader(datetime.date(2017, 1, 3))]
+    extract._discard_incomplete_night(out_buffer)
+    assert [r.line() for r in extract.ready] == ['action: N, time: 23:00']
+    assert out_buffer == [WeekHeader(datetime.date(2017, 1, 1)),
+                          DayHeader(datetime.date(2017, 1, 1)),
+                          DayHeader(datetime.date(2017, 1, 2)),
+                          DayHeader(datetime.date(2017, 1, 3))]
+    assert extract.in_missing_data
 
 
-def test_match_event_line_returns_true_on_2_element_b_line_input():
-    line = 'action: b, time: 4:25'
-    assert bool(Extract._match_event_line(line))
+def test_records_yields_records_of_complete_nights(infile_wrapper):
+    extract = Extract(open_infile(infile_wrapper))
+    records = list(extract.records())
+    assert records[0] == WeekHeader(datetime.date(2016, 12, 4))
+    assert records[5] == Event('Y', '23:45', '')
+    assert records[-1] == Event('w', '17:00', '1.00')
 
 
-def test_match_event_line_returns_true_on_3_element_b_line_input():
-    line = 'action: b, time: 4:25, hours: 6.00'
-    assert bool(Extract._match_event_line(line))
+def test_is_complete_b_event_returns_true_on_3_element_b_event():
+    assert Extract._is_complete_b_event(Event('b', '21:45', '3.75'))
 
 
-def test_match_event_line_returns_true_on_2_element_s_line_input():
-    line = 'action: s, time: 4:25'
-    assert bool(Extract._match_event_line(line))
+def test_is_complete_b_event_returns_false_on_2_element_b_event():
+    assert not Extract._is_complete_b_event(Event('b', '17:25', ''))
 
 
-def test_match_event_line_returns_true_on_3_element_w_line_input():
-    line = 'action: w, time: 11:00, hours: 10.50'
-    assert bool(Extract._match_event_line(line))
+def test_is_complete_b_event_returns_false_on_non_b_event():
+    assert not Extract._is_complete_b_event(Event('w', '17:25', '1.00'))
 
 
-def test_match_event_line_returns_false_on_3_element_s_line_input():
-    line = 'action: s, time: 12:00, hours: 6.00'
-    assert not bool(Extract._match_event_line(line))
+def test_is_complete_b_event_returns_false_on_header():
+    assert not Extract._is_complete_b_event(
+        DayHeader(datetime.date(2017, 1, 1)))
 
 
-def test_match_event_line_returns_false_on_2_element_w_line_input():
-    line = 'action: w, time: 11:45'
-    assert not bool(Extract._match_event_line(line))
+def test_discard_incomplete_night_truncates_at_night_start(extract):
+    kept = [DayHeader(datetime.date(2017, 1, 1)),
+            DayHeader(datetime.date(2017, 1, 2))]
+    out_buffer = kept + [Event('b', '23:00', ''),
+                         DayHeader(datetime.date(2017, 1, 3)),
+                         Event('w', '6:00', '7.00')]
+    extract.night_start = 2
+    extract._discard_incomplete_night(out_buffer)
+    assert extract.ready == []
+    assert out_buffer == kept + [DayHeader(datetime.date(2017, 1, 3))]
 
 
-def test_match_event_line_returns_false_on_non_action_input():
-    line = '=' * 18
-    assert not bool(Extract._match_event_line(line))
+def test_parallel_extract_output_matches_extract():
+    csv_text = make_csv(30, missing_data_rate=0.2)
+    serial_out, parallel_out = io.StringIO(), io.StringIO()
+    Extract(io.StringIO(csv_text)).lines_in_weeks_out(serial_out)
+    ParallelExtract(io.StringIO(csv_text), workers=2,
+                    chunks_per_worker=3).lines_in_weeks_out(parallel_out)
+    assert parallel_out.getvalue() == serial_out.getvalue()
+
+
+def test_file_ending_in_one_blank_row_yields_last_week_once():
+    csv_text = make_csv(3)
+    one_blank = csv_text[:-len(BLANK_ROW) - 1]  # drop the final blank row
+    assert one_blank.endswith(BLANK_ROW + '\n')
+    records = list(Extract(io.StringIO(one_blank)).records())
+    week_dates = [record.sunday for record in records
+                  if isinstance(record, WeekHeader)]
+    assert week_dates == [date(2016, 12, 4), date(2016, 12, 11),
+                          date(2016, 12, 18)]
+    assert records == list(Extract(io.StringIO(csv_text)).records())
+
+
+def test_split_at_blank_lines_splits_only_after_blank_lines():
+    lines = ['12/4/2016,b,23:45,\n', ',,s,4:45,\n', ',,,,\n',
+             '12/11/2016,w,3:45,4.00\n', ' , ,\n', ',,w,5:00,2.00\n']
+    chunks = ParallelExtract._split_at_blank_lines(lines, 2)
+    assert chunks == [lines[:3], lines[3:5], lines[5:]]
+
+
+def run_incremental(csv_text, tmp_path):
+    csv_file = tmp_path / 'sleep.csv'
+    csv_file.write_text(csv_text)
+    with open(str(csv_file), 'rb') as infile:
+        return list(IncrementalExtract(
+            infile, str(tmp_path / 'sleep.checkpoint')).records())
+
+
+def test_incremental_runs_add_up_to_a_full_run(tmp_path):
+    csv_text = make_csv(6, seed=3, missing_data_rate=0.3)
+    runs = [run_incremental(csv_through_day(csv_text, days), tmp_path)
+            for days in range(1, 43)]
+    full = list(Extract(io.StringIO(csv_text)).records())
+    assert [record for run in runs for record in run
+            if isinstance(record, Event)] == \
+        [record for record in full if isinstance(record, Event)]
+    assert [night_nap for run in runs
+            for night_nap in Transform().read_records(run)] == \
+        list(Transform().read_records(full))
+
+
+def test_incremental_rerun_of_unchanged_input_yields_nothing(tmp_path):
+    csv_text = make_csv(4, missing_data_rate=0.2)
+    assert run_incremental(csv_text, tmp_path)
+    assert run_incremental(csv_text, tmp_path) == []
+
+
+def test_incremental_run_after_an_edit_is_a_full_run(tmp_path):
+    csv_text = make_csv(4, missing_data_rate=0.2)
+    run_incremental(csv_text, tmp_path)
+    edited = csv_text.replace(',s,', ',q,', 1)
+    assert run_incremental(edited, tmp_path) == \
+        list(Extract(io.StringIO(edited)).records())
+
+
+def run_changed_weeks(csv_text, tmp_path):
+    csv_file = tmp_path / 'sleep.csv'
+    csv_file.write_text(csv_text)
+    with open(str(csv_file), 'rb') as infile:
+        extract = ChangedWeeksExtract(infile, str(tmp_path / 'weeks.json'))
+        return list(extract.records()), extract.changes
+
+
+def nights_naps(records):
+    return list(Transform().read_records(records))
+
+
+def test_changed_weeks_first_run_is_a_full_run(tmp_path):
+    csv_text = make_csv(5, missing_data_rate=0.2)
+    records, changes = run_changed_weeks(csv_text, tmp_path)
+    assert records == list(Extract(io.StringIO(csv_text)).records())
+    assert changes['added'] == ['2016-12-04', '2016-12-11', '2016-12-18',
+                                '2016-12-25', '2017-01-01']
+
+
+def test_changed_weeks_rerun_of_unchanged_input_yields_nothing(tmp_path):
+    csv_text = make_csv(5, missing_data_rate=0.2)
+    run_changed_weeks(csv_text, tmp_path)
+    assert run_changed_weeks(csv_text, tmp_path) == \
+        ([], {'added': [], 'changed': [], 'deleted': []})
+
+
+def test_changed_weeks_yields_only_the_nights_around_an_edit(tmp_path):
+    csv_text = make_csv(20, seed=1, missing_data_rate=0.1)
+    run_changed_weeks(csv_text, tmp_path)
+    rows = csv_text.splitlines()
+    week_10 = next(ix for ix, row in enumerate(rows)
+                   if row.startswith('2/5/2017,'))
+    row_ix = next(ix for ix in range(week_10, len(rows))
+                  if re.search(r',b,\d+:\d\d,\d', rows[ix]))
+    rows[row_ix] = re.sub(r'(,b,\d+:\d\d,)[\d.]+', r'\1', rows[row_ix], 1)
+    edited = '\n'.join(rows) + '\n'
+    records, changes = run_changed_weeks(edited, tmp_path)
+    assert changes == {'added': [], 'changed': ['2017-02-05'], 'deleted': []}
+    old = nights_naps(Extract(io.StringIO(csv_text)).records())
+    new = nights_naps(Extract(io.StringIO(edited)).records())
+    region = nights_naps(records)
+    start = next(ix for ix in range(len(new)) if new[ix:ix + len(region)] ==
+                 region)
+    end = start + len(region)
+    assert old[:start] == new[:start]
+    assert old[len(old) - len(new) + end:] == new[end:]
+    assert len(region) < len(new) // 5
+
+
+def test_changed_weeks_reports_added_and_deleted_weeks(tmp_path):
+    csv_text = make_csv(6, missing_data_rate=0.2)
+    first = csv_text[:csv_text.index('1/8/2017,')]
+    run_changed_weeks(first, tmp_path)
+    week_2_start = csv_text.index('12/11/2016,')
+    week_3_start = csv_text.index('12/18/2016,')
+    edited = csv_text[:week_2_start] + csv_text[week_3_start:]
+    records, changes = run_changed_weeks(edited, tmp_path)
+    assert changes == {'added': ['2017-01-08'], 'changed': [],
+                       'deleted': ['2016-12-11']}
+    old = Counter(nights_naps(Extract(io.StringIO(first)).records()))
+    new = Counter(nights_naps(Extract(io.StringIO(edited)).records()))
+    region = Counter(nights_naps(records))
+    assert not new - old - region
+    assert not region - new
+
+
+def run_mapped(csv_text, tmp_path, **kwargs):
+    csv_file = tmp_path / 'sleep.csv'
+    if not csv_file.exists() or csv_file.read_text() != csv_text:
+        csv_file.write_text(csv_text)
+    with open(str(csv_file), 'rb') as infile:
+        return [record.line() for record in MappedExtract(
+            infile, str(tmp_path / 'sleep.index.json'), **kwargs).records()]
+
+
+@pytest.mark.parametrize('edit', [
+    lambda text: text,
+    lambda text: text.replace('\n', '\r\n'),
+    lambda text: text.replace(BLANK_ROW, '\n'.join([BLANK_ROW] * 5)),
+    lambda text: text.replace(',,\n', '\n').replace(',s,', ', s ,'),
+])
+def test_mapped_extract_output_matches_extract(tmp_path, edit):
+    csv_text = edit(make_csv(12, missing_data_rate=0.2))
+    assert run_mapped(csv_text, tmp_path) == \
+        [record.line() for record in Extract(io.StringIO(csv_text)).records()]
+
+
+def test_mapped_extract_rebuilds_its_index_only_for_a_changed_file(
+        tmp_path, monkeypatch):
+    csv_text = make_csv(6, missing_data_rate=0.2)
+    builds = []
+    build_index = MappedExtract._build_index
+    monkeypatch.setattr(MappedExtract, '_build_index',
+                        lambda self, data: builds.append(1) or
+                        build_index(self, data))
+    first = run_mapped(csv_text, tmp_path)
+    assert run_mapped(csv_text, tmp_path) == first
+    assert len(builds) == 1
+    run_mapped(make_csv(7, missing_data_rate=0.2), tmp_path)
+    assert len(builds) == 2
+
+
+@pytest.mark.parametrize('since, until', [
+    (date(2016, 12, 20), date(2017, 1, 4)),
+    (date(2017, 1, 1), None),
+    (None, date(2016, 12, 28)),
+])
+def test_mapped_extract_yields_the_nights_in_range_as_a_full_run(
+        tmp_path, since, until):
+    csv_text = make_csv(8, seed=3, missing_data_rate=0.3)
+    csv_file = tmp_path / 'sleep.csv'
+    csv_file.write_text(csv_text)
+    with open(str(csv_file), 'rb') as infile:
+        in_range = list(MappedExtract(infile, None, since, until).records())
+    full = list(DateRange(since, until).extract_records(
+        Extract(io.StringIO(csv_text)).records()))
+    assert [record for record in in_range if isinstance(record, Event)] == \
+        [record for record in full if isinstance(record, Event)]
+    assert nights_naps(in_range) == nights_naps(full)
+    starts = [night.start_date for night in nights_naps(in_range)
+              if isinstance(night, Night)]
+    assert starts and (since or date.min) <= min(starts) and \
+        max(starts) <= (until or date.max)
@@ -0,0 +1,104 @@
+# file: tests/test_receiver.py
+# andrew jarcho
+# 2026-10-18
+
+import asyncio
+import io
+import logging
+import logging.handlers
+
+from src.logging.receiver import (BUFFER_SIZE, LOG_FORMAT, BufferedSink,
+                                  CachedTimeFormatter, LogReceiver,
+                                  LogRecordProtocol, decode_frames)
+
+
+def frame(msg, *args):
+    """ :return: msg's record, as a SocketHandler sends it """
+    handler = logging.handlers.SocketHandler('localhost', 0)
+    return handler.makePickle(logging.makeLogRecord(
+        {'name': 'test', 'msg': msg, 'args': args,
+         'levelname': 'WARNING'}))
+
+
+def make_sink():
+    return BufferedSink(io.StringIO(), logging.Formatter('%(message)s'))
+
+
+def test_decode_frames_stops_at_an_incomplete_frame():
+    data = frame('one') + frame('two %s', 2) + frame('three')[:-1]
+    records, start = decode_frames(memoryview(data), 0, len(data))
+    assert [record.getMessage() for record in records] == ['one', 'two 2']
+    assert start == len(frame('one') + frame('two %s', 2))
+
+
+def test_decoded_records_format_as_sent():
+    sent = [logging.makeLogRecord({'msg': 'at %s', 'args': (ix,),
+                                   'created': 1e9 + ix / 3,
+                                   'levelname': 'INFO'})
+            for ix in range(6)]
+    handler = logging.handlers.SocketHandler('localhost', 0)
+    data = b''.join(map(handler.makePickle, sent))
+    received, _ = decode_frames(memoryview(data), 0, len(data))
+    formatter = logging.Formatter(LOG_FORMAT)
+    assert list(map(CachedTimeFormatter(LOG_FORMAT).format, received)) == \
+        list(map(formatter.format, sent))
+
+
+class FakeReceiver:
+    def __init__(self, sink):
+        self.sink = sink
+        self.connections = set()
+
+
+def feed(protocol, data, chunk_size):
+    while data:
+        buffer = protocol.get_buffer(-1)
+        nbytes = min(chunk_size, len(buffer), len(data))
+        buffer[:nbytes] = data[:nbytes]
+        protocol.buffer_updated(nbytes)
+        data = data[nbytes:]
+
+
+def test_protocol_reassembles_frames_split_across_reads():
+    sink = make_sink()
+    protocol = LogRecordProtocol(FakeReceiver(sink))
+    feed(protocol, b''.join(frame('record %s', ix) for ix in range(100)), 7)
+    sink.flush()
+    assert sink.stream.getvalue().splitlines() == \
+        ['record {}'.format(ix) for ix in range(100)]
+
+
+def test_protocol_grows_its_buffer_for_a_big_record():
+    sink = make_sink()
+    protocol = LogRecordProtocol(FakeReceiver(sink))
+    big = 'x' * (3 * BUFFER_SIZE)
+    feed(protocol, frame('small') + frame(big) + frame('after'), BUFFER_SIZE)
+    sink.flush()
+    assert sink.stream.getvalue().splitlines() == ['small', big, 'after']
+    assert protocol.end == 0
+
+
+def test_sink_holds_lines_until_flush_size():
+    sink = BufferedSink(io.StringIO(), logging.Formatter('%(message)s'),
+                        flush_size=8)
+    sink.write_batch([logging.makeLogRecord({'msg': 'four'})])
+    assert sink.stream.getvalue() == ''
+    sink.write_batch([logging.makeLogRecord({'msg': 'eight'})])
+    assert sink.stream.getvalue() == 'four\neight\n'
+
+
+def test_receiver_writes_socket_handler_records_before_stopping():
+    sink = make_sink()
+
+    async def run():
+        receiver = LogReceiver(sink)
+        port = await receiver.start('localhost', 0)
+        _, writer = await asyncio.open_connection('localhost', port)
+        writer.write(b''.join(frame('record %s', ix) for ix in range(50)))
+        await writer.drain()
+        writer.close()
+        await receiver.stop()
+
+    asyncio.run(run())
+    assert sink.stream.getvalue().splitlines() == \
+        ['record {}'.format(ix) for ix in range(50)]
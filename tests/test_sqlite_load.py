@@ -0,0 +1,76 @@
+# file: tests/test_sqlite_load.py
+# andrew jarcho
+# 2026-10-18
+
+import io
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.extract.read_fns import Extract
+from src.load.load import (LoadOptions, SqliteBackend, open_backend,
+                           read_records)
+from src.transform.do_transform import Transform
+from tests.sample_csv import make_csv
+from tests.test_db_input import chart_output
+
+
+LINES = ['NAP, 03:00, 01.00\n',  # before any night: not stored
+         'NIGHT, 2017-01-01, 23:15, false, false\n',
+         'NAP, 23:15, 07.25\n',
+         'NIGHT, 2017-01-02, 23:45, true, true\n',  # fails the CHECK
+         'NAP, 23:45, 06.50\n',  # its night was not stored: nor is it
+         'NIGHT, 2017-01-03, 22:30, true, false\n',
+         'NAP, 22:30, 08.00\n',
+         'NAP, 14:00, 00.75\n']
+
+
+def tables(db_name):
+    with sqlite3.connect(db_name) as connection:
+        return (connection.execute('SELECT * FROM sl_night').fetchall(),
+                connection.execute('SELECT start_time, duration, night_id '
+                                   'FROM sl_nap').fetchall())
+
+
+def test_store_follows_the_server_functions(tmp_path):
+    db_name = str(tmp_path / 'sleep.db')
+    backend = open_backend('sqlite:///' + db_name)
+    assert isinstance(backend, SqliteBackend)
+    assert backend.store(read_records(LINES),
+                         LoadOptions(sqlite_batch=2)) == \
+        {'nights': 2, 'naps': 3}
+    backend.store(read_records(LINES[1:3]), LoadOptions())
+    nights, naps = tables(db_name)
+    assert nights == [(1, '2017-01-01', '23:15', 0, 0),
+                      (3, '2017-01-03', '22:30', 1, 0),
+                      (4, '2017-01-01', '23:15', 0, 0)]
+    assert naps == [('23:15', '07:15', 1), ('22:30', '08:00', 3),
+                    ('14:00', '00:45', 3), ('23:15', '07:15', 4)]
+    with sqlite3.connect(db_name) as connection:
+        assert connection.execute('PRAGMA journal_mode').fetchone() == \
+            ('wal',)
+
+
+@pytest.mark.parametrize('options', [
+    LoadOptions(bulk=True), LoadOptions(jobs=2), LoadOptions(chunk_nights=5),
+    LoadOptions(upsert=True), LoadOptions(batch_size=500)])
+def test_store_refuses_postgresql_only_modes(tmp_path, options):
+    backend = open_backend('sqlite:///' + str(tmp_path / 'sleep.db'))
+    with pytest.raises(ValueError):
+        backend.store(read_records(LINES), options)
+
+
+def test_chart_from_sqlite_matches_chart_from_file(tmp_path):
+    csv_text = make_csv(10, missing_data_rate=0.2)
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(csv_text)).lines_in_weeks_out(outfile)
+    url = 'sqlite:///' + str(tmp_path / 'sleep.db')
+    open_backend(url).store(Transform().read_records(
+        Extract(io.StringIO(csv_text)).records()),
+        LoadOptions(sqlite_batch=7))
+    expected = chart_output(lambda chart: chart.read_file(),
+                            filename=str(extract_file))
+    assert chart_output(lambda chart: chart.read_db(create_engine(url))) == \
+        expected
@@ -0,0 +1,88 @@
+# file: tests/test_stats.py
+# andrew jarcho
+# 2026-10-18
+
+import contextlib
+import io
+import json
+from argparse import Namespace
+from datetime import date
+
+from src.chart import stats
+from src.chart.chart_new import Chart, MatrixChart
+from src.extract.read_fns import Extract
+from tests.sample_csv import make_csv
+
+
+def write_extract(tmp_path, weeks):
+    extract_file = tmp_path / 'extract.txt'
+    with open(str(extract_file), 'w') as outfile:
+        Extract(io.StringIO(make_csv(weeks, missing_data_rate=0.2))) \
+            .lines_in_weeks_out(outfile)
+    return str(extract_file)
+
+
+def filled_chart(chart_class, filename, since=None, until=None,
+                 resolution=15):
+    chart = chart_class(Namespace(debug=True, binary=False,
+                                  filename=filename, since=since,
+                                  until=until), resolution)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        if chart_class is MatrixChart:
+            chart.fill_matrix(chart.read_file())
+        else:
+            chart.make_output(chart.read_file())
+    return chart, out.getvalue()
+
+
+def test_running_means_average_what_there_is():
+    assert stats.running_means([2, 4, 6, 8], 3) == [2, 3, 4, 6]
+
+
+def test_sleep_blocks_run_on_past_midnight():
+    rows = [b'oxxo', b'-oxx', b'xxxx', b'xo-x']
+    assert stats.sleep_blocks(iter(rows)) == ([1, 1, 0, 1], [2, 7, 0, 1])
+
+
+def test_day_stats_count_the_chart_rows(tmp_path):
+    filename = write_extract(tmp_path, 8)
+    _, output = filled_chart(Chart, filename)
+    rows = [line.split(' |') for line in output.splitlines() if '|' in line]
+    chart, _ = filled_chart(MatrixChart, filename)
+    day_stats = stats.day_stats(chart)
+    assert [day.date for day in day_stats] == [day for day, _ in rows]
+    flat = ''.join(row.rstrip('|').lower() for _, row in rows)
+    for ix, (day, (_, row)) in enumerate(zip(day_stats, rows)):
+        row = row.rstrip('|').lower()
+        assert day.sleep_hours == row.count('x') / 4
+        assert day.no_data_fraction == round(row.count('-') / 96, 4)
+        starts = [col for col in range(96) if row[col] == 'x' and
+                  (ix == col == 0 or flat[96 * ix + col - 1] != 'x')]
+        assert day.naps == len(starts)
+    week = [day.sleep_hours for day in day_stats[10:17]]
+    assert day_stats[16].sleep_7_day_avg == round(sum(week) / 7, 3)
+    assert max(day.longest_block_hours for day in day_stats) <= 24
+
+
+def test_day_stats_in_range_as_json(tmp_path):
+    filename = write_extract(tmp_path, 8)
+    full, _ = filled_chart(MatrixChart, filename)
+    chart, _ = filled_chart(MatrixChart, filename, date(2016, 12, 20),
+                            date(2017, 1, 9))
+    day_stats = stats.day_stats(chart)
+    assert [day.date for day in day_stats] == \
+        [day.date for day in stats.day_stats(full)
+         if '2016-12-20' <= day.date <= '2017-01-09']
+    out = io.StringIO()
+    stats.write_json(day_stats, out)
+    assert json.loads(out.getvalue())[0] == day_stats[0]._asdict()
+
+
+def test_day_stats_do_not_depend_on_resolution_for_quarter_data(tmp_path):
+    filename = write_extract(tmp_path, 8)
+    quarters, _ = filled_chart(MatrixChart, filename)
+    for resolution in (5, 1):
+        chart, _ = filled_chart(MatrixChart, filename, resolution=resolution)
+        assert len(chart.matrix) == len(quarters.matrix) * 15 // resolution
+        assert stats.day_stats(chart) == stats.day_stats(quarters)
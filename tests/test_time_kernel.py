@@ -0,0 +1,39 @@
+# file: tests/test_time_kernel.py
+# andrew jarcho
+# 2026-10-18
+
+from src.time_kernel import (DECIMAL_HOURS, QUARTERS, interval,
+                             minute_index, nearest_quarter, slot_counts)
+
+
+def test_minute_index_accepts_padded_and_unpadded_hours():
+    assert minute_index('7:45') == minute_index('07:45') == 465
+    assert minute_index('23:59') == 1439
+
+
+def test_minute_index_wraps_hours_past_23():
+    assert minute_index('24:15') == 15
+
+
+def test_interval_wraps_past_midnight():
+    assert interval(minute_index('22:30'), minute_index('6:15')) == 465
+    assert interval(minute_index('10:30'), minute_index('10:30')) == 0
+
+
+def test_nearest_quarter_rounds_minutes_past_45_down():
+    assert [nearest_quarter(m) for m in (7, 8, 22, 23, 36, 37, 59)] == \
+        [0, 15, 15, 30, 30, 45, 45]
+
+
+def test_decimal_hours_and_quarters_of_an_interval():
+    assert DECIMAL_HOURS[4 * 60 + 15] == '04.25'
+    assert DECIMAL_HOURS[23 * 60 + 59] == '23.75'
+    assert QUARTERS[4 * 60 + 15] == 17
+    assert QUARTERS[10] == 1
+
+
+def test_slot_counts_round_to_the_nearest_slot_within_the_hour():
+    assert slot_counts(15) is QUARTERS
+    assert slot_counts(1)[4 * 60 + 17] == 4 * 60 + 17
+    assert [slot_counts(5)[m] for m in (2, 3, 37, 57, 58, 60)] == \
+        [0, 1, 7, 11, 11, 12]
@@ -0,0 +1,151 @@
+# file: tests/test_upsert_load.py
+# andrew jarcho
+# 2026-10-18
+
+from datetime import date
+
+from src.load import upsert_load
+from src.load.load import decimal_to_interval, read_records
+from src.load.upsert_load import nights_with_naps, store_upserting
+from src.records import Nap, Night
+
+
+class FakeTransaction:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeDb:
+    """
+    Holds sl_night and sl_nap rows as READ_STORED returns them, and
+    runs the upsert's writes on them
+    """
+    def __init__(self):
+        self.nights = {}  # night_id: [start_date, start_time, flags...]
+        self.naps = []  # [start_time, duration, night_id]
+        self.statements = []
+
+    def connect(self):
+        return self
+
+    def begin(self):
+        return FakeTransaction()
+
+    def close(self):
+        pass
+
+    def execute(self, statement, *params):
+        self.statements.append(statement)
+        if statement == upsert_load.READ_STORED:
+            first, last = params
+            rows = []
+            for night_id, night in sorted(self.nights.items()):
+                if first <= night[0] <= last:
+                    naps = [nap[:2] for nap in self.naps
+                            if nap[2] == night_id] or [[None, None]]
+                    rows += [(night_id, *night, *nap) for nap in naps]
+            return rows
+        if statement == upsert_load.UPDATE_NIGHT:
+            for *flags, night_id in params[0]:
+                if flags == ['true', 'true']:
+                    raise ValueError('violates sl_night CHECK')
+                self.nights[night_id][2:] = flags
+        elif statement == upsert_load.DELETE_NAPS:
+            gone = {row[0] for row in params[0]}
+            self.naps = [nap for nap in self.naps if nap[2] not in gone]
+        elif statement == upsert_load.INSERT_NAP:
+            self.naps += [list(row) for row in params[0]]
+        return None
+
+    def load_records(self, connection, records, bulk):
+        for record in records:
+            if isinstance(record, Night):
+                night_id = len(self.nights) + 1
+                self.nights[night_id] = list(record)
+            else:
+                self.naps.append([record.start_time,
+                                  decimal_to_interval(record.duration),
+                                  night_id])
+
+    def upsert(self, lines):
+        return store_upserting(self, read_records(lines), self.load_records,
+                               decimal_to_interval)
+
+
+LINES = ['NIGHT, 2017-01-01, 23:15, false, false\n',
+         'NAP, 23:15, 07.25\n',
+         'NIGHT, 2017-01-02, 23:45, false, false\n',
+         'NAP, 23:45, 06.50\n',
+         'NAP, 14:00, 00.75\n']
+
+
+def test_nights_with_naps_groups_and_skips_leading_naps():
+    groups = list(nights_with_naps(read_records(['NAP, 04:00, 01.00\n',
+                                                 *LINES])))
+    assert [(night.start_date, len(naps)) for night, naps in groups] == \
+        [('2017-01-01', 1), ('2017-01-02', 2)]
+
+
+def test_reload_writes_nothing():
+    db = FakeDb()
+    assert db.upsert(LINES) == {'inserted': 2, 'updated': 0,
+                                'unchanged': 0}
+    db.statements.clear()
+    assert db.upsert(LINES) == {'inserted': 0, 'updated': 0,
+                                'unchanged': 2}
+    assert db.statements == [upsert_load.READ_STORED]
+    assert len(db.nights) == 2 and len(db.naps) == 3
+
+
+def test_overlapping_input_inserts_new_and_updates_changed():
+    db = FakeDb()
+    db.upsert(LINES)
+    changed = ['NIGHT, 2017-01-02, 23:45, false, true\n',
+               'NAP, 23:45, 06.50\n',
+               'NAP, 15:00, 01.00\n',
+               'NIGHT, 2017-01-03, 22:30, false, false\n',
+               'NAP, 22:30, 08.00\n']
+    assert db.upsert(changed) == {'inserted': 1, 'updated': 1,
+                                  'unchanged': 0}
+    assert db.nights == {
+        1: ['2017-01-01', '23:15', 'false', 'false'],
+        2: ['2017-01-02', '23:45', 'false', 'true'],
+        3: ['2017-01-03', '22:30', 'false', 'false']}
+    assert sorted(db.naps) == sorted([['23:15', '07:15', 1],
+                                      ['23:45', '06:30', 2],
+                                      ['15:00', '01:00', 2],
+                                      ['22:30', '08:00', 3]])
+
+
+def test_changed_night_failing_the_check_is_skipped_with_its_naps():
+    db = FakeDb()
+    db.upsert(LINES)
+    changed = ['NIGHT, 2017-01-01, 23:15, true, true\n',
+               'NAP, 23:15, 05.00\n',
+               'NIGHT, 2017-01-02, 23:45, false, true\n',
+               'NAP, 23:45, 06.50\n',
+               'NAP, 14:00, 00.75\n',
+               'NIGHT, 2017-01-03, 22:30, false, false\n']
+    assert db.upsert(changed) == {'inserted': 1, 'updated': 1,
+                                  'unchanged': 0}
+    assert db.nights == {
+        1: ['2017-01-01', '23:15', 'false', 'false'],
+        2: ['2017-01-02', '23:45', 'false', 'true'],
+        3: ['2017-01-03', '22:30', 'false', 'false']}
+    assert sorted(db.naps) == sorted([['23:15', '07:15', 1],
+                                      ['23:45', '06:30', 2],
+                                      ['14:00', '00:45', 2]])
+
+
+def test_records_made_in_process_match_their_stored_nights():
+    db = FakeDb()
+    db.upsert(LINES)
+    records = [Night(date(2017, 1, 2), '23:45', False, True),
+               Nap('23:45', '06.50'), Nap('14:00', '00.75')]
+    assert store_upserting(db, records, db.load_records,
+                           decimal_to_interval) == \
+        {'inserted': 0, 'updated': 1, 'unchanged': 0}
+    assert db.nights[2] == ['2017-01-02', '23:45', 'false', 'true']